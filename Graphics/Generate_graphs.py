@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 import os
+import sys
 import json
 import argparse
 import numpy as np
@@ -10,6 +11,8 @@ import logging
 logger = logging.getLogger("generate_graphs")
 
 BASE_GRAPHICS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_GRAPHICS_DIR), "steering-service", "src"))
+from columnar_log import COLUMNAR_LOG_EXTENSION, is_columnar_log, read_log_frame
 DEFAULT_SIM_DATA_DIR = os.path.join(BASE_GRAPHICS_DIR, "Logs")
 DEFAULT_IMG_DIR = os.path.join(BASE_GRAPHICS_DIR, "Img")
 
@@ -124,7 +127,7 @@ def generate_plots(csv_file_path: str):
     os.makedirs(current_img_dir, exist_ok=True)
     logger.info(f"Reading data from: {csv_filename_with_ext}")
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_log_frame(csv_file_path)
     except pd.errors.EmptyDataError:
         logger.warning(f"CSV file {csv_filename_with_ext} is empty. No graphs will be generated.")
         return
@@ -396,7 +399,7 @@ if __name__ == "__main__":
                 paths_to_check.append(os.path.join(d_dir, os.path.basename(csv_to_process) + ".csv"))
         unique_paths_to_check = sorted(list(set(paths_to_check)), key=lambda p: (not os.path.isabs(p) or not p.startswith(os.getcwd()), p))
         for potential_path in unique_paths_to_check:
-            if os.path.exists(potential_path) and os.path.isfile(potential_path):
+            if os.path.exists(potential_path) and (os.path.isfile(potential_path) or is_columnar_log(potential_path)):
                 resolved_path = os.path.abspath(potential_path)
                 break
         if resolved_path:
@@ -411,7 +414,7 @@ if __name__ == "__main__":
             if os.path.isdir(dirname):
                 logger.info(f"Searching for CSV files in: {dirname}")
                 for filename in sorted(os.listdir(dirname)):
-                    if filename.startswith("log_") and filename.endswith(".csv") and "_average" not in filename:
+                    if filename.startswith("log_") and filename.endswith((".csv", COLUMNAR_LOG_EXTENSION)) and "_average" not in filename:
                         full_path = os.path.join(dirname, filename)
                         logger.info(f"---> Processing {filename} from {os.path.basename(dirname)}/")
                         generate_plots(full_path)
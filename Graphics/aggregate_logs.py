@@ -3,12 +3,15 @@ import os
 import re
 import argparse
 import numpy as np
+import sys
 import json
 import logging
 
 logger = logging.getLogger("aggregate_logs")
 
 BASE_GRAPHICS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_GRAPHICS_DIR), "steering-service", "src"))
+from columnar_log import COLUMNAR_LOG_EXTENSION, MATRIX_FIELDS, is_columnar_log, read_log_frame
 DEFAULT_SIM_DATA_DIR = os.path.join(BASE_GRAPHICS_DIR, "Logs")
 DEFAULT_OUTPUT_DIR = os.path.join(DEFAULT_SIM_DATA_DIR, "Average")
 MAX_AGGREGATION_TIME_SECONDS = 150
@@ -81,18 +84,25 @@ def parse_json_series_to_dataframe(series: pd.Series, prefix: str = "") -> pd.Da
     df_result = pd.DataFrame(parsed_rows, index=valid_indices, columns=list(prefixed_final_column_keys))
     return df_result
 
+def server_columns_to_dataframe(df_run: pd.DataFrame, json_col_name: str, prefix: str = "") -> pd.DataFrame:
+    """Same result as parse_json_series_to_dataframe, from the per-server columns of a columnar log (no JSON parsing)."""
+    raw_key = MATRIX_FIELDS[json_col_name]
+    columns = [col for col in df_run.columns if col.startswith(f"{raw_key}.")]
+    parsed_df = df_run[columns].dropna(how="all")
+    return parsed_df.rename(columns={col: f"{prefix}{col[len(raw_key) + 1:].replace('-', '_')}" for col in columns})
+
 def aggregate_strategy_logs(strategy_name: str, suffix_pattern: str = "",
                             input_dir: str = DEFAULT_SIM_DATA_DIR,
                             output_dir: str = DEFAULT_OUTPUT_DIR):
     log_files = []
     base_pattern_str = f"log_{strategy_name}"
     if suffix_pattern:
-        file_pattern = re.compile(rf"^{re.escape(base_pattern_str + suffix_pattern)}(_\d+)?\.csv$")
+        file_pattern = re.compile(rf"^{re.escape(base_pattern_str + suffix_pattern)}(_\d+)?(\.csv|{re.escape(COLUMNAR_LOG_EXTENSION)})$")
     else:
-        file_pattern = re.compile(rf"^{re.escape(base_pattern_str)}(.*?)(_\d+)?\.csv$")
+        file_pattern = re.compile(rf"^{re.escape(base_pattern_str)}(.*?)(_\d+)?(\.csv|{re.escape(COLUMNAR_LOG_EXTENSION)})$")
     logger.info(f"Aggregating logs for strategy: '{strategy_name}', suffix pattern: '{suffix_pattern}', input: '{input_dir}'")
     for filename in os.listdir(input_dir):
-        if os.path.isfile(os.path.join(input_dir, filename)):
+        if os.path.isfile(os.path.join(input_dir, filename)) or is_columnar_log(os.path.join(input_dir, filename)):
             match = file_pattern.match(filename)
             if match:
                 if not suffix_pattern:
@@ -113,7 +123,8 @@ def aggregate_strategy_logs(strategy_name: str, suffix_pattern: str = "",
     first_run_categorical_data = {}
     for i, f_path in enumerate(log_files):
         try:
-            df_run = pd.read_csv(f_path, na_filter=True)
+            columnar = is_columnar_log(f_path)
+            df_run = read_log_frame(f_path) if columnar else pd.read_csv(f_path, na_filter=True)
             if df_run.empty or 'sim_time_client' not in df_run.columns:
                 logger.warning(f"File {os.path.basename(f_path)} empty or missing 'sim_time_client'. Skipping.")
                 continue
@@ -160,7 +171,8 @@ def aggregate_strategy_logs(strategy_name: str, suffix_pattern: str = "",
 
             for json_col_name, target_list, prefix in json_processing_map:
                 if json_col_name in df_run.columns and not df_run[json_col_name].dropna().empty:
-                    parsed_df = parse_json_series_to_dataframe(df_run[json_col_name], prefix=prefix)
+                    parsed_df = server_columns_to_dataframe(df_run, json_col_name, prefix=prefix) if columnar else \
+                                parse_json_series_to_dataframe(df_run[json_col_name], prefix=prefix)
                     if not parsed_df.empty:
                         valid_indices_for_time_group = parsed_df.index.intersection(df_run.index)
                         if not valid_indices_for_time_group.empty:
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import EpsilonGreedy, UCB1Selector, D_UCB, SW_UCB, ThompsonSamplingSelector, LinUCBSelector
+from batching import FeedbackBatcher
+
+logger = logging.getLogger("bench_feedback_batching")
+
+SELECTOR_FACTORIES = {
+    "epsilon_greedy": lambda: EpsilonGreedy(epsilon=0.1, counts={}, values={}),
+    "ucb1": UCB1Selector,
+    "d_ucb": D_UCB,
+    "sw_ucb": SW_UCB,
+    "thompson": ThompsonSamplingSelector,
+    "linucb": LinUCBSelector,
+}
+
+def build_selector(strategy: str, arm_names: list):
+    selector = SELECTOR_FACTORIES[strategy]()
+    selector.initialize(arm_names)
+    return selector
+
+def feedback_stream(n_arms: int, n_samples: int, seed: int):
+    rng = np.random.default_rng(seed)
+    base_latencies = rng.uniform(10, 200, size=n_arms)
+    picks = rng.integers(0, n_arms, size=n_samples)
+    noisy = base_latencies[picks] * rng.normal(1.0, 0.15, size=n_samples)
+    return picks.tolist(), noisy.tolist()
+
+def updates_per_second(strategy: str, arm_names: list, picks: list, latencies: list,
+                       decide_every: int, batch_size: int) -> float:
+    selector = build_selector(strategy, arm_names)
+    batcher = FeedbackBatcher(selector, window_ms=1e6, max_samples=batch_size) if batch_size > 1 else None
+    start = time.perf_counter()
+    for step, (arm_id, latency) in enumerate(zip(picks, latencies)):
+        if batcher:
+            batcher.submit(arm_names[arm_id], latency)
+        else:
+            selector.update(arm_names[arm_id], latency)
+        if step % decide_every == 0:
+            selector.select_arm()
+    if batcher:
+        batcher.flush()
+    return len(picks) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-sample vs micro-batched selector update throughput.")
+    parser.add_argument("--arms", type=int, default=30, help="Number of arms (caches). Default: 30")
+    parser.add_argument("--samples", type=int, default=50000, help="Feedback samples per run. Default: 50000")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="Micro-batch sizes to compare against per-sample updates. Default: 16 64 256")
+    parser.add_argument("--decide_every", type=int, default=10,
+                        help="Interleave one select_arm call every N feedback samples. Default: 10")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    np.random.seed(args.seed)
+    arm_names = [f"video-streaming-cache-{i}" for i in range(args.arms)]
+    picks, latencies = feedback_stream(args.arms, args.samples, args.seed)
+
+    for strategy_name in SELECTOR_FACTORIES:
+        baseline = updates_per_second(strategy_name, arm_names, picks, latencies, args.decide_every, 1)
+        results = [f"per-sample={baseline:>10,.0f}/s"]
+        for batch_size in args.batch_sizes:
+            batched = updates_per_second(strategy_name, arm_names, picks, latencies, args.decide_every, batch_size)
+            results.append(f"batch{batch_size}={batched:>10,.0f}/s (x{batched / baseline:.2f})")
+        logger.info(f"{strategy_name:<15} " + " ".join(results))
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import EpsilonGreedy, UCB1Selector, D_UCB, SW_UCB
+
+logger = logging.getLogger("bench_selector_scaling")
+
+DECISION_BUDGET_MS = 1.0
+SELECTOR_FACTORIES = {
+    "epsilon_greedy": lambda: EpsilonGreedy(epsilon=0.1, counts={}, values={}),
+    "ucb1": UCB1Selector,
+    "d_ucb": D_UCB,
+    "sw_ucb": SW_UCB,
+}
+
+def build_warm_selector(strategy: str, n_arms: int, top_k: int = None):
+    selector = SELECTOR_FACTORIES[strategy]()
+    arm_names = [f"video-streaming-cache-{i}" for i in range(n_arms)]
+    selector.initialize(arm_names)
+    selector.top_k = top_k
+    base_latencies = np.random.uniform(10, 200, size=n_arms)
+    for arm_name, latency in zip(arm_names, base_latencies):
+        selector.update(arm_name, float(latency))
+    return selector, arm_names, base_latencies
+
+def time_per_call_ms(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000.0 / repeats
+
+def run(n_arms: int, repeats: int, top_k: int = None) -> bool:
+    all_within_budget = True
+    for strategy in SELECTOR_FACTORIES:
+        selector, arm_names, base_latencies = build_warm_selector(strategy, n_arms, top_k)
+        select_ms = time_per_call_ms(selector.select_arm, repeats)
+        picks = np.random.randint(0, n_arms, size=repeats)
+        it = iter(picks.tolist())
+        update_ms = time_per_call_ms(lambda: selector.update(arm_names[(i := next(it))], float(base_latencies[i])), repeats)
+        within_budget = select_ms < DECISION_BUDGET_MS
+        all_within_budget &= within_budget
+        logger.info(f"{strategy:<15} arms={n_arms:<6} top_k={str(top_k):<5} "
+                    f"select_arm={select_ms * 1000:8.1f}us update={update_ms * 1000:8.1f}us "
+                    f"{'OK' if within_budget else 'OVER BUDGET'}")
+    return all_within_budget
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decision cost of the array-backed selectors on large fleets.")
+    parser.add_argument("--arms", type=int, default=10000, help="Number of arms (caches). Default: 10000")
+    parser.add_argument("--repeats", type=int, default=2000, help="Calls timed per measurement. Default: 2000")
+    parser.add_argument("--top_k", type=int, default=10, help="Priority list length for the top-k run. Default: 10")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    full_ok = run(args.arms, args.repeats, top_k=None)
+    top_k_ok = run(args.arms, args.repeats, top_k=args.top_k)
+    sys.exit(0 if full_ok and top_k_ok else 1)
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import EpsilonGreedy, UCB1Selector, D_UCB, SW_UCB, ThompsonSamplingSelector, LinUCBSelector
+from shared_scores import SharedScoreBoard, ScorePublisher, SharedScoresSelector
+
+logger = logging.getLogger("bench_shared_scores")
+
+SELECTOR_FACTORIES = {
+    "epsilon_greedy": lambda: EpsilonGreedy(epsilon=0.1, counts={}, values={}),
+    "ucb1": UCB1Selector,
+    "d_ucb": D_UCB,
+    "sw_ucb": SW_UCB,
+    "thompson": ThompsonSamplingSelector,
+    "linucb": LinUCBSelector,
+}
+
+def worker_decisions(strategy: str, board_name: str, max_arms: int, arm_names: list, seconds: float, results):
+    np.random.seed()
+    board = SharedScoreBoard(max_arms=max_arms, name=board_name, create=False)
+    selector = SharedScoresSelector(SELECTOR_FACTORIES[strategy](), board)
+    expected = set(arm_names)
+    decisions, torn = 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        ordered = selector.select_arm()
+        torn += len(ordered) != len(expected) or set(ordered) != expected
+        decisions += 1
+    board.close()
+    results.put((decisions, torn))
+
+def run(strategy: str, n_arms: int, n_workers: int, seconds: float, feedback_per_second: float) -> tuple:
+    arm_names = [f"video-streaming-cache-{i}" for i in range(n_arms)]
+    selector = SELECTOR_FACTORIES[strategy]()
+    selector.initialize(arm_names)
+    for arm_name in arm_names:
+        selector.update(arm_name, random.uniform(10, 200))
+    board = SharedScoreBoard(max_arms=n_arms)
+    publisher = ScorePublisher(selector, board, interval_seconds=0.001)
+    publisher.publish_now()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=worker_decisions, args=(strategy, board.name, n_arms, arm_names, seconds, results))
+               for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    publisher.start()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        selector.update(random.choice(arm_names), random.uniform(10, 200))
+        time.sleep(1.0 / feedback_per_second)
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    publisher.stop()
+    board.close()
+    board.unlink()
+    return sum(d for d, _ in collected) / seconds, sum(t for _, t in collected)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steering decisions/s served from shared-memory scores by N worker processes.")
+    parser.add_argument("--arms", type=int, default=30, help="Number of arms. Default: 30")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to compare. Default: 1, 2, 4, ... up to the CPU count")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duration per measurement. Default: 2")
+    parser.add_argument("--feedback_rate", type=float, default=200.0,
+                        help="Learner updates per second during the run. Default: 200")
+    parser.add_argument("--strategies", nargs="+", default=list(SELECTOR_FACTORIES), choices=list(SELECTOR_FACTORIES))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= cpus], cpus})
+    logger.info(f"{cpus} CPU(s) available.")
+    all_ok = True
+    for strategy_name in args.strategies:
+        baseline = None
+        for n_workers in worker_counts:
+            rate, torn = run(strategy_name, args.arms, n_workers, args.seconds, args.feedback_rate)
+            baseline = baseline or rate / n_workers
+            all_ok &= torn == 0
+            logger.info(f"{strategy_name:<15} workers={n_workers:<3} decisions={rate:>10,.0f}/s "
+                        f"scaling={rate / baseline:5.2f}x torn={torn}")
+    sys.exit(0 if all_ok else 1)
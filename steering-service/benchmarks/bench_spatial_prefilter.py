@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import EpsilonGreedy, UCB1Selector, D_UCB, SW_UCB, ThompsonSamplingSelector, LinUCBSelector
+from spatial_index import CacheSpatialIndex
+from geo import haversine_km
+
+logger = logging.getLogger("bench_spatial_prefilter")
+
+SELECTOR_FACTORIES = {
+    "epsilon_greedy": lambda: EpsilonGreedy(epsilon=0.1, counts={}, values={}),
+    "ucb1": UCB1Selector,
+    "d_ucb": D_UCB,
+    "sw_ucb": SW_UCB,
+    "thompson": ThompsonSamplingSelector,
+    "linucb": LinUCBSelector,
+}
+
+def random_fleet(n_arms: int, rng) -> dict:
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, n_arms)))
+    lons = rng.uniform(-180, 180, n_arms)
+    return {f"video-streaming-cache-{i}": {"lat": float(lat), "lon": float(lon)}
+            for i, (lat, lon) in enumerate(zip(lats, lons))}
+
+def check_index(fleet: dict, nearest_k: int, queries: int, rng) -> bool:
+    index = CacheSpatialIndex()
+    index.rebuild(fleet)
+    names = np.array(list(fleet))
+    lats = np.array([c["lat"] for c in fleet.values()])
+    lons = np.array([c["lon"] for c in fleet.values()])
+    mismatches = 0
+    for _ in range(queries):
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        expected = names[np.argsort(haversine_km(lat, lon, lats, lons), kind="stable")[:nearest_k]].tolist()
+        mismatches += index.nearest(lat, lon, nearest_k) != expected
+    return mismatches == 0
+
+def decision_us(strategy: str, fleet: dict, nearest_k: int, repeats: int, rng) -> float:
+    selector = SELECTOR_FACTORIES[strategy]()
+    arm_names = list(fleet)
+    selector.initialize(arm_names)
+    if nearest_k:
+        selector.enable_spatial_index(nearest_k)
+    selector.set_arm_coordinates(fleet)
+    for arm_name in arm_names:
+        selector.update(arm_name, float(rng.uniform(10, 200)))
+    clients = rng.uniform([-60, -180], [60, 180], size=(repeats, 2)).tolist()
+    start = time.perf_counter()
+    for step in range(repeats):
+        if step % 10 == 0:
+            client = tuple(clients[step])
+            selector.update_client_location(*client)
+        ordered = selector.select_arm(client)
+        selector.update(ordered[0], 50.0)
+    return (time.perf_counter() - start) * 1e6 / repeats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decision cost with and without the nearest-caches pre-filter.")
+    parser.add_argument("--fleet_sizes", type=int, nargs="+", default=[300, 3000, 30000],
+                        help="Numbers of caches to benchmark. Default: 300 3000 30000")
+    parser.add_argument("--nearest_k", type=int, default=10, help="Candidate caches per decision. Default: 10")
+    parser.add_argument("--repeats", type=int, default=1000, help="Decision+update steps timed. Default: 1000")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    np.random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    all_ok = True
+    for n_arms in args.fleet_sizes:
+        fleet = random_fleet(n_arms, rng)
+        index_ok = check_index(fleet, args.nearest_k, 200, rng)
+        all_ok &= index_ok
+        logger.info(f"arms={n_arms:<6} k-d tree nearest({args.nearest_k}) matches brute force: {'OK' if index_ok else 'MISMATCH'}")
+        for strategy in SELECTOR_FACTORIES:
+            full_us = decision_us(strategy, fleet, 0, args.repeats, rng)
+            nearest_us = decision_us(strategy, fleet, args.nearest_k, args.repeats, rng)
+            logger.info(f"  {strategy:<15} all caches={full_us:9.1f}us nearest_k={nearest_us:9.1f}us (x{full_us / nearest_us:.1f})")
+    sys.exit(0 if all_ok else 1)
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import logging
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dash_parser import DashParser
+from dynamic_latency_oracle import DynamicLatencyOracle
+from monitor import ContainerMonitor
+from offline_eval import STRATEGY_CLASSES, parse_policy, build_policy
+from simulator import SimulatedMonitor
+from steering_logs import LoggedLatencyOracle
+
+logger = logging.getLogger("bench_suite")
+
+ARM_COUNTS = (3, 30, 300, 3000)
+
+def random_fleet(n_arms: int, rng) -> dict:
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, n_arms)))
+    lons = rng.uniform(-180, 180, n_arms)
+    return {f"video-streaming-cache-{i}": {"lat": float(lat), "lon": float(lon)}
+            for i, (lat, lon) in enumerate(zip(lats, lons))}
+
+def selector_cases(strategy: str, n_arms: int, rng) -> dict:
+    """Warm selector over ``n_arms`` caches: every arm has feedback before timing starts."""
+    fleet = random_fleet(n_arms, rng)
+    names = list(fleet)
+    base_latencies = rng.uniform(10, 200, size=n_arms)
+    latency_oracle = LoggedLatencyOracle()
+    latency_oracle.set_latencies(dict(zip(names, base_latencies.tolist())))
+    selector = build_policy(parse_policy(strategy), latency_oracle, monitor=SimulatedMonitor(fleet))
+    selector.initialize(names)
+    selector.update_client_location(-23.0, -47.0)
+    for name, latency in zip(names, base_latencies.tolist()):
+        selector.update(name, latency)
+    picks = rng.integers(0, n_arms, size=4096).tolist()
+    position = [0]
+
+    def update():
+        i = picks[position[0] & 4095]
+        position[0] += 1
+        selector.update(names[i], float(base_latencies[i]))
+    return {f"selector.{strategy}.select_arm[{n_arms}]": selector.select_arm,
+            f"selector.{strategy}.update[{n_arms}]": update}
+
+def oracle_case(n_arms: int, rng) -> dict:
+    oracle = DynamicLatencyOracle(SimulatedMonitor(random_fleet(n_arms, rng)))
+    oracle.update_client_location(-23.0, -47.0)
+    oracle._update_latencies()
+    return {f"oracle._update_latencies[{n_arms}]": oracle._update_latencies}
+
+def dash_parser_case(n_arms: int, rng) -> dict:
+    class Request:
+        path = "/steering"
+    parser, nodes, request = DashParser(), [(name, "10.0.0.1") for name in random_fleet(n_arms, rng)], Request()
+    return {f"dash_parser.build[{n_arms}]": lambda: parser.build(target="", nodes=nodes, uri="https://steering:30500", request=request)}
+
+def monitor_case(n_arms: int, rng) -> dict:
+    # getNodes only reads container_stats, so the stats a collection round leaves behind are filled in
+    # directly instead of connecting to Docker.
+    monitor = ContainerMonitor.__new__(ContainerMonitor)
+    monitor.container_stats = {name: [{"ip_address": f"10.0.{i // 250}.{i % 250}", "latitude": coords["lat"],
+                                       "longitude": coords["lon"]}] * 10
+                               for i, (name, coords) in enumerate(random_fleet(n_arms, rng).items())}
+    return {f"monitor.getNodes[{n_arms}]": monitor.getNodes}
+
+def build_cases(arm_counts, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    cases = {}
+    for n_arms in arm_counts:
+        for strategy in STRATEGY_CLASSES:
+            cases.update(selector_cases(strategy, n_arms, rng))
+        cases.update(oracle_case(n_arms, rng))
+        cases.update(dash_parser_case(n_arms, rng))
+        cases.update(monitor_case(n_arms, rng))
+    return cases
+
+def measure(fn, rounds: int, min_round_seconds: float) -> dict:
+    """Per-call time in microseconds; calls per round are doubled until a round lasts ``min_round_seconds``."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_seconds: break
+        calls *= 2
+    samples = [elapsed / calls]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - start) / calls)
+    return {"median_us": statistics.median(samples) * 1e6, "min_us": min(samples) * 1e6, "calls_per_round": calls}
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Cases whose median got slower than the baseline by more than ``threshold`` (0.2 = 20%)."""
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before: continue
+        ratio = result["median_us"] / before["median_us"] if before["median_us"] > 0 else 1.0
+        status = "REGRESSION" if ratio > 1.0 + threshold else ("faster" if ratio < 1.0 - threshold else "ok")
+        logger.info(f"{name:<50} {before['median_us']:10.2f}us -> {result['median_us']:10.2f}us ({ratio:5.2f}x) {status}")
+        if status == "REGRESSION":
+            regressions.append(name)
+    for name in sorted(set(baseline) - set(current)):
+        logger.debug(f"{name}: in the baseline but not measured")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the selector, oracle, manifest and monitor hot paths.")
+    parser.add_argument("--arms", type=int, nargs="+", default=list(ARM_COUNTS), help=f"Fleet sizes. Default: {' '.join(map(str, ARM_COUNTS))}")
+    parser.add_argument("--filter", type=str, default=None, help="Only cases whose name contains this text.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per case; the median is reported. Default: 5")
+    parser.add_argument("--min_round_seconds", type=float, default=0.02, help="Minimum length of one round. Default: 0.02")
+    parser.add_argument("--save", type=str, default=None, help="Write the results as a JSON baseline to this file.")
+    parser.add_argument("--compare", type=str, default=None, help="Compare against this JSON baseline; exit 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown counted as a regression (0.2 = 20%%). Default: 0.2")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    for noisy in ("SelectorStrategies", "LatencyOracle"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    results = {}
+    for name, fn in build_cases(args.arms, args.seed).items():
+        if args.filter and args.filter not in name: continue
+        results[name] = measure(fn, args.rounds, args.min_round_seconds)
+        if not args.compare:
+            logger.info(f"{name:<50} {results[name]['median_us']:10.2f}us (min {results[name]['min_us']:.2f}us)")
+
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, baseline_file, indent=1, sort_keys=True)
+        logger.info(f"Baseline with {len(results)} cases written to {args.save}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file)["results"], results, args.threshold)
+        logger.info(f"{len(regressions)} regression(s) over {args.threshold:.0%}" + (f": {', '.join(regressions)}" if regressions else ""))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import UCB1Selector, ThompsonSamplingSelector
+
+logger = logging.getLogger("bench_thompson_convergence")
+
+SELECTOR_FACTORIES = {
+    "ucb1": lambda seed: UCB1Selector(),
+    "thompson": lambda seed: ThompsonSamplingSelector(seed=seed),
+    "thompson_discounted": lambda seed: ThompsonSamplingSelector(discount_gamma=0.995, seed=seed),
+}
+
+def run(strategy: str, base_latencies: np.ndarray, steps: int, noise: float, window: int, share: float, seed: int) -> dict:
+    """One bandit run; returns the per-step cost, when the best cache took ``share`` of the last ``window`` decisions, and regret."""
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    arm_names = [f"video-streaming-cache-{i}" for i in range(len(base_latencies))]
+    arm_index = {name: i for i, name in enumerate(arm_names)}
+    best_arm = int(np.argmin(base_latencies))
+    selector = SELECTOR_FACTORIES[strategy](seed)
+    selector.initialize(arm_names)
+    noise_draws = rng.normal(1.0, noise, size=steps)
+    picks = np.empty(steps, dtype=np.intp)
+    elapsed = 0.0
+    converged_step, converged_seconds = None, None
+    for step in range(steps):
+        start = time.perf_counter()
+        arm = arm_index[selector.select_arm()[0]]
+        selector.update(arm_names[arm], max(1.0, float(base_latencies[arm] * noise_draws[step])))
+        elapsed += time.perf_counter() - start
+        picks[step] = arm
+        if converged_step is None and step >= window and np.mean(picks[step - window + 1:step + 1] == best_arm) >= share:
+            converged_step, converged_seconds = step + 1, elapsed
+    regret = np.cumsum(base_latencies[picks] - base_latencies[best_arm])
+    return {"step_us": elapsed * 1e6 / steps, "converged_step": converged_step, "converged_seconds": converged_seconds,
+            "regret": regret, "elapsed": elapsed}
+
+def regret_at(result: dict, budget_seconds: float) -> float:
+    """Cumulative regret after ``budget_seconds`` of decision+update CPU, assuming a constant per-step cost."""
+    steps_done = min(len(result["regret"]), int(budget_seconds / (result["elapsed"] / len(result["regret"]))))
+    return float(result["regret"][steps_done - 1]) if steps_done else 0.0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convergence to the lowest-latency cache: Thompson sampling vs UCB1 at equal CPU.")
+    parser.add_argument("--arms", type=int, nargs="+", default=[3, 30, 300], help="Numbers of caches to benchmark. Default: 3 30 300")
+    parser.add_argument("--steps", type=int, default=3000, help="Decision+update steps per run. Default: 3000")
+    parser.add_argument("--noise", type=float, default=0.15, help="Relative latency noise (std). Default: 0.15")
+    parser.add_argument("--window", type=int, default=100, help="Decisions in the convergence window. Default: 100")
+    parser.add_argument("--share", type=float, default=0.9, help="Best-cache share of the window that counts as converged. Default: 0.9")
+    parser.add_argument("--seeds", type=int, default=5, help="Runs per strategy, seeds seed..seed+N-1. Default: 5")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed. Default: 0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    for n_arms in args.arms:
+        results = {strategy: [] for strategy in SELECTOR_FACTORIES}
+        for seed in range(args.seed, args.seed + args.seeds):
+            base_latencies = np.random.default_rng(seed).uniform(10, 200, size=n_arms)
+            for strategy in SELECTOR_FACTORIES:
+                results[strategy].append(run(strategy, base_latencies, args.steps, args.noise, args.window, args.share, seed))
+        # Equal CPU: every strategy is charged the time UCB1 needed for the whole run.
+        budgets = [result["elapsed"] for result in results["ucb1"]]
+        logger.info(f"arms={n_arms} steps={args.steps} seeds={args.seeds} (converged: best cache in "
+                    f"{args.share:.0%} of the last {args.window} decisions)")
+        for strategy, runs in results.items():
+            converged = [run_result for run_result in runs if run_result["converged_step"] is not None]
+            step_us = np.mean([run_result["step_us"] for run_result in runs])
+            converged_steps = np.mean([r["converged_step"] for r in converged]) if converged else float("nan")
+            converged_ms = np.mean([r["converged_seconds"] for r in converged]) * 1000 if converged else float("nan")
+            equal_cpu_regret = np.mean([regret_at(r, budget) for r, budget in zip(runs, budgets)])
+            logger.info(f"  {strategy:<20} {step_us:7.1f}us/step converged {len(converged)}/{len(runs)} "
+                        f"after {converged_steps:7.0f} steps / {converged_ms:7.1f}ms CPU, "
+                        f"regret at UCB1's CPU {equal_cpu_regret / 1000:8.1f}s")
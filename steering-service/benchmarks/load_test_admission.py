@@ -0,0 +1,136 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import logging
+import tempfile
+import threading
+import http.client
+from contextlib import nullcontext
+
+import numpy as np
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import D_UCB
+from dash_parser import DashParser
+from admission import FeedbackAdmission
+
+logger = logging.getLogger("load_test_admission")
+
+def build_app(selector, arm_names: list, log_path: str, admission_kwargs: dict = None):
+    """Stand-in for app.py's routes: same selector/DashParser work for steering, and
+    /coords doing the oracle snapshot, CSV row and selector update inline or via admission."""
+    app = Flask(__name__)
+    dash_parser = DashParser()
+    csv_lock = threading.Lock()
+
+    def process_coords(data: dict, client_addr: str):
+        server_used = data.get("server_used")
+        oracle_latencies = {name: random.uniform(20, 150) for name in arm_names}
+        counts, real_counts, values = selector.logged_state()
+        row = [time.time(), data.get("time"), data.get("lat"), data.get("long"), server_used, data.get("rt"),
+               json.dumps(oracle_latencies), json.dumps(counts), json.dumps(real_counts), json.dumps(values)]
+        with csv_lock, open(log_path, "a", newline="") as log_file:
+            csv.writer(log_file).writerow(row)
+        if server_used in oracle_latencies:
+            selector.update(server_used, oracle_latencies[server_used])
+        return "RL updated and logged", 200
+
+    admission = FeedbackAdmission(process_coords, **admission_kwargs) if admission_kwargs else None
+
+    @app.route("/coords", methods=["POST"])
+    def coords_update():
+        if admission:
+            return ("Feedback queued", 202) if admission.offer(request.json, request.remote_addr) \
+                else ("Feedback shed (service saturated)", 202)
+        return process_coords(request.json, request.remote_addr)
+
+    @app.route("/<path:name>", methods=["GET"])
+    def do_remote_steering(name: str):
+        with admission.steering_request() if admission else nullcontext():
+            ordered_nodes = selector.select_arm()
+            uri = f"{request.scheme}://{request.host}"
+            resp = dash_parser.build(target="", nodes=[(n, n) for n in ordered_nodes], uri=uri, request=request)
+            return jsonify(resp), 200
+
+    return app, admission
+
+def steering_client(port: int, deadline: float, interval: float, latencies: list):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        connection.request("GET", "/steering/manifest.mpd")
+        connection.getresponse().read()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+    connection.close()
+
+def feedback_client(port: int, deadline: float, arm_names: list, sent: list):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"Content-Type": "application/json"}
+    while time.perf_counter() < deadline:
+        body = json.dumps({"time": time.time(), "lat": -23.5, "long": -46.6, "rt": random.uniform(20, 150),
+                           "server_used": random.choice(arm_names)})
+        connection.request("POST", "/coords", body=body, headers=headers)
+        connection.getresponse().read()
+        sent[0] += 1
+    connection.close()
+
+def run(mode: str, args) -> dict:
+    arm_names = [f"video-streaming-cache-{i}" for i in range(args.arms)]
+    selector = D_UCB()
+    selector.initialize(arm_names)
+    admission_kwargs = dict(rate_per_second=args.coords_rate, burst=args.coords_burst,
+                            queue_size=args.coords_queue) if mode == "admission" else None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app, admission = build_app(selector, arm_names, os.path.join(tmp_dir, "log.csv"), admission_kwargs)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        if admission:
+            admission.start()
+        latencies, sent = [], [0]
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=steering_client, args=(port, deadline, 1.0 / args.steering_rate, latencies))
+                   for _ in range(args.steering_clients)]
+        threads += [threading.Thread(target=feedback_client, args=(port, deadline, arm_names, sent))
+                    for _ in range(args.feedback_clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = admission.stats() if admission else {}
+        if admission:
+            admission.stop()
+        server.shutdown()
+    result = {"mode": mode, "steering_requests": len(latencies),
+              "steering_p50_ms": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+              "steering_p99_ms": float(np.percentile(latencies, 99)) if latencies else float("nan"),
+              "coords_sent": sent[0], **stats}
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steering latency under a /coords flood, with and without admission control.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per mode. Default: 5")
+    parser.add_argument("--arms", type=int, default=30, help="Number of arms. Default: 30")
+    parser.add_argument("--steering_clients", type=int, default=4, help="Concurrent steering clients. Default: 4")
+    parser.add_argument("--steering_rate", type=float, default=20.0, help="Requests/s per steering client. Default: 20")
+    parser.add_argument("--feedback_clients", type=int, default=16, help="Closed-loop /coords flooders. Default: 16")
+    parser.add_argument("--coords_rate", type=float, default=200.0, help="Admission token rate. Default: 200")
+    parser.add_argument("--coords_burst", type=float, default=50.0, help="Admission burst. Default: 50")
+    parser.add_argument("--coords_queue", type=int, default=1000, help="Admission queue size. Default: 1000")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("Admission").setLevel(logging.ERROR)
+    for mode in ("inline", "admission"):
+        result = run(mode, args)
+        logger.info(" ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                             for key, value in result.items()))
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from latency_prober import HttpLatencyProber
+
+logger = logging.getLogger("probe_local_standin")
+
+PAYLOAD = b"x" * 4096
+
+def make_handler(delay_ms: float, connections: list):
+    class CacheStandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without this Nagle adds ~40ms to GETs.
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            connections[0] += 1
+
+        def _respond(self, body: bool):
+            time.sleep(delay_ms / 1000.0)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            if body:
+                self.wfile.write(PAYLOAD)
+
+        def do_HEAD(self):
+            self._respond(body=False)
+
+        def do_GET(self):
+            self._respond(body=True)
+
+        def log_message(self, *args):
+            pass
+    return CacheStandIn
+
+class StandInMonitor:
+    def __init__(self, names: list):
+        self.names = names
+    def getNodes(self):
+        return [(name, "127.0.0.1") for name in self.names]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run HttpLatencyProber against local HTTP stand-ins with known delays.")
+    parser.add_argument("--delays_ms", type=float, nargs="+", default=[10.0, 40.0, 120.0],
+                        help="Artificial response delay of each stand-in cache. Default: 10 40 120")
+    parser.add_argument("--rounds", type=int, default=10, help="Probe rounds. Default: 10")
+    parser.add_argument("--method", choices=["HEAD", "GET"], default="HEAD", help="Probe method. Default: HEAD")
+    parser.add_argument("--tolerance_ms", type=float, default=15.0,
+                        help="Allowed gap between estimate and configured delay. Default: 15")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    names = [f"video-streaming-cache-{i + 1}" for i in range(len(args.delays_ms))]
+    connections, servers, overrides = {}, [], {}
+    for name, delay_ms in zip(names, args.delays_ms):
+        connections[name] = [0]
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(delay_ms, connections[name]))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        overrides[name] = f"127.0.0.1:{server.server_port}"
+
+    prober = HttpLatencyProber(StandInMonitor(names), scheme="http", probe_method=args.method,
+                               probe_path="/segment.m4s", address_overrides=overrides)
+    prober.executor = ThreadPoolExecutor(max_workers=len(names))
+    round_times = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        prober.probe_all()
+        round_times.append((time.perf_counter() - start) * 1000.0)
+    prober.executor.shutdown()
+
+    ok = True
+    estimates = prober.get_all_current_latencies()
+    summary = prober.get_latency_summary()
+    for name, delay_ms in zip(names, args.delays_ms):
+        gap = estimates[name] - delay_ms
+        within = 0 <= gap <= args.tolerance_ms
+        ok &= within
+        logger.info(f"{name}: delay={delay_ms:.0f}ms ewma={estimates[name]:.1f}ms p90={summary[name]['p90']:.1f}ms "
+                    f"tcp_connections={connections[name][0]} {'OK' if within else 'OFF'}")
+    # Concurrent probing: a round should cost about the slowest cache, not the sum of all of them.
+    concurrent = max(round_times[1:] or round_times) < sum(args.delays_ms)
+    pooled = all(count == 1 for count in (c[0] for c in connections.values()))
+    logger.info(f"round time max={max(round_times):.1f}ms (sum of delays {sum(args.delays_ms):.0f}ms) "
+                f"{'concurrent' if concurrent else 'SEQUENTIAL'}, {'persistent connections' if pooled else 'CONNECTIONS NOT REUSED'}")
+    for server in servers:
+        server.shutdown()
+    sys.exit(0 if ok and concurrent and pooled else 1)
@@ -0,0 +1,76 @@
+import os
+import ssl
+import sys
+import time
+import json
+import argparse
+import logging
+import subprocess
+import http.client
+
+logger = logging.getLogger("startup_time")
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "app.py")
+
+def request(port: int, path: str, use_tls: bool):
+    if use_tls:
+        connection = http.client.HTTPSConnection("127.0.0.1", port, timeout=2, context=ssl._create_unverified_context())
+    else:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def measure(args) -> dict:
+    """Starts app.py and polls it; times are from process launch."""
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, APP_PATH, "--strategy", args.strategy, "--log_suffix", "_startup"] + args.app_args,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_answer, first_steering, readiness = None, None, None
+    use_tls = None
+    try:
+        while time.monotonic() - started < args.timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited with code {process.returncode}")
+            for tls in ([use_tls] if use_tls is not None else [True, False]):
+                try:
+                    status, body = request(args.port, "/steering/manifest.mpd", tls)
+                except (OSError, http.client.HTTPException):
+                    continue
+                use_tls = tls
+                if first_answer is None:
+                    first_answer = time.monotonic() - started
+                if status == 200:
+                    first_steering = time.monotonic() - started
+                break
+            if first_steering is not None:
+                break
+            time.sleep(args.poll_interval)
+        if first_steering is not None:
+            readiness = json.loads(request(args.port, "/readiness", use_tls)[1])
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"first_answer_s": first_answer, "first_steering_200_s": first_steering, "service_readiness": readiness}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time from launching app.py to its first answer and first steering response. "
+                                                 "Needs the Docker caches running, like the service itself.")
+    parser.add_argument("--strategy", type=str, default="d_ucb", help="Strategy passed to app.py. Default: d_ucb")
+    parser.add_argument("--port", type=int, default=30500, help="Steering port. Default: 30500")
+    parser.add_argument("--runs", type=int, default=3, help="Launches to measure. Default: 3")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a launch after this many seconds. Default: 60")
+    parser.add_argument("--poll_interval", type=float, default=0.01, help="Seconds between polls. Default: 0.01")
+    parser.add_argument("app_args", nargs=argparse.REMAINDER, help="Extra arguments for app.py (after --).")
+    args = parser.parse_args()
+    args.app_args = [a for a in args.app_args if a != "--"]
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    for run in range(args.runs):
+        result = measure(args)
+        readiness = result["service_readiness"] or {}
+        logger.info(f"run {run + 1}: first answer {result['first_answer_s']}s, first steering 200 {result['first_steering_200_s']}s, "
+                    f"data events {readiness.get('events')}, ready {readiness.get('ready_after_seconds')}s")
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from selector import EpsilonGreedy, UCB1Selector, D_UCB, SW_UCB, ThompsonSamplingSelector, LinUCBSelector
+
+logger = logging.getLogger("stress_selector_threads")
+
+SELECTOR_FACTORIES = {
+    "epsilon_greedy": lambda: EpsilonGreedy(epsilon=0.1, counts={}, values={}),
+    "ucb1": UCB1Selector,
+    "d_ucb": D_UCB,
+    "sw_ucb": SW_UCB,
+    "thompson": ThompsonSamplingSelector,
+    "linucb": LinUCBSelector,
+}
+
+def pulls_recorded(selector) -> int:
+    _, real_counts, _ = selector.logged_state()
+    return int(round(sum(real_counts.values())))
+
+def stress(strategy: str, n_arms: int, readers: int, writers: int, updates_per_writer: int) -> bool:
+    selector = SELECTOR_FACTORIES[strategy]()
+    arm_names = [f"video-streaming-cache-{i}" for i in range(n_arms)]
+    selector.initialize(arm_names)
+    expected_arms = set(arm_names)
+    failures = []
+    decisions = [0] * readers
+    stop_readers = threading.Event()
+
+    def reader(slot: int):
+        while not stop_readers.is_set():
+            ordered = selector.select_arm()
+            if len(ordered) != n_arms or set(ordered) != expected_arms:
+                failures.append(f"torn priority list: {ordered}")
+                return
+            decisions[slot] += 1
+
+    def writer():
+        for _ in range(updates_per_writer):
+            arm = random.choice(arm_names)
+            selector.update(arm, random.uniform(10, 200))
+            if isinstance(selector, D_UCB):
+                selector.update_environmental_state(random.random() < 0.1, False)
+            if isinstance(selector, LinUCBSelector):
+                selector.update_client_location(random.uniform(-40, 10), random.uniform(-80, -40))
+
+    reader_threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    writer_threads = [threading.Thread(target=writer) for _ in range(writers)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    stop_readers.set()
+    for thread in reader_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected_pulls = writers * updates_per_writer
+    recorded = pulls_recorded(selector)
+    if recorded != expected_pulls:
+        failures.append(f"lost updates: recorded {recorded} of {expected_pulls}")
+    ok = not failures
+    logger.info(f"{strategy:<15} readers={readers} writers={writers} updates={expected_pulls} "
+                f"decisions={sum(decisions)} ({sum(decisions) / elapsed:,.0f}/s) {'OK' if ok else 'FAILED'}")
+    for failure in failures[:3]:
+        logger.error(f"{strategy}: {failure}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent select_arm/update stress test for the selectors.")
+    parser.add_argument("--arms", type=int, default=30, help="Number of arms. Default: 30")
+    parser.add_argument("--readers", type=int, default=8, help="Threads calling select_arm. Default: 8")
+    parser.add_argument("--writers", type=int, default=4, help="Threads calling update. Default: 4")
+    parser.add_argument("--updates", type=int, default=5000, help="Updates per writer thread. Default: 5000")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    all_ok = True
+    for strategy_name in SELECTOR_FACTORIES:
+        all_ok &= stress(strategy_name, args.arms, args.readers, args.writers, args.updates)
+    sys.exit(0 if all_ok else 1)
@@ -0,0 +1,131 @@
+import time
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger("Admission")
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: float):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate_per_second)
+            self.last_refill = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+class FeedbackAdmission:
+    """Admission control for /coords reports.
+
+    Reports pass a token bucket into a bounded queue that one background thread drains
+    through ``handler(data, client_addr)``; anything over the rate or beyond the queue is
+    shed. The drain thread backs off while steering requests are in flight, so feedback
+    processing never competes with a steering decision for the interpreter.
+    """
+    STEERING_BACKOFF_SECONDS = 0.001
+    MAX_STEERING_BACKOFF_SECONDS = 0.05
+
+    def __init__(self, handler, rate_per_second: float = 200.0, burst: float = 50.0, queue_size: int = 1000):
+        self.handler = handler
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.pending = queue.Queue(maxsize=max(1, queue_size))
+        self.steering_in_flight = 0
+        self.steering_lock = threading.Lock()
+        self.counters = {"admitted": 0, "shed_rate_limited": 0, "shed_queue_full": 0, "processed": 0, "failed": 0}
+        self.counters_lock = threading.Lock()
+        self.last_shed_log_time = 0.0
+        self.running = False
+        self.thread = None
+
+    def _count(self, counter: str):
+        with self.counters_lock:
+            self.counters[counter] += 1
+
+    def offer(self, data: dict, client_addr: str) -> bool:
+        """Queue a report for processing; False means it was shed."""
+        if not self.bucket.try_acquire():
+            self._shed("shed_rate_limited")
+            return False
+        try:
+            self.pending.put_nowait((data, client_addr))
+        except queue.Full:
+            self._shed("shed_queue_full")
+            return False
+        self._count("admitted")
+        return True
+
+    def _shed(self, reason: str):
+        self._count(reason)
+        now = time.monotonic()
+        if now - self.last_shed_log_time > 5:
+            self.last_shed_log_time = now
+            logger.warning(f"Shedding /coords feedback: {self.stats()}")
+
+    @contextmanager
+    def steering_request(self):
+        with self.steering_lock:
+            self.steering_in_flight += 1
+        try:
+            yield
+        finally:
+            with self.steering_lock:
+                self.steering_in_flight -= 1
+
+    def stats(self) -> dict:
+        with self.counters_lock:
+            stats = dict(self.counters)
+        stats["queued"] = self.pending.qsize()
+        return stats
+
+    def _wait_for_steering(self):
+        waited = 0.0
+        while self.steering_in_flight > 0 and waited < self.MAX_STEERING_BACKOFF_SECONDS:
+            time.sleep(self.STEERING_BACKOFF_SECONDS)
+            waited += self.STEERING_BACKOFF_SECONDS
+
+    def _process(self, data: dict, client_addr: str):
+        try:
+            self.handler(data, client_addr)
+            self._count("processed")
+        except Exception as e:
+            self._count("failed")
+            logger.error(f"Error processing queued /coords report: {e}", exc_info=True)
+
+    def run_drain_loop(self):
+        while self.running:
+            try:
+                data, client_addr = self.pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._wait_for_steering()
+            self._process(data, client_addr)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self.run_drain_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"/coords admission control enabled ({self.bucket.rate_per_second}/s, burst {self.bucket.burst}, "
+                        f"queue {self.pending.maxsize}).")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+        while True:
+            try:
+                data, client_addr = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            self._process(data, client_addr)
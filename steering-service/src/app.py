@@ -1,30 +1,44 @@
 import time
+PROCESS_START = time.monotonic()
 import os
 import csv
 import json
 import logging
 import argparse
 import math
-
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import threading
+import socket
+import random
+import multiprocessing
+import queue
+from contextlib import nullcontext
 
 from dash_parser import DashParser
 from monitor import ContainerMonitor
 from selector import (EpsilonGreedy, RandomSelector, NoSteeringSelector,
-                      UCB1Selector, OracleBestChoiceSelector, D_UCB)
+                      UCB1Selector, OracleBestChoiceSelector, D_UCB, SW_UCB,
+                      ThompsonSamplingSelector, LinUCBSelector)
 from dynamic_latency_oracle import DynamicLatencyOracle
+from latency_prober import HttpLatencyProber
+from client_rtt import ClientRttEstimator
+from snapshot import SelectorSnapshotter, load_selector_snapshot
+from batching import FeedbackBatcher
+from geocells import GeoCellSelectors, ClientPositions
+from geo import MOVEMENT_THRESHOLD_KM, CLIENT_COORDS_UPDATE_INTERVAL_SEC
+from shared_scores import SharedScoreBoard, ScorePublisher, SharedScoresSelector
+from decision_cache import DecisionCache
+from admission import FeedbackAdmission
+from readiness import ServiceReadiness
+from shadow import ShadowEvaluator
+from decision_quality import DecisionQualityTracker
+from columnar_log import ColumnarLogWriter, COLUMNAR_LOG_EXTENSION
+from state_log import StateDeltaLog, state_log_path
+from steering_logs import CSV_HEADERS
 
 STEERING_PORT = 30500
 PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 LOG_DIR = os.path.join(PROJECT_ROOT_DIR, "Graphics", "Logs")
-CSV_HEADERS = [
-    "timestamp_server", "sim_time_client", "client_lat", "client_lon",
-    "server_used_for_latency", "experienced_latency_ms_CLIENT",
-    "experienced_latency_ms_ORACLE", "experienced_latency_ms",
-    "all_servers_oracle_latency_json", "steering_decision_main_server",
-    "rl_strategy", "rl_counts_json", "rl_actual_counts_json", "rl_values_json", "gamma_value"
-]
+SNAPSHOT_DIR = os.path.join(PROJECT_ROOT_DIR, "steering-service", "state")
 
 selector_instance = None
 selector_initialized = False
@@ -32,18 +46,47 @@ last_steering_main_server_decision = "N/A"
 current_strategy_name = "N/A"
 latency_oracle = None
 active_log_filename = None
+columnar_log = None
+state_log = None
+feedback_batcher = None
+feedback_admission = None
+client_rtt = None
+service_readiness = None
+shadow_evaluator = None
+decision_quality = None
+monitor = None
+geo_cells = None
+client_positions = ClientPositions()
 
 last_client_coords = {'lat': None, 'lon': None, 'time': 0}
-MOVEMENT_THRESHOLD_KM = 0.05
-CLIENT_COORDS_UPDATE_INTERVAL_SEC = 0.9
+client_coords_lock = threading.Lock()
+csv_log_lock = threading.Lock()
 
 app_logger = logging.getLogger("SteeringApp")
 oracle_logger = logging.getLogger("LatencyOracle")
 monitor_logger = logging.getLogger("ContainerMonitor")
 selector_strategies_logger = logging.getLogger("SelectorStrategies")
+snapshot_logger = logging.getLogger("SelectorSnapshot")
+batcher_logger = logging.getLogger("FeedbackBatcher")
+spatial_logger = logging.getLogger("SpatialIndex")
+geocells_logger = logging.getLogger("GeoCells")
+decision_cache_logger = logging.getLogger("DecisionCache")
+admission_logger = logging.getLogger("Admission")
+prober_logger = logging.getLogger("LatencyProber")
+client_rtt_logger = logging.getLogger("ClientRtt")
+readiness_logger = logging.getLogger("Readiness")
+shadow_logger = logging.getLogger("ShadowEval")
+decision_quality_logger = logging.getLogger("DecisionQuality")
+columnar_log_logger = logging.getLogger("ColumnarLog")
+state_log_logger = logging.getLogger("StateLog")
+shared_scores_logger = logging.getLogger("SharedScores")
 
 def _configure_all_loggers(default_level=logging.WARNING):
-    loggers_to_configure = [app_logger, oracle_logger, monitor_logger, selector_strategies_logger]
+    loggers_to_configure = [app_logger, oracle_logger, monitor_logger, selector_strategies_logger, snapshot_logger,
+                           batcher_logger, spatial_logger, geocells_logger, shared_scores_logger,
+                           decision_cache_logger, admission_logger, prober_logger,
+                           client_rtt_logger, readiness_logger, shadow_logger, decision_quality_logger,
+                           columnar_log_logger, state_log_logger]
     formatter = logging.Formatter('%(name)s - %(levelname)s: %(message)s')
     for logger_instance in loggers_to_configure:
         if not logger_instance.handlers:
@@ -84,25 +127,46 @@ def setup_csv_logging(filename: str):
 def log_data_to_csv(data_dict: dict, filename: str):
     row = [data_dict.get(h) for h in CSV_HEADERS]
     try:
-        with open(filename, mode="a", newline="") as file:
+        with csv_log_lock, open(filename, mode="a", newline="") as file:
             csv.writer(file).writerow(row)
     except Exception as e:
         app_logger.error(f"Error writing to CSV {filename}: {e}", exc_info=True)
 
+def log_data(data_dict: dict, filename: str, selector=None):
+    """One log row to the CSV log and/or the columnar log, as chosen with --log_format.
+
+    With --state_logging delta the selector's state goes to the state sidecar instead of
+    the rl_* columns; both are written under its lock so sidecar line n stays row n.
+    """
+    with state_log.lock if state_log else nullcontext():
+        if state_log: state_log.record(selector, data_dict.get("timestamp_server"))
+        if filename: log_data_to_csv(data_dict, filename)
+        if columnar_log: columnar_log.append(data_dict)
+
 def get_unique_log_filename(base_name: str, user_suffix: str, directory: str = LOG_DIR) -> str:
     full_base_with_suffix = f"{base_name}{user_suffix}"
     cnt = 1
     while True:
         numbered_filename = f"{full_base_with_suffix}_{cnt}.csv"
         numbered_path = os.path.join(directory, numbered_filename)
-        if not os.path.exists(numbered_path):
+        if not os.path.exists(numbered_path) and \
+           not os.path.exists(os.path.splitext(numbered_path)[0] + COLUMNAR_LOG_EXTENSION):
             return numbered_path
         cnt += 1
 
 class Main:
-    def __init__(self, sel_inst, strategy_arg: str, log_file: str):
+    def __init__(self, sel_inst, strategy_arg: str, log_file: str, feedback_queue=None):
         global selector_instance, current_strategy_name, active_log_filename
         selector_instance, current_strategy_name, active_log_filename = sel_inst, strategy_arg, log_file
+        # Set in steering worker processes: feedback goes to the learner instead of a local selector.
+        self.feedback_queue = feedback_queue
+        # Forwarding never blocks a worker: a full learner queue sheds the request instead.
+        self.forward_counters = {"forwarded": 0, "shed_queue_full": 0}
+        self.forward_lock = threading.Lock()
+        self.last_forward_shed_log_time = 0.0
+        # Flask is imported here, after the listener is bound, to keep it off the startup path.
+        from flask import Flask
+        from flask_cors import CORS
         self.app = Flask(__name__)
         CORS(self.app)
         werkzeug_logger = logging.getLogger("werkzeug")
@@ -115,7 +179,7 @@ class Main:
     def _initialize_selector_if_needed(self) -> bool:
         global selector_initialized, selector_instance
         if not selector_initialized or not selector_instance.nodes:
-            nodes_info = monitor.getNodes()
+            nodes_info = monitor.getNodes() if monitor else []
             if nodes_info:
                 node_names = [info[0] for info in nodes_info if info and info[0]]
                 if node_names:
@@ -131,39 +195,120 @@ class Main:
         return True
 
     def _register_routes(self):
+        from flask import request, jsonify
+
+        def not_ready(reason: str):
+            return jsonify({"error": f"Service not ready ({reason})."}), 503, \
+                {"Retry-After": str(service_readiness.retry_after_seconds if service_readiness else 1)}
+
+        @self.app.before_request
+        def readiness_gate():
+            # The listener is up before the monitor and oracle have data; answer 503 until they do.
+            if service_readiness and not service_readiness.is_ready() and request.path != "/readiness":
+                return not_ready("waiting for monitor and latency data")
+
+        @self.app.route("/readiness", methods=["GET"])
+        def readiness_route():
+            if not service_readiness: return jsonify({"ready": True}), 200
+            return jsonify(service_readiness.stats()), 200 if service_readiness.is_ready() else 503
+
         @self.app.route("/<path:name>", methods=["GET", "POST"])
         def do_remote_steering(name: str):
             global last_steering_main_server_decision
-            if not self._initialize_selector_if_needed():
-                return jsonify({"error": "Service not ready (selector initialization failed)."}), 503
-            ordered_nodes = selector_instance.select_arm()
-            last_steering_main_server_decision = ordered_nodes[0] if ordered_nodes else "N/A_NO_NODES_FROM_SELECTION"
-            if not ordered_nodes:
-                app_logger.error("No server selected by RL.")
-                return jsonify({"error": "No selectable server"}), 503
-            nodes_p = [(n, n) for n in ordered_nodes]
-            uri_scheme = request.headers.get('X-Forwarded-Proto', request.scheme)
-            service_host = request.headers.get('X-Forwarded-Host', request.host)
-            uri = f"{uri_scheme}://{service_host}"
-
-            target = request.args.get("_DASH_pathway", "", str)
-            resp = dash_parser.build(target=target, nodes=nodes_p, uri=uri, request=request)
-            return jsonify(resp), 200
+            # Feedback processing backs off while a steering decision is in flight.
+            with feedback_admission.steering_request() if feedback_admission else nullcontext():
+                if not self._initialize_selector_if_needed():
+                    return not_ready("no running caches to steer to yet")
+                # The nearest_k filter and LinUCB use this client's last reported position, not the last /coords sender's.
+                client_location, client_cell = client_positions.get(request.remote_addr)
+                steering_selector = geo_cells.selector_for(client_cell) if geo_cells else selector_instance
+                decision_cache = getattr(steering_selector, "decision_cache", None)
+                ordered_nodes = decision_cache.select_arm(client_location) if decision_cache \
+                    else steering_selector.select_arm(client_location)
+                last_steering_main_server_decision = ordered_nodes[0] if ordered_nodes else "N/A_NO_NODES_FROM_SELECTION"
+                if not ordered_nodes:
+                    app_logger.error("No server selected by RL.")
+                    return jsonify({"error": "No selectable server"}), 503
+                nodes_p = [(n, n) for n in ordered_nodes]
+                uri_scheme = request.headers.get('X-Forwarded-Proto', request.scheme)
+                service_host = request.headers.get('X-Forwarded-Host', request.host)
+                uri = f"{uri_scheme}://{service_host}"
+
+                target = request.args.get("_DASH_pathway", "", str)
+                resp = dash_parser.build(target=target, nodes=nodes_p, uri=uri, request=request)
+                if service_readiness and service_readiness.first_response_time is None:
+                    service_readiness.mark_first_response()
+                return jsonify(resp), 200
 
         @self.app.route("/coords", methods=["POST"])
         def coords_update():
-            global last_steering_main_server_decision, selector_instance, latency_oracle, active_log_filename
-            global last_client_coords
-
             if not request.json: return "Invalid request: Missing JSON body", 400
-            data = request.json
-            s_t, lat, lon, rt_c, srv_u_feedback = (data.get(k) for k in ["time", "lat", "long", "rt", "server_used"])
-
-            client_is_moving = False
-            current_time_for_move_check = time.time()
+            if self.feedback_queue is not None:
+                if self._forward(("coords", request.json, request.remote_addr, last_steering_main_server_decision)):
+                    return "Feedback forwarded to learner", 202
+                return "Feedback shed (learner saturated)", 202
+            if feedback_admission:
+                if feedback_admission.offer(request.json, request.remote_addr):
+                    return "Feedback queued", 202
+                return "Feedback shed (service saturated)", 202
+            return self.process_coords(request.json, request.remote_addr)
+
+        @self.app.route("/admission_stats", methods=["GET"])
+        def admission_stats_route():
+            if self.feedback_queue is not None:
+                with self.forward_lock:
+                    return jsonify({"worker_pid": os.getpid(), **self.forward_counters}), 200
+            if not feedback_admission: return jsonify({"error": "Admission control disabled (--coords_rate 0)."}), 404
+            return jsonify(feedback_admission.stats()), 200
+
+        @self.app.route("/client_rtt", methods=["GET"])
+        def client_rtt_route():
+            return jsonify(client_rtt.summary() if client_rtt else {"error": "Client RTT tracking not ready."}), 200
+
+        @self.app.route("/shadow_stats", methods=["GET"])
+        def shadow_stats_route():
+            if not shadow_evaluator: return jsonify({"error": "Shadow evaluation disabled (--shadow)."}), 404
+            return jsonify(shadow_evaluator.stats()), 200
+
+        @self.app.route("/decision_quality", methods=["GET"])
+        def decision_quality_route():
+            if not decision_quality: return jsonify({"error": "Decision quality tracking not ready."}), 503
+            return jsonify(decision_quality.stats(last_windows=request.args.get("windows", type=int))), 200
 
-            if lat is not None and lon is not None:
-                if latency_oracle: latency_oracle.update_client_location(lat, lon)
+        @self.app.route("/latency_event", methods=["POST"])
+        def latency_event_route():
+            if not request.json: return "Invalid request: Missing JSON body", 400
+            if self.feedback_queue is not None:
+                if self._forward(("latency_event", request.json, request.remote_addr, None)):
+                    return "Latency event forwarded to learner", 202
+                return "Latency event shed (learner saturated)", 202
+            return self.process_latency_event(request.json)
+
+    def process_coords(self, data: dict, client_addr: str):
+        global last_steering_main_server_decision, selector_instance, latency_oracle, active_log_filename
+        global last_client_coords
+
+        s_t, lat, lon, rt_c, srv_u_feedback = (data.get(k) for k in ["time", "lat", "long", "rt", "server_used"])
+
+        client_is_moving = False
+        current_time_for_move_check = time.time()
+
+        # In geo-cell mode feedback trains the client's cell bandit as well as the global selector.
+        feedback_selector = selector_instance
+        cell = None
+        if geo_cells and lat is not None and lon is not None:
+            cell = geo_cells.cell_of(lat, lon)
+            feedback_selector = geo_cells.selector_for(cell)
+        trained_selectors = [selector_instance] if feedback_selector is selector_instance else [feedback_selector, selector_instance]
+
+        if lat is not None and lon is not None:
+            try:
+                client_positions.report(client_addr, (float(lat), float(lon)), cell)
+            except (ValueError, TypeError):
+                pass
+            if latency_oracle: latency_oracle.update_client_location(lat, lon)
+            for sel in trained_selectors: sel.update_client_location(lat, lon)
+            with client_coords_lock:
                 if last_client_coords['lat'] is not None and \
                    last_client_coords['lon'] is not None:
                     if (current_time_for_move_check - last_client_coords['time'] >= CLIENT_COORDS_UPDATE_INTERVAL_SEC):
@@ -175,91 +320,146 @@ class Main:
                 elif last_client_coords['lat'] is None:
                     last_client_coords['lat'], last_client_coords['lon'], last_client_coords['time'] = lat, lon, current_time_for_move_check
 
-            latency_shock_detected = False
-            oracle_lat_for_feedback = None
-            if srv_u_feedback and latency_oracle:
-                 all_lats_temp = latency_oracle.get_all_current_latencies()
-                 oracle_lat_for_feedback = all_lats_temp.get(srv_u_feedback, latency_oracle.get_current_latency(srv_u_feedback))
-
-            current_gamma_val = None
-            if isinstance(selector_instance, D_UCB):
-                if srv_u_feedback and oracle_lat_for_feedback is not None:
-                    if hasattr(selector_instance, '_check_latency_shock'):
-                        latency_shock_detected = selector_instance._check_latency_shock(srv_u_feedback, oracle_lat_for_feedback)
-                selector_instance.update_environmental_state(client_is_moving, latency_shock_detected)
-                current_gamma_val = selector_instance.current_gamma
-
-            all_oracle_lats_for_log = latency_oracle.get_all_current_latencies() if latency_oracle else {}
-            all_srv_json = json.dumps(all_oracle_lats_for_log)
-
-            counts_to_log = getattr(selector_instance, "counts", {})
-            actual_counts_to_log = {}
-            if hasattr(selector_instance, "real_counts"):
-                 actual_counts_to_log = getattr(selector_instance, "real_counts", {})
-            elif hasattr(selector_instance, "counts"):
-                 actual_counts_to_log = getattr(selector_instance, "counts", {})
-
-            log_base = {
-                "timestamp_server": time.time(), "sim_time_client": s_t,
-                "client_lat": lat, "client_lon": lon,
-                "all_servers_oracle_latency_json": all_srv_json,
-                "steering_decision_main_server": last_steering_main_server_decision,
-                "rl_strategy": current_strategy_name,
-                "rl_counts_json": json.dumps(counts_to_log),
-                "rl_actual_counts_json": json.dumps(actual_counts_to_log),
-                "rl_values_json": json.dumps(getattr(selector_instance, "values", {})),
-                "gamma_value": current_gamma_val
-            }
-
-            if srv_u_feedback and rt_c is not None and latency_oracle:
-                log_entry = {**log_base, "server_used_for_latency": srv_u_feedback,
-                             "experienced_latency_ms_CLIENT": rt_c,
-                             "experienced_latency_ms_ORACLE": oracle_lat_for_feedback,
-                             "experienced_latency_ms": oracle_lat_for_feedback}
-                log_data_to_csv(log_entry, filename=active_log_filename)
+        latency_shock_detected = False
+        oracle_lat_for_feedback = None
+        if srv_u_feedback and latency_oracle:
+             all_lats_temp = latency_oracle.get_all_current_latencies()
+             oracle_lat_for_feedback = all_lats_temp.get(srv_u_feedback, latency_oracle.get_current_latency(srv_u_feedback))
+        # What the selector learns from: the oracle, the player's own RTT, or a blend (--feedback_source).
+        lat_for_feedback = client_rtt.feedback_latency(srv_u_feedback, rt_c, oracle_lat_for_feedback, lat, lon) \
+            if client_rtt and srv_u_feedback else oracle_lat_for_feedback
+        # A client RTT rejected as implausible or an outlier: the row is still logged, but the selector learns nothing.
+        feedback_rejected = lat_for_feedback is None and oracle_lat_for_feedback is not None
+
+        current_gamma_val = None
+        if isinstance(feedback_selector, D_UCB):
+            if srv_u_feedback and lat_for_feedback is not None:
+                if hasattr(feedback_selector, '_check_latency_shock'):
+                    latency_shock_detected = feedback_selector._check_latency_shock(srv_u_feedback, lat_for_feedback)
+            for sel in trained_selectors: sel.update_environmental_state(client_is_moving, latency_shock_detected)
+            current_gamma_val = feedback_selector.current_gamma
+
+        all_oracle_lats_for_log = latency_oracle.get_all_current_latencies() if latency_oracle else {}
+        all_srv_json = json.dumps(all_oracle_lats_for_log)
+        if decision_quality:
+            decision_quality.record(current_strategy_name, last_steering_main_server_decision, all_oracle_lats_for_log)
+
+        # In delta mode the state is taken when the row is written (log_data), not read over all arms here.
+        counts_to_log = actual_counts_to_log = values_to_log = None
+        if not state_log:
+            counts_to_log, actual_counts_to_log, values_to_log = feedback_selector.logged_state()
+
+        log_base = {
+            "timestamp_server": time.time(), "sim_time_client": s_t,
+            "client_lat": lat, "client_lon": lon,
+            "all_servers_oracle_latency_json": all_srv_json,
+            "steering_decision_main_server": last_steering_main_server_decision,
+            "rl_strategy": current_strategy_name,
+            "rl_counts_json": json.dumps(counts_to_log) if counts_to_log is not None else None,
+            "rl_actual_counts_json": json.dumps(actual_counts_to_log) if actual_counts_to_log is not None else None,
+            "rl_values_json": json.dumps(values_to_log) if values_to_log is not None else None,
+            "gamma_value": current_gamma_val,
+            # Raw forms of the JSON columns, for the columnar log.
+            "all_servers_oracle_latency": all_oracle_lats_for_log, "rl_counts": counts_to_log,
+            "rl_actual_counts": actual_counts_to_log, "rl_values": values_to_log
+        }
+
+        if srv_u_feedback and rt_c is not None and latency_oracle and (lat_for_feedback is not None or feedback_rejected):
+            log_entry = {**log_base, "server_used_for_latency": srv_u_feedback,
+                         "experienced_latency_ms_CLIENT": rt_c,
+                         "experienced_latency_ms_ORACLE": oracle_lat_for_feedback,
+                         "experienced_latency_ms": oracle_lat_for_feedback}
+            log_data(log_entry, filename=active_log_filename, selector=feedback_selector)
+            if shadow_evaluator:
+                shadow_evaluator.submit({"time": log_base["timestamp_server"], "sim_time": s_t, "lat": lat, "lon": lon,
+                                         "moving": client_is_moving, "server_used": srv_u_feedback,
+                                         "latency": lat_for_feedback, "oracle": all_oracle_lats_for_log,
+                                         "primary_choice": last_steering_main_server_decision})
 
-                if not self._initialize_selector_if_needed():
-                    return "Service not ready (selector in /coords)", 503
+            if not self._initialize_selector_if_needed():
+                return "Service not ready (selector in /coords)", 503
 
-                if hasattr(selector_instance, "update"):
+            if hasattr(selector_instance, "update"):
+                if srv_u_feedback not in selector_instance.nodes:
+                    app_logger.warning(f"Server {srv_u_feedback} not in nodes ({selector_instance.nodes}). Re-initializing...")
+                    self._initialize_selector_if_needed()
                     if srv_u_feedback not in selector_instance.nodes:
-                        app_logger.warning(f"Server {srv_u_feedback} not in nodes ({selector_instance.nodes}). Re-initializing...")
-                        self._initialize_selector_if_needed()
-                        if srv_u_feedback not in selector_instance.nodes:
-                            app_logger.error(f"Server {srv_u_feedback} still not recognized. RL update not performed.")
-                            return "Server not recognized, RL not updated.", 400
-
-                    selector_instance.update(srv_u_feedback, float(oracle_lat_for_feedback))
-                    return "RL updated and logged", 200
-                return "Data logged (no RL update)", 200
-            elif lat is not None and lon is not None:
-                log_entry = {**log_base, "server_used_for_latency": srv_u_feedback,
-                             "experienced_latency_ms_CLIENT": rt_c,
-                             "experienced_latency_ms_ORACLE": None, "experienced_latency_ms": None}
-                log_data_to_csv(log_entry, filename=active_log_filename)
-                return "Location data logged", 200
-            else:
-                app_logger.warning(f"Invalid or missing data in /coords: srv_u={srv_u_feedback}, rt_c={rt_c}, lat={lat}, lon={lon}")
-                return "Invalid data: Location or critical info missing", 400
+                        app_logger.error(f"Server {srv_u_feedback} still not recognized. RL update not performed.")
+                        return "Server not recognized, RL not updated.", 400
+
+                if feedback_rejected:
+                    return "Data logged (client RTT rejected, no RL update)", 200
+                reporting_location, _ = client_positions.get(client_addr)
+                if feedback_batcher:
+                    feedback_batcher.submit(srv_u_feedback, float(lat_for_feedback), reporting_location)
+                    return "RL update queued and logged", 200
+                for sel in trained_selectors: sel.update(srv_u_feedback, float(lat_for_feedback), reporting_location)
+                return "RL updated and logged", 200
+            return "Data logged (no RL update)", 200
+        elif lat is not None and lon is not None:
+            log_entry = {**log_base, "server_used_for_latency": srv_u_feedback,
+                         "experienced_latency_ms_CLIENT": rt_c,
+                         "experienced_latency_ms_ORACLE": None, "experienced_latency_ms": None}
+            log_data(log_entry, filename=active_log_filename, selector=feedback_selector)
+            return "Location data logged", 200
+        else:
+            app_logger.warning(f"Invalid or missing data in /coords: srv_u={srv_u_feedback}, rt_c={rt_c}, lat={lat}, lon={lon}")
+            return "Invalid data: Location or critical info missing", 400
+
+    def process_latency_event(self, data: dict):
+        global latency_oracle
+        server, factor, duration = data.get("server_name"), data.get("factor", 2.0), data.get("duration_seconds", 10)
+        app_logger.info(f"Latency Event Received: Server={server}, Factor={factor}, Duration={duration}s")
+        if not server: return "Server name (server_name) missing", 400
+        if not latency_oracle: return "Latency oracle not ready", 503
+        try:
+            latency_oracle.apply_event_modifier(server, float(factor), int(duration))
+            return f"Latency event for {server} applied", 200
+        except ValueError: return "Invalid format for factor or duration", 400
+        except Exception as e:
+            app_logger.error(f"Error in /latency_event: {e}", exc_info=True)
+            return "Error applying event", 500
 
-        @self.app.route("/latency_event", methods=["POST"])
-        def latency_event_route():
-            global latency_oracle
-            if not request.json: return "Invalid request: Missing JSON body", 400
-            data = request.json
-            server, factor, duration = data.get("server_name"), data.get("factor", 2.0), data.get("duration_seconds", 10)
-            app_logger.info(f"Latency Event Received: Server={server}, Factor={factor}, Duration={duration}s")
-            if not server: return "Server name (server_name) missing", 400
-            if not latency_oracle: return "Latency oracle not ready", 503
+    def _forward(self, item: tuple) -> bool:
+        """Worker side: hand a request to the learner's bounded queue; False means it was shed."""
+        try:
+            self.feedback_queue.put_nowait(item)
+            counter = "forwarded"
+        except queue.Full:
+            counter = "shed_queue_full"
+        with self.forward_lock:
+            self.forward_counters[counter] += 1
+            now = time.monotonic()
+            log_shed = counter != "forwarded" and now - self.last_forward_shed_log_time > 5
+            if log_shed:
+                self.last_forward_shed_log_time = now
+        if log_shed:
+            app_logger.warning(f"Learner queue full, shedding forwarded feedback: {self.forward_counters}")
+        return counter == "forwarded"
+
+    def drain_forwarded_requests(self, feedback_queue):
+        """Learner-side loop applying /coords and /latency_event requests forwarded by steering workers."""
+        global last_steering_main_server_decision
+        while True:
             try:
-                latency_oracle.apply_event_modifier(server, float(factor), int(duration))
-                return f"Latency event for {server} applied", 200
-            except ValueError: return "Invalid format for factor or duration", 400
+                kind, data, client_addr, worker_decision = feedback_queue.get()
+            except (EOFError, OSError):
+                return
+            try:
+                if kind == "coords":
+                    if worker_decision is not None:
+                        last_steering_main_server_decision = worker_decision
+                    # Forwarded reports get the same rate limit and shedding as ones received here.
+                    if feedback_admission:
+                        feedback_admission.offer(data, client_addr)
+                    else:
+                        self.process_coords(data, client_addr)
+                elif kind == "latency_event":
+                    self.process_latency_event(data)
             except Exception as e:
-                app_logger.error(f"Error in /latency_event: {e}", exc_info=True)
-                return "Error applying event", 500
+                app_logger.error(f"Error applying forwarded {kind} request: {e}", exc_info=True)
 
-    def run(self):
+    def run(self, listen_fd: int = None):
         global current_strategy_name
         s_dir = os.path.dirname(os.path.abspath(__file__))
         certs_dir = os.path.join(s_dir, "..", "certs")
@@ -269,25 +469,146 @@ class Main:
             if not (os.path.exists(cert) and os.path.exists(key)):
                 raise FileNotFoundError("SSL certificate/key not found.")
             app_logger.info(f"Attempting to start HTTPS service (Strategy: {current_strategy_name}) on port {STEERING_PORT}...")
-            self.app.run(host="0.0.0.0", port=STEERING_PORT, debug=False, ssl_context=(cert, key))
+            self._serve(ssl_context=(cert, key), listen_fd=listen_fd)
         except Exception as e:
             app_logger.warning(f"Failed to start SSL: {e}. Falling back to HTTP.")
             app_logger.info(f"Starting HTTP service (Strategy: {current_strategy_name}) on port {STEERING_PORT}...")
-            self.app.run(host="0.0.0.0", port=STEERING_PORT, debug=False)
+            self._serve(ssl_context=None, listen_fd=listen_fd)
+
+    def _serve(self, ssl_context, listen_fd: int = None):
+        from werkzeug.serving import make_server
+        if listen_fd is None:
+            self.app.run(host="0.0.0.0", port=STEERING_PORT, debug=False, ssl_context=ssl_context)
+        else:
+            # Serve on the socket bound at startup (shared by every process in sharded mode).
+            make_server("0.0.0.0", STEERING_PORT, self.app, threaded=True, ssl_context=ssl_context, fd=listen_fd).serve_forever()
+
+STRATEGIES = ["epsilon_greedy", "no_steering", "random", "ucb1",
+              "d_ucb", "sw_ucb", "thompson", "linucb", "oracle_best_choice"]
+SCORE_BASED_STRATEGIES = ("epsilon_greedy", "ucb1", "d_ucb", "sw_ucb", "thompson", "linucb")
+
+def run_steering_worker(worker_id: int, board_name: str, args, feedback_queue, listen_fd: int):
+    global selector_initialized
+    import numpy as np
+    # Forked workers inherit the parent's RNG state; reseed so exploration differs per worker.
+    random.seed()
+    np.random.seed()
+    board = SharedScoreBoard(max_arms=args.shared_max_arms, name=board_name, create=False)
+    selector_initialized = True
+    worker_selector = SharedScoresSelector(build_selector(current_strategy_name, args), board)
+    if args.decision_max_age > 0:
+        worker_selector.decision_cache = DecisionCache(worker_selector, max_age_seconds=args.decision_max_age)
+    app_logger.info(f"Steering worker {worker_id} (pid {os.getpid()}) answering from shared scores.")
+    Main(worker_selector, current_strategy_name, active_log_filename, feedback_queue=feedback_queue).run(listen_fd=listen_fd)
+
+def build_selector(strategy: str, args):
+    if strategy == "epsilon_greedy":
+        selector = EpsilonGreedy(epsilon=0.1, counts={}, values={}, monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "no_steering":
+        selector = NoSteeringSelector(monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "random":
+        selector = RandomSelector(monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "ucb1":
+        selector = UCB1Selector(monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "d_ucb":
+        selector = D_UCB(monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "sw_ucb":
+        selector = SW_UCB(window_size=args.window_size, monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "thompson":
+        selector = ThompsonSamplingSelector(discount_gamma=args.ts_discount, monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "linucb":
+        selector = LinUCBSelector(monitor=monitor, latency_oracle=latency_oracle)
+    elif strategy == "oracle_best_choice":
+        selector = OracleBestChoiceSelector(monitor=monitor, latency_oracle=latency_oracle)
+    else:
+        return None
+    selector.top_k = args.top_k if args.top_k > 0 else None
+    if args.nearest_k > 0:
+        selector.enable_spatial_index(args.nearest_k)
+    if args.decision_max_age > 0:
+        selector.decision_cache = DecisionCache(selector, monitor=monitor, max_age_seconds=args.decision_max_age)
+    return selector
 
 dash_parser = DashParser()
-monitor = ContainerMonitor()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Content Steering Service with RL.")
     parser.add_argument("--strategy", type=str, default="epsilon_greedy",
-                        choices=["epsilon_greedy", "no_steering", "random", "ucb1",
-                                 "d_ucb", "oracle_best_choice"],
-                        help="Steering strategy.")
+                        choices=STRATEGIES, help="Steering strategy.")
     parser.add_argument("--log_suffix", type=str, default="",
                         help="Optional suffix for CSV log filename (e.g., _testScenarioX).")
+    parser.add_argument("--log_format", choices=["csv", "columnar", "both"], default="csv",
+                        help="CSV log, typed columnar log (<log name>.cols directory of numpy chunks), or both. Default: csv")
+    parser.add_argument("--columnar_chunk_rows", type=int, default=4096,
+                        help="Rows per chunk of the columnar log. Default: 4096")
+    parser.add_argument("--state_logging", choices=["full", "delta"], default="full",
+                        help="Selector state per log row: full rl_* JSON columns, or changed arms only in a "
+                             "<log name>.state.jsonl sidecar (rebuild with state_log.py). Default: full")
+    parser.add_argument("--state_keyframe_rows", type=int, default=1000,
+                        help="Rows between full keyframes of the state sidecar. Default: 1000")
     parser.add_argument("--verbose", "-v", action="store_true",
                         help="Enables DEBUG level logging.")
+    parser.add_argument("--window_size", type=int, default=SW_UCB.DEFAULT_WINDOW_SIZE,
+                        help=f"Sliding window length (feedback samples) for sw_ucb. Default: {SW_UCB.DEFAULT_WINDOW_SIZE}")
+    parser.add_argument("--ts_discount", type=float, default=1.0,
+                        help="Discount factor for thompson posteriors (1.0 = stationary). Default: 1.0")
+    parser.add_argument("--warm_start", action="store_true",
+                        help="Restore the selector state from the snapshot file on boot.")
+    parser.add_argument("--snapshot_path", type=str, default=None,
+                        help=f"Selector snapshot file. Default: {SNAPSHOT_DIR}/selector_<strategy><log_suffix>.npz")
+    parser.add_argument("--snapshot_interval", type=float, default=10.0,
+                        help="Seconds between selector snapshots (0 disables snapshots). Default: 10")
+    parser.add_argument("--batch_window_ms", type=float, default=0.0,
+                        help="Apply /coords feedback in micro-batches gathered over this many ms (0 = per sample).")
+    parser.add_argument("--batch_max_samples", type=int, default=64,
+                        help="Flush a feedback micro-batch early once it holds this many samples. Default: 64")
+    parser.add_argument("--nearest_k", type=int, default=0,
+                        help="Only rank the K caches nearest to the client's last /coords position (0 = all caches).")
+    parser.add_argument("--geo_cells", type=int, default=0,
+                        help="Keep one bandit per geohash cell of this precision, shared by its clients (0 = one global bandit).")
+    parser.add_argument("--max_geo_cells", type=int, default=256,
+                        help="Active geo cells kept before the least recently used is evicted. Default: 256")
+    parser.add_argument("--max_clients", type=int, default=10000,
+                        help="Client positions (and geo cells) remembered before the least recently active is dropped. Default: 10000")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Extra steering worker processes answering from shared-memory scores (0 = single process).")
+    parser.add_argument("--shared_max_arms", type=int, default=4096,
+                        help="Arm capacity of the shared-memory score board used with --workers. Default: 4096")
+    parser.add_argument("--decision_max_age", type=float, default=0.0,
+                        help="Reuse the last priority list for up to this many seconds while no feedback or membership change arrives (0 = decide per request).")
+    parser.add_argument("--coords_rate", type=float, default=0.0,
+                        help="Admit at most this many /coords reports per second into a bounded queue; the rest are shed (0 = process inline).")
+    parser.add_argument("--coords_burst", type=float, default=50.0,
+                        help="Token bucket burst for --coords_rate. Default: 50")
+    parser.add_argument("--coords_queue", type=int, default=1000,
+                        help="Queued /coords reports beyond which new ones are shed; also bounds the --workers forwarding queue. Default: 1000")
+    parser.add_argument("--feedback_source", choices=list(ClientRttEstimator.SOURCES), default="oracle",
+                        help="Latency the selector learns from: oracle, the client-reported RTT, or a blend. Default: oracle")
+    parser.add_argument("--rtt_blend_weight", type=float, default=0.5,
+                        help="Weight of the client RTT with --feedback_source blend. Default: 0.5")
+    parser.add_argument("--rtt_outlier_k", type=float, default=4.0,
+                        help="Client RTTs further than this many mean deviations from their EWMA are rejected. Default: 4")
+    parser.add_argument("--shadow", nargs="+", choices=STRATEGIES + ["all"], default=None,
+                        help="Also run these strategies (or all) in shadow on every /coords sample; only --strategy answers clients.")
+    parser.add_argument("--shadow_feedback", choices=list(ShadowEvaluator.FEEDBACK_MODES), default="observed",
+                        help="Shadows learn from the server the client used (observed) or from the oracle latency of their own choice (counterfactual). Default: observed")
+    parser.add_argument("--quality_window", type=float, default=60.0,
+                        help="Seconds per window of the live regret/accuracy counters at /decision_quality. Default: 60")
+    parser.add_argument("--quality_windows", type=int, default=60,
+                        help="Windows of live decision quality kept per strategy. Default: 60")
+    parser.add_argument("--latency_source", choices=["oracle", "probe"], default="oracle",
+                        help="Simulated latency oracle, or active HTTP probing of the caches. Default: oracle")
+    parser.add_argument("--probe_path", type=str, default="/Eldorado/4sec/avc/manifest.mpd",
+                        help="Small object requested from every cache by the prober.")
+    parser.add_argument("--probe_method", choices=["HEAD", "GET"], default="HEAD",
+                        help="Probe request method (GET fetches only the first KiB). Default: HEAD")
+    parser.add_argument("--probe_interval", type=float, default=1.0, help="Seconds between probe rounds. Default: 1")
+    parser.add_argument("--probe_estimator", choices=list(HttpLatencyProber.ESTIMATORS), default="ewma",
+                        help="Probe statistic reported as the cache latency. Default: ewma")
+    parser.add_argument("--probe_ca_file", type=str, default=None,
+                        help="CA bundle for the caches' certificates (e.g. mkcert's rootCA.pem). Default: system store")
+    parser.add_argument("--top_k", type=int, default=0,
+                        help="Limit the steering PATHWAY-PRIORITY to the K best arms (0 = all arms).")
     args = parser.parse_args()
 
     log_level_to_set = logging.DEBUG if args.verbose else logging.WARNING
@@ -303,47 +624,162 @@ if __name__ == "__main__":
     active_log_filename = get_unique_log_filename(log_base, args.log_suffix, directory=LOG_DIR)
     app_logger.info(f"Active log file: {os.path.basename(active_log_filename)}")
 
+    # Bind before Flask and the Docker SDK are imported (numpy already is, through the selector
+    # modules) and before any data exists: early clients queue in the backlog and then get a
+    # 503 with Retry-After instead of a refused connection.
+    listen_socket = socket.create_server(("0.0.0.0", STEERING_PORT), backlog=128)
+    app_logger.info(f"Listening on port {STEERING_PORT} ({time.monotonic() - PROCESS_START:.3f}s after start).")
+
+    score_board, feedback_queue, steering_workers = None, None, []
+    if args.workers > 0:
+        if current_strategy_name not in SCORE_BASED_STRATEGIES:
+            app_logger.warning(f"--workers needs a learning strategy; {current_strategy_name} runs in a single process.")
+        else:
+            if args.nearest_k > 0 or args.geo_cells > 0:
+                app_logger.warning("Steering workers rank all caches from the global selector; --nearest_k/--geo_cells only apply to the learner.")
+            # Fork before any background thread starts. This process stays the only learner;
+            # workers accept on the same socket and forward feedback through feedback_queue.
+            score_board = SharedScoreBoard(max_arms=args.shared_max_arms)
+            fork_context = multiprocessing.get_context("fork")
+            feedback_queue = fork_context.Queue(maxsize=max(1, args.coords_queue))
+            for worker_id in range(args.workers):
+                worker = fork_context.Process(target=run_steering_worker, daemon=True,
+                                              args=(worker_id, score_board.name, args, feedback_queue, listen_socket.fileno()))
+                worker.start()
+                steering_workers.append(worker)
+            app_logger.info(f"Started {len(steering_workers)} steering worker process(es).")
+
+    # Created after forking: workers answer from shared scores and need neither readiness
+    # tracking nor a Docker client.
+    service_readiness = ServiceReadiness(started_at=PROCESS_START)
     app_logger.info("Starting container monitor...")
+    monitor = ContainerMonitor()
     monitor.start_collecting()
-    app_logger.info("Initializing latency oracle...")
-    latency_oracle = DynamicLatencyOracle(monitor, update_interval_seconds=1)
+    if args.latency_source == "probe":
+        app_logger.info("Initializing HTTP latency prober...")
+        latency_oracle = HttpLatencyProber(monitor, update_interval_seconds=args.probe_interval, probe_path=args.probe_path,
+                                           probe_method=args.probe_method, estimator=args.probe_estimator,
+                                           ca_file=args.probe_ca_file)
+    else:
+        app_logger.info("Initializing latency oracle...")
+        latency_oracle = DynamicLatencyOracle(monitor, update_interval_seconds=1)
     latency_oracle.start()
+    service_readiness.require("monitor collection", monitor.first_collection)
+    service_readiness.require("latency tick", latency_oracle.first_tick)
+    # Ready without caches: steering answers 503 per request until the monitor finds one.
+    service_readiness.degraded_check = lambda: monitor.collection_error or (None if monitor.getNodes() else "no running caches")
 
-    app_logger.info("Briefly waiting for monitor and oracle to gather initial data...")
-    time.sleep(max(monitor.interval if hasattr(monitor, 'interval') else 2, latency_oracle.update_interval_seconds) + 1.0)
-
-    if args.strategy == "epsilon_greedy":
-        selector_instance = EpsilonGreedy(epsilon=0.1, counts={}, values={}, monitor=monitor, latency_oracle=latency_oracle)
-    elif args.strategy == "no_steering":
-        selector_instance = NoSteeringSelector(monitor=monitor, latency_oracle=latency_oracle)
-    elif args.strategy == "random":
-        selector_instance = RandomSelector(monitor=monitor, latency_oracle=latency_oracle)
-    elif args.strategy == "ucb1":
-        selector_instance = UCB1Selector(monitor=monitor, latency_oracle=latency_oracle)
-    elif args.strategy == "d_ucb":
-        selector_instance = D_UCB(monitor=monitor, latency_oracle=latency_oracle)
-    elif args.strategy == "oracle_best_choice":
-        selector_instance = OracleBestChoiceSelector(monitor=monitor, latency_oracle=latency_oracle)
-    else:
+    selector_instance = build_selector(args.strategy, args)
+    if selector_instance is None:
         app_logger.critical(f"Unknown strategy: {args.strategy}. Defaulting to EpsilonGreedy.")
         current_strategy_name = "epsilon_greedy"
         log_base = f"log_{current_strategy_name}"
         active_log_filename = get_unique_log_filename(log_base, args.log_suffix, directory=LOG_DIR)
-        selector_instance = EpsilonGreedy(epsilon=0.1, counts={}, values={}, monitor=monitor, latency_oracle=latency_oracle)
-
-    setup_csv_logging(filename=active_log_filename)
+        selector_instance = build_selector(current_strategy_name, args)
+
+    snapshot_path = args.snapshot_path or os.path.join(SNAPSHOT_DIR, f"selector_{current_strategy_name}{args.log_suffix}.npz")
+    client_positions = ClientPositions(args.max_clients)
+    if args.geo_cells > 0:
+        geo_cells = GeoCellSelectors(lambda: build_selector(current_strategy_name, args), precision=args.geo_cells,
+                                     max_cells=args.max_geo_cells, fallback_selector=selector_instance)
+        app_logger.info(f"Geo-cell bandits enabled (geohash precision {args.geo_cells}, max {args.max_geo_cells} cells).")
+        if args.batch_window_ms > 0:
+            app_logger.warning("--batch_window_ms is ignored with --geo_cells; feedback is applied per sample.")
+    if args.batch_window_ms > 0 and not geo_cells:
+        feedback_batcher = FeedbackBatcher(selector_instance, window_ms=args.batch_window_ms,
+                                           max_samples=args.batch_max_samples)
+        feedback_batcher.start()
+    snapshotter = None
+    if args.snapshot_interval > 0:
+        snapshotter = SelectorSnapshotter(selector_instance, snapshot_path, interval_seconds=args.snapshot_interval)
+
+    client_rtt = ClientRttEstimator(source=args.feedback_source, blend_weight=args.rtt_blend_weight,
+                                    outlier_k=args.rtt_outlier_k)
+    if args.feedback_source != "oracle":
+        app_logger.info(f"Selector feedback source: {args.feedback_source}.")
+
+    if args.state_logging == "delta":
+        state_log = StateDeltaLog(state_log_path(active_log_filename), keyframe_rows=args.state_keyframe_rows)
+        app_logger.info(f"Selector state log: {os.path.basename(state_log.path)}")
+    if args.log_format != "csv":
+        columnar_log = ColumnarLogWriter(os.path.splitext(active_log_filename)[0] + COLUMNAR_LOG_EXTENSION, current_strategy_name,
+                                         chunk_rows=args.columnar_chunk_rows)
+        app_logger.info(f"Columnar log: {os.path.basename(columnar_log.path)}")
+    if args.log_format == "columnar":
+        active_log_filename = None
+    else:
+        setup_csv_logging(filename=active_log_filename)
     app_logger.info("Creating Flask application instance...")
     main_app = Main(selector_instance, current_strategy_name, active_log_filename)
+    if args.coords_rate > 0:
+        feedback_admission = FeedbackAdmission(main_app.process_coords, rate_per_second=args.coords_rate,
+                                               burst=args.coords_burst, queue_size=args.coords_queue)
+        feedback_admission.start()
+
+    def finish_startup():
+        """Runs once the monitor and oracle have data: warm start, then the first selector initialization."""
+        global selector_initialized
+        if args.warm_start:
+            current_node_names = [name for name, _ in monitor.getNodes() if name]
+            if load_selector_snapshot(selector_instance, snapshot_path, current_nodes=current_node_names):
+                selector_initialized = bool(selector_instance.nodes)
+        main_app._initialize_selector_if_needed()
+        # Started only now so the first periodic snapshot cannot overwrite the one being restored.
+        if snapshotter:
+            snapshotter.start()
+
+    decision_quality = DecisionQualityTracker(window_seconds=args.quality_window, max_windows=args.quality_windows)
+    if args.shadow:
+        shadow_names = [name for name in (STRATEGIES if "all" in args.shadow else args.shadow) if name != current_strategy_name]
+        shadow_evaluator = ShadowEvaluator({name: build_selector(name, args) for name in shadow_names}, current_strategy_name,
+                                           log_filename=get_unique_log_filename(f"shadow_{current_strategy_name}", args.log_suffix),
+                                           feedback_mode=args.shadow_feedback, quality=decision_quality)
+        shadow_evaluator.start()
+
+    service_readiness.on_ready.append(finish_startup)
+    service_readiness.start()
+    score_publisher = None
+    if score_board:
+        score_publisher = ScorePublisher(selector_instance, score_board)
+        score_publisher.start()
+        threading.Thread(target=main_app.drain_forwarded_requests, args=(feedback_queue,), daemon=True).start()
 
     app_logger.info(f"Starting Flask service (Strategy: {current_strategy_name})...")
     try:
-        main_app.run()
+        main_app.run(listen_fd=listen_socket.fileno())
     except KeyboardInterrupt:
         app_logger.info("Service shutting down (Ctrl+C).")
     except Exception as e:
         app_logger.critical(f"Runtime error in main application: {e}", exc_info=True)
     finally:
         app_logger.info("Shutdown procedures...")
+        if feedback_admission:
+            app_logger.info(f"Draining admitted /coords reports ({feedback_admission.stats()})...")
+            feedback_admission.stop()
+        if steering_workers:
+            app_logger.info("Stopping steering workers...")
+            for worker in steering_workers:
+                worker.terminate()
+            for worker in steering_workers:
+                worker.join(timeout=2)
+        if score_publisher:
+            score_publisher.stop()
+        if score_board:
+            score_board.close()
+            score_board.unlink()
+        if shadow_evaluator:
+            app_logger.info(f"Stopping shadow evaluation ({shadow_evaluator.stats()})...")
+            shadow_evaluator.stop()
+        if feedback_batcher:
+            app_logger.info("Flushing pending feedback batch...")
+            feedback_batcher.stop()
+        if snapshotter and snapshotter.running:
+            app_logger.info("Writing final selector snapshot...")
+            snapshotter.stop()
+        if columnar_log:
+            columnar_log.close()
+        if state_log:
+            state_log.close()
         if latency_oracle and hasattr(latency_oracle, 'stop') and callable(latency_oracle.stop):
             app_logger.info("Stopping latency oracle...")
             latency_oracle.stop()
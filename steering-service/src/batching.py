@@ -0,0 +1,67 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger("FeedbackBatcher")
+
+class FeedbackBatcher:
+    """Collects selector feedback and applies it with one ``update_batch`` call.
+
+    A batch is flushed when it reaches ``max_samples`` (on the submitting thread) or
+    when the oldest queued sample is ``window_ms`` old (on the background thread).
+    Each sample carries the selector's ``batch_context()`` from submit time, so a
+    D_UCB batch is discounted with the gamma that was active for every sample.
+    """
+
+    def __init__(self, selector, window_ms: float = 50.0, max_samples: int = 64):
+        self.selector = selector
+        self.window_seconds = max(0.001, window_ms / 1000.0)
+        self.max_samples = max(1, int(max_samples))
+        self.pending = []
+        self.oldest_pending_time = None
+        self.pending_lock = threading.Lock()
+        self.flushed_batches = 0
+        self.flushed_samples = 0
+        self.running = False
+        self.thread = None
+
+    def submit(self, arm_name: str, feedback_value: float, client_location: tuple = None):
+        with self.pending_lock:
+            if not self.pending:
+                self.oldest_pending_time = time.monotonic()
+            self.pending.append((arm_name, feedback_value, self.selector.batch_context(client_location)))
+            full = len(self.pending) >= self.max_samples
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self.pending_lock:
+            batch, self.pending = self.pending, []
+            self.oldest_pending_time = None
+        if batch:
+            self.selector.update_batch(batch)
+            self.flushed_batches += 1
+            self.flushed_samples += len(batch)
+            logger.debug(f"Applied feedback batch of {len(batch)} sample(s).")
+        return len(batch)
+
+    def run_flush_loop(self):
+        while self.running:
+            oldest = self.oldest_pending_time
+            if oldest is not None and time.monotonic() - oldest >= self.window_seconds:
+                self.flush()
+            time.sleep(min(self.window_seconds / 2, 0.1))
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self.run_flush_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"Feedback batching enabled (window {self.window_seconds * 1000:.0f}ms, max {self.max_samples} samples).")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+        self.flush()
@@ -0,0 +1,152 @@
+import math
+import threading
+import logging
+
+import numpy as np
+
+from geo import geohash_encode
+
+logger = logging.getLogger("ClientRtt")
+
+class RttSketch:
+    """Fixed-size log-bucketed histogram of RTTs (relative error ~``accuracy``).
+
+    Buckets grow geometrically from ``min_ms`` to ``max_ms``, so a server costs a few
+    hundred counters regardless of how many samples it sees; quantiles are read back
+    as the bucket's geometric midpoint.
+    """
+
+    def __init__(self, accuracy: float = 0.02, min_ms: float = 0.5, max_ms: float = 20000.0):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_ms = min_ms
+        self.counts = np.zeros(int(math.ceil(math.log(max_ms / min_ms) / self.log_gamma)) + 1, dtype=np.int64)
+        self.total = 0
+
+    def _bucket(self, rtt_ms: float) -> int:
+        if rtt_ms <= self.min_ms: return 0
+        return min(len(self.counts) - 1, int(math.log(rtt_ms / self.min_ms) / self.log_gamma) + 1)
+
+    def add(self, rtt_ms: float):
+        self.counts[self._bucket(rtt_ms)] += 1
+        self.total += 1
+
+    def quantile(self, q: float):
+        if self.total == 0: return None
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q * (self.total - 1), side="right"))
+        if bucket == 0: return self.min_ms
+        return self.min_ms * self.gamma ** (bucket - 0.5)
+
+class RegionServerRtt:
+    """EWMA of a (region, server) RTT with an EWMA of absolute deviation for outlier tests."""
+    __slots__ = ("ewma", "deviation", "samples", "consecutive_rejections")
+
+    def __init__(self):
+        self.ewma = None
+        self.deviation = 0.0
+        self.samples = 0
+        self.consecutive_rejections = 0
+
+class ClientRttEstimator:
+    """Turns client-reported RTTs into selector feedback.
+
+    RTTs are smoothed per (region, server), where the region is the client's geohash
+    cell at ``region_precision``. A sample further than ``outlier_k`` deviations from
+    its EWMA (once ``warmup_samples`` were accepted) is rejected as an outlier, unless
+    ``level_shift_after`` samples in a row were rejected: then the path really changed
+    and the estimate restarts from the new level. Accepted samples also go into a
+    per-server ``RttSketch``.
+
+    ``feedback_latency`` picks what the selector learns from: the oracle, the accepted
+    client RTT, or a blend of both weighted by ``blend_weight`` on the client side. The
+    EWMA only gates outliers and feeds ``summary``; the selector does its own smoothing.
+    """
+    SOURCES = ("oracle", "client", "blend")
+    MAX_PLAUSIBLE_RTT_MS = 20000.0
+
+    def __init__(self, source: str = "oracle", alpha: float = 0.3, blend_weight: float = 0.5, region_precision: int = 3,
+                 outlier_k: float = 4.0, min_deviation_ms: float = 5.0, warmup_samples: int = 5, level_shift_after: int = 3):
+        self.source = source if source in self.SOURCES else "oracle"
+        self.alpha = alpha
+        self.blend_weight = min(1.0, max(0.0, blend_weight))
+        self.region_precision = region_precision
+        self.outlier_k = outlier_k
+        self.min_deviation_ms = min_deviation_ms
+        self.warmup_samples = warmup_samples
+        self.level_shift_after = level_shift_after
+        self.estimates = {}
+        self.sketches = {}
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def region_of(self, lat, lon) -> str:
+        if lat is None or lon is None: return "unknown"
+        try:
+            return geohash_encode(float(lat), float(lon), self.region_precision)
+        except (TypeError, ValueError):
+            return "unknown"
+
+    def observe(self, region: str, server: str, rtt_ms):
+        """Add one client RTT; returns it if accepted, None if it was rejected as implausible or an outlier."""
+        try:
+            rtt_ms = float(rtt_ms)
+        except (TypeError, ValueError):
+            rtt_ms = float("nan")
+        with self.lock:
+            estimate = self.estimates.get((region, server))
+            if not (0.0 < rtt_ms <= self.MAX_PLAUSIBLE_RTT_MS):
+                self.rejected += 1
+                return None
+            if estimate is None:
+                estimate = self.estimates[(region, server)] = RegionServerRtt()
+            if estimate.ewma is None or (estimate.consecutive_rejections + 1 >= self.level_shift_after and
+                                         self._is_outlier(estimate, rtt_ms)):
+                if estimate.ewma is not None:
+                    logger.info(f"Client RTT level shift for {server} in {region}: {estimate.ewma:.1f} -> {rtt_ms:.1f}ms")
+                estimate.ewma, estimate.deviation = rtt_ms, max(self.min_deviation_ms, estimate.deviation)
+            elif self._is_outlier(estimate, rtt_ms):
+                estimate.consecutive_rejections += 1
+                self.rejected += 1
+                return None
+            else:
+                estimate.deviation = self.alpha * abs(rtt_ms - estimate.ewma) + (1 - self.alpha) * estimate.deviation
+                estimate.ewma = self.alpha * rtt_ms + (1 - self.alpha) * estimate.ewma
+            estimate.consecutive_rejections = 0
+            estimate.samples += 1
+            self.accepted += 1
+            sketch = self.sketches.get(server)
+            if sketch is None:
+                sketch = self.sketches[server] = RttSketch()
+            sketch.add(rtt_ms)
+            return rtt_ms
+
+    def _is_outlier(self, estimate: RegionServerRtt, rtt_ms: float) -> bool:
+        if estimate.samples < self.warmup_samples: return False
+        return abs(rtt_ms - estimate.ewma) > self.outlier_k * max(self.min_deviation_ms, estimate.deviation)
+
+    def feedback_latency(self, server: str, client_rtt_ms, oracle_latency_ms, lat=None, lon=None):
+        """Latency the selector should learn from for this report.
+
+        None when there is nothing to learn, including a client RTT rejected by ``observe``:
+        the caller must then skip the selector update rather than count a pull.
+        """
+        if self.source == "oracle":
+            if client_rtt_ms is not None: self.observe(self.region_of(lat, lon), server, client_rtt_ms)
+            return oracle_latency_ms
+        if client_rtt_ms is None: return oracle_latency_ms
+        client_latency = self.observe(self.region_of(lat, lon), server, client_rtt_ms)
+        if client_latency is None: return None
+        if self.source == "client" or oracle_latency_ms is None: return client_latency
+        return self.blend_weight * client_latency + (1 - self.blend_weight) * oracle_latency_ms
+
+    def summary(self) -> dict:
+        with self.lock:
+            servers = {server: {"samples": sketch.total, "p50": sketch.quantile(0.5), "p90": sketch.quantile(0.9),
+                                "p99": sketch.quantile(0.99)} for server, sketch in self.sketches.items()}
+            regions = {}
+            for (region, server), estimate in self.estimates.items():
+                regions.setdefault(region, {})[server] = {"ewma": estimate.ewma, "deviation": estimate.deviation,
+                                                          "samples": estimate.samples}
+            return {"source": self.source, "accepted": self.accepted, "rejected": self.rejected,
+                    "servers": servers, "regions": regions}
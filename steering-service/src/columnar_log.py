@@ -0,0 +1,192 @@
+import os
+import json
+import math
+import time
+import threading
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger("ColumnarLog")
+
+COLUMNAR_LOG_EXTENSION = ".cols"
+META_FILENAME = "meta.json"
+FORMAT_VERSION = 1
+
+# CSV column -> numeric field of a chunk. Server and decision names are stored as indices into ``names``.
+SCALAR_FIELDS = {
+    "timestamp_server": "f8", "sim_time_client": "f8", "client_lat": "f8", "client_lon": "f8",
+    "experienced_latency_ms_CLIENT": "f8", "experienced_latency_ms_ORACLE": "f8", "experienced_latency_ms": "f8",
+    "gamma_value": "f8",
+}
+NAME_FIELDS = ("server_used_for_latency", "steering_decision_main_server")
+# JSON column of the CSV log -> per-server matrix; the raw dict is expected under the key without "_json".
+MATRIX_FIELDS = {
+    "all_servers_oracle_latency_json": "all_servers_oracle_latency", "rl_counts_json": "rl_counts",
+    "rl_actual_counts_json": "rl_actual_counts", "rl_values_json": "rl_values",
+}
+
+ColumnarLog = namedtuple("ColumnarLog", ["path", "strategy", "servers", "names", "columns", "matrices"])
+
+def _number(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+class ColumnarLogWriter:
+    """Typed, chunked alternative to the CSV log.
+
+    A log is a directory with ``meta.json`` and numbered ``chunk_*.npy`` files, each
+    a numpy structured array that ``np.load(..., mmap_mode="r")`` maps without parsing.
+    Times, coordinates, latencies and gamma are float64 fields. Server and decision
+    names are int32 indices into a name table. The four JSON columns of the CSV log
+    become float64 sub-array fields with one column per server of that chunk. A
+    chunk is written once ``chunk_rows`` rows are buffered, on the first row more than
+    ``flush_seconds`` after the chunk started, when the server set changes, or on ``close``. ``meta.json`` is
+    replaced atomically after each chunk, so a reader never sees a half-written one.
+    """
+
+    def __init__(self, path: str, strategy: str, chunk_rows: int = 4096, flush_seconds: float = 5.0):
+        self.path = path
+        self.strategy = strategy
+        self.chunk_rows = max(1, chunk_rows)
+        self.flush_seconds = flush_seconds
+        self.names = []
+        self.name_index = {}
+        self.chunks = []
+        self.servers = None
+        self.rows = []
+        self.first_row_time = None
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._write_meta()
+
+    def _name(self, value) -> int:
+        if value is None or value == "": return -1
+        index = self.name_index.get(value)
+        if index is None:
+            index = self.name_index[value] = len(self.names)
+            self.names.append(value)
+        return index
+
+    def append(self, entry: dict):
+        """One log row: the CSV columns, with the raw dicts of the JSON columns under their keys without ``_json``."""
+        latencies = entry.get("all_servers_oracle_latency") or {}
+        with self.lock:
+            try:
+                if self.servers is not None and latencies and list(latencies) != self.servers:
+                    self._flush()
+                if self.servers is None and latencies:
+                    self.servers = list(latencies)
+                self.rows.append(entry)
+                if self.first_row_time is None:
+                    self.first_row_time = time.monotonic()
+                if len(self.rows) >= self.chunk_rows or time.monotonic() - self.first_row_time >= self.flush_seconds:
+                    self._flush()
+            except OSError as e:
+                logger.error(f"Error writing columnar log chunk in {self.path}: {e}")
+
+    def _flush(self):
+        if not self.rows: return
+        servers = self.servers or []
+        dtype = [(field, kind) for field, kind in SCALAR_FIELDS.items()] + [(field, "i4") for field in NAME_FIELDS]
+        dtype += [(raw_key, "f8", (len(servers),)) for raw_key in MATRIX_FIELDS.values()]
+        chunk = np.zeros(len(self.rows), dtype=dtype)
+        for field in SCALAR_FIELDS:
+            chunk[field] = [_number(entry.get(field)) for entry in self.rows]
+        for field in NAME_FIELDS:
+            chunk[field] = [self._name(entry.get(field)) for entry in self.rows]
+        for raw_key in MATRIX_FIELDS.values():
+            if servers:
+                chunk[raw_key] = [[_number((entry.get(raw_key) or {}).get(server)) for server in servers] for entry in self.rows]
+        filename = f"chunk_{len(self.chunks):06d}.npy"
+        np.save(os.path.join(self.path, filename), chunk)
+        self.chunks.append({"file": filename, "rows": len(self.rows), "servers": servers})
+        self._write_meta()
+        self.rows, self.first_row_time, self.servers = [], None, None
+
+    def _write_meta(self):
+        meta = {"version": FORMAT_VERSION, "strategy": self.strategy, "names": self.names, "chunks": self.chunks}
+        tmp_path = os.path.join(self.path, META_FILENAME + ".tmp")
+        with open(tmp_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(tmp_path, os.path.join(self.path, META_FILENAME))
+
+    def flush(self):
+        with self.lock:
+            try:
+                self._flush()
+            except OSError as e:
+                logger.error(f"Error writing columnar log chunk in {self.path}: {e}")
+
+    def close(self):
+        self.flush()
+
+def is_columnar_log(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILENAME))
+
+def read_columnar_log(path: str, mmap: bool = True) -> ColumnarLog:
+    """Loads a columnar log: ``columns`` maps each scalar/name field to one array over all rows, ``matrices``
+    maps each per-server field to a (rows, servers) array aligned with ``servers`` (NaN where a chunk lacked a server).
+    """
+    with open(os.path.join(path, META_FILENAME)) as meta_file:
+        meta = json.load(meta_file)
+    chunks = [np.load(os.path.join(path, chunk["file"]), mmap_mode="r" if mmap else None) for chunk in meta["chunks"]]
+    servers = list(dict.fromkeys(server for chunk in meta["chunks"] for server in chunk["servers"]))
+    server_index = {server: i for i, server in enumerate(servers)}
+    total_rows = sum(len(chunk) for chunk in chunks)
+    columns = {}
+    for field in [*SCALAR_FIELDS, *NAME_FIELDS]:
+        if len(chunks) == 1:
+            columns[field] = chunks[0][field]
+        else:
+            columns[field] = np.concatenate([chunk[field] for chunk in chunks]) if chunks else \
+                np.empty(0, dtype="i4" if field in NAME_FIELDS else "f8")
+    matrices = {}
+    for raw_key in MATRIX_FIELDS.values():
+        if len(chunks) == 1 and meta["chunks"][0]["servers"] == servers:
+            matrices[raw_key] = chunks[0][raw_key]
+            continue
+        matrix, row = np.full((total_rows, len(servers)), np.nan), 0
+        for chunk, chunk_meta in zip(chunks, meta["chunks"]):
+            matrix[row:row + len(chunk), [server_index[server] for server in chunk_meta["servers"]]] = chunk[raw_key]
+            row += len(chunk)
+        matrices[raw_key] = matrix
+    return ColumnarLog(path=path, strategy=meta["strategy"], servers=servers, names=meta["names"],
+                       columns=columns, matrices=matrices)
+
+def name_column(log: ColumnarLog, field: str) -> np.ndarray:
+    """A name field as an object array of strings (None where missing)."""
+    table = np.array([*log.names, None], dtype=object)
+    return table[np.asarray(log.columns[field])]
+
+def to_dataframe(log: ColumnarLog, json_columns: bool = True, server_columns: bool = True):
+    """The log as a pandas DataFrame with the CSV log's columns, so CSV-based scripts can use it unchanged.
+
+    ``json_columns`` rebuilds the four JSON strings (the costly part; skip it when the
+    per-server columns are enough). ``server_columns`` adds one numeric column per
+    server and matrix, e.g. ``all_servers_oracle_latency.video-streaming-cache-1``.
+    """
+    import pandas as pd
+    frame = {field: np.asarray(log.columns[field]) for field in SCALAR_FIELDS}
+    for field in NAME_FIELDS:
+        frame[field] = name_column(log, field)
+    frame["rl_strategy"] = log.strategy
+    for json_key, raw_key in MATRIX_FIELDS.items():
+        matrix = np.asarray(log.matrices[raw_key])
+        if json_columns:
+            frame[json_key] = [json.dumps({server: value for server, value in zip(log.servers, row.tolist()) if not math.isnan(value)})
+                               for row in matrix]
+        if server_columns:
+            for i, server in enumerate(log.servers):
+                frame[f"{raw_key}.{server}"] = matrix[:, i]
+    return pd.DataFrame(frame)
+
+def read_log_frame(path: str, **options):
+    """A steering log as a DataFrame, whether it is a CSV file or a columnar log directory."""
+    if is_columnar_log(path):
+        return to_dataframe(read_columnar_log(path), **options)
+    import pandas as pd
+    return pd.read_csv(path)
@@ -0,0 +1,61 @@
+import time
+import threading
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger("DecisionCache")
+
+# Swapped in as one object so readers never pair one computation's key or age with another's list.
+CachedDecision = namedtuple("CachedDecision", ["key", "computed_at", "ordered"])
+
+class DecisionCache:
+    """Reuses a selector's last priority list while nothing that could change it happened.
+
+    The list is recomputed when the selector state version moves (feedback, gamma or
+    location changes), when the monitor reports a membership change, or after
+    ``max_age_seconds``. Requests that miss while another thread is computing wait for
+    that result instead of computing their own.
+    """
+
+    def __init__(self, selector, monitor=None, max_age_seconds: float = 1.0):
+        self.selector = selector
+        self.monitor = monitor
+        self.max_age_seconds = max_age_seconds
+        self.compute_lock = threading.Lock()
+        self._cached = None  # CachedDecision
+        self.hits = 0
+        self.coalesced = 0
+        self.computed = 0
+
+    def _key(self, client_location: tuple) -> tuple:
+        # The client position only changes the list when candidates are spatially filtered
+        # or the selector ranks by the client-to-cache distance (LinUCB).
+        location = client_location if getattr(self.selector, "spatial_index", None) is not None or \
+                                      getattr(self.selector, "USES_ARM_COORDINATES", False) else None
+        return (getattr(self.selector, "state_version", None), location,
+                getattr(self.monitor, "membership_version", None))
+
+    def _fresh(self, cached, key) -> bool:
+        return cached is not None and cached.key == key and time.monotonic() - cached.computed_at < self.max_age_seconds
+
+    def select_arm(self, client_location: tuple = None) -> list:
+        key = self._key(client_location)
+        cached = self._cached
+        if self._fresh(cached, key):
+            self.hits += 1
+            return list(cached.ordered)
+        with self.compute_lock:
+            cached = self._cached
+            if self._fresh(cached, key):
+                self.coalesced += 1
+                return list(cached.ordered)
+            ordered = tuple(self.selector.select_arm(client_location))
+            # Cached under the key seen before computing: feedback applied meanwhile forces a recompute.
+            self._cached = CachedDecision(key, time.monotonic(), ordered)
+            self.computed += 1
+            if self.computed % 1000 == 0:
+                logger.debug(f"Decision cache: {self.computed} computed, {self.hits} hits, {self.coalesced} coalesced.")
+        return list(ordered)
+
+    def invalidate(self):
+        self._cached = None
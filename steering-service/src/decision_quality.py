@@ -0,0 +1,89 @@
+import time
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger("DecisionQuality")
+
+class QualityCounters:
+    """Running sums for one strategy over one span of time."""
+    __slots__ = ("start", "decisions", "best_choices", "regret_sum_ms", "switches", "last_time")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.decisions = 0
+        self.best_choices = 0
+        self.regret_sum_ms = 0.0
+        self.switches = 0
+        self.last_time = start
+
+    def add(self, regret_ms: float, is_best: bool, switched: bool, now: float):
+        self.decisions += 1
+        self.best_choices += is_best
+        self.regret_sum_ms += regret_ms
+        self.switches += switched
+        self.last_time = now
+
+    def summary(self) -> dict:
+        minutes = max(self.last_time - self.start, 1.0) / 60.0
+        return {"start": self.start, "decisions": self.decisions, "cumulative_regret_ms": self.regret_sum_ms,
+                "mean_regret_ms": self.regret_sum_ms / self.decisions if self.decisions else None,
+                "accuracy": self.best_choices / self.decisions if self.decisions else None,
+                "switches": self.switches, "switches_per_minute": self.switches / minutes}
+
+class DecisionQualityTracker:
+    """Live decision quality per strategy, the streaming form of analyze_server_choices.py.
+
+    Every ``/coords`` sample with a steering decision is scored against the oracle-best
+    server of that moment: the instantaneous regret is the decision's oracle latency minus
+    the best one, accuracy is the share of decisions that were the best server, and a
+    switch is a decision different from the strategy's previous one. Each sample updates
+    the strategy's totals and its current time window (``window_seconds``); the last
+    ``max_windows`` windows are kept. The work per sample does not grow with history.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, max_windows: int = 60, clock=time.time):
+        self.window_seconds = max(1.0, window_seconds)
+        self.max_windows = max(1, max_windows)
+        self.clock = clock
+        self.totals = {}
+        self.windows = {}
+        self.last_decision = {}
+        self.last_regret = {}
+        self.lock = threading.Lock()
+
+    def record(self, strategy: str, decision: str, oracle_latencies: dict, now: float = None):
+        """Scores one decision; returns its instantaneous regret in ms, or None if the decision has no oracle latency."""
+        if not oracle_latencies or decision not in oracle_latencies: return None
+        now = self.clock() if now is None else now
+        best_latency = min(oracle_latencies.values())
+        regret = oracle_latencies[decision] - best_latency
+        is_best = oracle_latencies[decision] <= best_latency
+        with self.lock:
+            previous = self.last_decision.get(strategy)
+            switched = previous is not None and previous != decision
+            self.last_decision[strategy] = decision
+            self.last_regret[strategy] = regret
+            if strategy not in self.totals:
+                self.totals[strategy] = QualityCounters(now)
+                self.windows[strategy] = deque(maxlen=self.max_windows)
+            self.totals[strategy].add(regret, is_best, switched, now)
+            windows = self.windows[strategy]
+            window_start = now - now % self.window_seconds
+            if not windows or windows[-1].start != window_start:
+                windows.append(QualityCounters(window_start))
+            windows[-1].add(regret, is_best, switched, now)
+        return regret
+
+    def stats(self, last_windows: int = None) -> dict:
+        """Totals, the latest instantaneous regret and the last ``last_windows`` windows, per strategy."""
+        with self.lock:
+            result = {}
+            for strategy, totals in self.totals.items():
+                windows = list(self.windows[strategy])
+                if last_windows is not None:
+                    windows = windows[-last_windows:] if last_windows > 0 else []
+                result[strategy] = {**totals.summary(), "instantaneous_regret_ms": self.last_regret.get(strategy),
+                                    "last_decision": self.last_decision.get(strategy),
+                                    "windows": [window.summary() for window in windows]}
+            return {"window_seconds": self.window_seconds, "strategies": result}
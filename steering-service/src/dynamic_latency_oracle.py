@@ -45,6 +45,10 @@ class DynamicLatencyOracle:
         self.lock = threading.Lock()
         self.running = False
         self.thread = None
+        # Wall clock for event expiry; the offline simulator substitutes simulated time.
+        self.clock = time.time
+        # Set after the first update that produced latencies for at least one server.
+        self.first_tick = threading.Event()
         self.noise_std_dev_factor = 0.15
         self.min_simulated_latency = 5
         self._update_server_geo_coordinates()
@@ -101,7 +105,7 @@ class DynamicLatencyOracle:
         self._initialize_server_states()
 
         with self.lock:
-            current_time_server = time.time()
+            current_time_server = self.clock()
             can_calculate_distance = self.use_distance_penalty and \
                                      self.client_latitude is not None and \
                                      self.client_longitude is not None
@@ -151,7 +155,7 @@ class DynamicLatencyOracle:
     def apply_event_modifier(self, server_name: str, factor: float, duration_seconds: int):
         with self.lock:
             if server_name in self.server_latencies:
-                expiry_timestamp = time.time() + duration_seconds if duration_seconds > 0 else 0
+                expiry_timestamp = self.clock() + duration_seconds if duration_seconds > 0 else 0
                 self.server_event_modifiers[server_name] = (factor, expiry_timestamp)
                 logger.info(f"Oracle: Latency event applied to {server_name}. Factor: {factor:.2f}, Duration: {duration_seconds}s.")
             else:
@@ -159,18 +163,31 @@ class DynamicLatencyOracle:
 
     def is_any_event_active(self) -> bool:
         with self.lock:
-            current_time = time.time()
+            current_time = self.clock()
             for server_name, (factor, expiry_time) in self.server_event_modifiers.items():
                 if factor != 1.0 and (expiry_time == 0 or current_time < expiry_time) :
                     logger.debug(f"Oracle: Active event detected for {server_name} (factor: {factor}, expires at: {expiry_time})")
                     return True
         return False
 
+    def _monitor_collected(self) -> bool:
+        first_collection = getattr(self.monitor, "first_collection", None)
+        return first_collection is None or first_collection.is_set()
+
     def run_update_loop(self):
         logger.info("Oracle: Starting latency update loop.")
         try:
             while self.running:
+                # Read before updating: the first tick must come from an update that saw the first collection.
+                collected = self._monitor_collected()
                 self._update_latencies()
+                if not self.first_tick.is_set():
+                    if not collected:
+                        # Nothing to simulate before the monitor's first round; poll closely until then.
+                        # A round that found no caches still counts: the service starts degraded, not unready.
+                        time.sleep(0.1)
+                        continue
+                    self.first_tick.set()
                 for _ in range(int(self.update_interval_seconds * 10)):
                     if not self.running:
                         break
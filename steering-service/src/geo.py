@@ -0,0 +1,73 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+# A client counts as moving when it covered more than this between two position checks.
+MOVEMENT_THRESHOLD_KM = 0.05
+CLIENT_COORDS_UPDATE_INTERVAL_SEC = 0.9
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points (degrees).
+
+    Entries with NaN coordinates come back as 0.0, matching the scalar helpers that
+    treat unknown coordinates as "no distance penalty".
+    """
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+    lats_rad, lons_rad = np.radians(lats), np.radians(lons)
+    a = np.sin((lats_rad - lat_rad) / 2) ** 2 + \
+        np.cos(lat_rad) * np.cos(lats_rad) * np.sin((lons_rad - lon_rad) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return np.nan_to_num(distances, nan=0.0)
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    cell, bits, bit_count, even = [], 0, 0, True
+    while len(cell) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            cell.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(cell)
+
+def geohash_bounds(cell: str) -> tuple:
+    """(min_lat, max_lat, min_lon, max_lon) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if (bits >> shift) & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+def geohash_neighbours(cell: str) -> list:
+    """The (up to) eight cells around ``cell``; longitude wraps, latitude stops at the poles."""
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(cell)
+    lat_step, lon_step = max_lat - min_lat, max_lon - min_lon
+    center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    neighbours = []
+    for d_lat in (-1, 0, 1):
+        lat = center_lat + d_lat * lat_step
+        if not -90.0 < lat < 90.0: continue
+        for d_lon in (-1, 0, 1):
+            if d_lat == 0 and d_lon == 0: continue
+            lon = (center_lon + d_lon * lon_step + 180.0) % 360.0 - 180.0
+            neighbour = geohash_encode(lat, lon, len(cell))
+            if neighbour != cell and neighbour not in neighbours:
+                neighbours.append(neighbour)
+    return neighbours
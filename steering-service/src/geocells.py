@@ -0,0 +1,97 @@
+import threading
+import logging
+from collections import OrderedDict
+
+from geo import geohash_encode, geohash_neighbours
+
+logger = logging.getLogger("GeoCells")
+
+class GeoCellSelectors:
+    """One selector per active geohash cell, so clients in the same area share learning.
+
+    Cells are created on first use from ``selector_factory`` and evicted least-recently
+    used beyond ``max_cells``. A new cell starts from the state of its most experienced
+    active neighbour, or of ``fallback_selector`` when no neighbour is active.
+    """
+
+    def __init__(self, selector_factory, precision: int = 3, max_cells: int = 256, fallback_selector=None):
+        self.selector_factory = selector_factory
+        self.precision = max(1, int(precision))
+        self.max_cells = max(1, int(max_cells))
+        self.fallback_selector = fallback_selector
+        self.cells = OrderedDict()
+        self.cells_lock = threading.Lock()
+        self.evicted_cells = 0
+
+    def cell_of(self, lat, lon):
+        try:
+            return geohash_encode(float(lat), float(lon), self.precision)
+        except (ValueError, TypeError):
+            return None
+
+    def selector_for(self, cell: str):
+        """The selector of ``cell`` (created and seeded if needed); None gives the fallback selector."""
+        if cell is None:
+            return self.fallback_selector
+        with self.cells_lock:
+            selector = self.cells.get(cell)
+            if selector is not None:
+                self.cells.move_to_end(cell)
+                return selector
+            seed_cell, seed = self._seed_for(cell)
+            selector = self.selector_factory()
+            if seed is not None:
+                selector.restore_state(seed.snapshot_state())
+            self.cells[cell] = selector
+            while len(self.cells) > self.max_cells:
+                evicted, _ = self.cells.popitem(last=False)
+                self.evicted_cells += 1
+                logger.debug(f"Evicted geo cell {evicted} (LRU).")
+        logger.info(f"Geo cell {cell} activated, seeded from {seed_cell if seed is not None else 'nothing'}.")
+        return selector
+
+    def _seed_for(self, cell: str) -> tuple:
+        neighbours = [n for n in geohash_neighbours(cell) if n in self.cells]
+        if not neighbours:
+            return "the global selector", self.fallback_selector
+        best = max(neighbours, key=lambda n: self._experience(self.cells[n]))
+        return best, self.cells[best]
+
+    @staticmethod
+    def _experience(selector) -> float:
+        _, real_counts, _ = selector.logged_state()
+        return sum(real_counts.values())
+
+    def active_cells(self) -> list:
+        with self.cells_lock:
+            return list(self.cells)
+
+class ClientPositions:
+    """Last reported position and geo cell per client address, for steering requests that carry neither.
+
+    Bounded like the cell selectors: the least recently active client is dropped
+    beyond ``max_clients`` and then steered like a client that never reported.
+    """
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max(1, int(max_clients))
+        self.clients = OrderedDict()  # client address -> ((lat, lon), cell)
+        self.clients_lock = threading.Lock()
+        self.evicted_clients = 0
+
+    def report(self, client_addr: str, location: tuple, cell: str = None):
+        with self.clients_lock:
+            self.clients[client_addr] = (location, cell)
+            self.clients.move_to_end(client_addr)
+            while len(self.clients) > self.max_clients:
+                self.clients.popitem(last=False)
+                self.evicted_clients += 1
+
+    def get(self, client_addr: str) -> tuple:
+        """(location, cell) of ``client_addr``, (None, None) when unknown."""
+        with self.clients_lock:
+            entry = self.clients.get(client_addr)
+            if entry is None:
+                return None, None
+            self.clients.move_to_end(client_addr)
+            return entry
@@ -0,0 +1,237 @@
+import ssl
+import time
+import threading
+import logging
+import http.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger("LatencyProber")
+
+class NodeLatencyStats:
+    """EWMA and a window of recent samples for one node."""
+
+    def __init__(self, alpha: float, window: int):
+        self.alpha = alpha
+        self.samples = deque(maxlen=window)
+        self.ewma = None
+        self.failures = 0
+
+    def add(self, latency_ms: float):
+        self.samples.append(latency_ms)
+        self.ewma = latency_ms if self.ewma is None else self.alpha * latency_ms + (1 - self.alpha) * self.ewma
+
+    def percentile(self, q: float):
+        return float(np.percentile(self.samples, q)) if self.samples else None
+
+class HttpLatencyProber:
+    """Measures cache latency with small HTTP requests instead of simulating it.
+
+    Every ``update_interval_seconds`` each node from ``monitor.getNodes()`` gets one
+    ``probe_method`` request for ``probe_path`` (GET asks for the first ``range_bytes``
+    only), all nodes concurrently. Each node keeps one persistent connection that is
+    reused across rounds and reopened after errors. Estimates are exposed through the
+    same ``get_all_current_latencies``/``get_current_latency`` interface as
+    ``DynamicLatencyOracle``; ``estimator`` picks the EWMA or a percentile of the
+    recent window.
+    """
+    EWMA_ALPHA = 0.3
+    WINDOW_SIZE = 64
+    ESTIMATORS = ("ewma", "p50", "p90", "p99")
+
+    def __init__(self, monitor, update_interval_seconds: float = 1.0, probe_path: str = "/Eldorado/4sec/avc/manifest.mpd",
+                 probe_method: str = "HEAD", scheme: str = "https", port: int = None, timeout_seconds: float = 2.0,
+                 range_bytes: int = 1024, ca_file: str = None, estimator: str = "ewma", address_overrides: dict = None):
+        self.monitor = monitor
+        self.update_interval_seconds = max(0.1, update_interval_seconds)
+        self.probe_path = probe_path if probe_path.startswith("/") else f"/{probe_path}"
+        self.probe_method = probe_method.upper()
+        self.scheme = scheme
+        self.port = port
+        self.timeout_seconds = timeout_seconds
+        self.range_bytes = range_bytes
+        self.estimator = estimator if estimator in self.ESTIMATORS else "ewma"
+        # name -> "host[:port]"; by default the cache is reached by its container name.
+        self.address_overrides = address_overrides or {}
+        self.ssl_context = ssl.create_default_context(cafile=ca_file) if scheme == "https" else None
+        self.stats = {}
+        self.connections = {}
+        self.server_event_modifiers = {}
+        self.lock = threading.Lock()
+        self.executor = None
+        # Set after the first round that measured at least one node.
+        self.first_tick = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def _address(self, name: str) -> tuple:
+        host_port = self.address_overrides.get(name, name)
+        host, _, port = host_port.partition(":")
+        return host, int(port) if port else self.port
+
+    def _connection(self, name: str):
+        connection = self.connections.get(name)
+        if connection is None:
+            host, port = self._address(name)
+            if self.scheme == "https":
+                connection = http.client.HTTPSConnection(host, port, timeout=self.timeout_seconds, context=self.ssl_context)
+            else:
+                connection = http.client.HTTPConnection(host, port, timeout=self.timeout_seconds)
+            self.connections[name] = connection
+        return connection
+
+    def _drop_connection(self, name: str):
+        connection = self.connections.pop(name, None)
+        if connection is not None:
+            connection.close()
+
+    def probe(self, name: str):
+        """One timed request to ``name``; returns the latency in ms or None on failure."""
+        headers = {"Connection": "keep-alive"}
+        if self.probe_method == "GET" and self.range_bytes:
+            headers["Range"] = f"bytes=0-{self.range_bytes - 1}"
+        for attempt in range(2):
+            connection = self._connection(name)
+            try:
+                start = time.perf_counter()
+                connection.request(self.probe_method, self.probe_path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                if response.status >= 400:
+                    logger.warning(f"Prober: {name} answered {response.status} for {self.probe_path}.")
+                if response.getheader("Connection", "").lower() == "close":
+                    self._drop_connection(name)
+                return latency_ms
+            except (OSError, http.client.HTTPException) as e:
+                self._drop_connection(name)
+                # A kept-alive connection the server already closed fails once; retry on a fresh one.
+                if attempt == 1 or not isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    logger.warning(f"Prober: probe of {name} failed: {e}")
+                    return None
+        return None
+
+    def _sync_nodes(self) -> list:
+        names = [name for name, _ in self.monitor.getNodes() if name] if self.monitor else list(self.address_overrides)
+        with self.lock:
+            for name in names:
+                if name not in self.stats:
+                    self.stats[name] = NodeLatencyStats(self.EWMA_ALPHA, self.WINDOW_SIZE)
+                    self.server_event_modifiers.setdefault(name, (1.0, 0))
+                    logger.info(f"Prober: Server {name} added.")
+            for name in [n for n in self.stats if n not in names]:
+                del self.stats[name]
+                self.server_event_modifiers.pop(name, None)
+                self._drop_connection(name)
+                logger.info(f"Prober: Server {name} removed.")
+        return names
+
+    def probe_all(self):
+        names = self._sync_nodes()
+        if not names: return
+        # Probe outside the lock: readers of the latencies must not wait out a slow round.
+        results = list(zip(names, self.executor.map(self.probe, names) if self.executor else map(self.probe, names)))
+        with self.lock:
+            for name, latency_ms in results:
+                node_stats = self.stats.get(name)
+                if node_stats is None: continue
+                if latency_ms is None:
+                    node_stats.failures += 1
+                    # An unreachable cache should rank last until it answers again.
+                    node_stats.add(self.timeout_seconds * 1000.0)
+                else:
+                    node_stats.add(latency_ms)
+
+    def _estimate(self, node_stats: NodeLatencyStats):
+        if self.estimator == "ewma":
+            return node_stats.ewma
+        return node_stats.percentile(float(self.estimator[1:]))
+
+    def _modifier(self, name: str) -> float:
+        factor, expiry = self.server_event_modifiers.get(name, (1.0, 0))
+        if expiry != 0 and time.time() >= expiry:
+            self.server_event_modifiers[name] = (1.0, 0)
+            return 1.0
+        return factor
+
+    def get_all_current_latencies(self) -> dict:
+        with self.lock:
+            latencies = {}
+            for name, node_stats in self.stats.items():
+                estimate = self._estimate(node_stats)
+                if estimate is not None:
+                    latencies[name] = estimate * self._modifier(name)
+            return latencies
+
+    def get_current_latency(self, server_name: str) -> float:
+        latency = self.get_all_current_latencies().get(server_name)
+        if latency is None:
+            logger.warning(f"Prober: No measurement for {server_name} yet. Returning probe timeout.")
+            return self.timeout_seconds * 1000.0
+        return latency
+
+    def get_latency_summary(self) -> dict:
+        with self.lock:
+            return {name: {"ewma": s.ewma, "p50": s.percentile(50), "p90": s.percentile(90), "p99": s.percentile(99),
+                           "samples": len(s.samples), "failures": s.failures} for name, s in self.stats.items()}
+
+    def update_client_location(self, lat: float, lon: float):
+        pass
+
+    def apply_event_modifier(self, server_name: str, factor: float, duration_seconds: int):
+        # Kept for /latency_event scenarios: scales the reported estimate, not the real cache.
+        with self.lock:
+            if server_name in self.stats:
+                self.server_event_modifiers[server_name] = (factor, time.time() + duration_seconds if duration_seconds > 0 else 0)
+                logger.info(f"Prober: Latency event applied to {server_name}. Factor: {factor:.2f}, Duration: {duration_seconds}s.")
+            else:
+                logger.warning(f"Prober: Attempt to apply event to unknown server '{server_name}'.")
+
+    def is_any_event_active(self) -> bool:
+        with self.lock:
+            return any(self._modifier(name) != 1.0 for name in list(self.server_event_modifiers))
+
+    def _monitor_collected(self) -> bool:
+        first_collection = getattr(self.monitor, "first_collection", None)
+        return first_collection is None or first_collection.is_set()
+
+    def run_update_loop(self):
+        logger.info("Prober: Starting probe loop.")
+        try:
+            while self.running:
+                started = time.monotonic()
+                collected = self._monitor_collected()
+                self.probe_all()
+                if not self.first_tick.is_set():
+                    # As the oracle: the first round after the monitor's first collection, caches or not.
+                    if not collected:
+                        time.sleep(0.1)
+                        continue
+                    self.first_tick.set()
+                while self.running and time.monotonic() - started < self.update_interval_seconds:
+                    time.sleep(0.1)
+        except Exception as e:
+            logger.error(f"Prober: Critical error in probe loop: {e}", exc_info=True)
+        finally:
+            logger.info("Prober: Probe loop ended.")
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="latency-probe")
+            self.thread = threading.Thread(target=self.run_update_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"Prober: Probing {self.probe_method} {self.probe_path} every {self.update_interval_seconds}s.")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.update_interval_seconds + self.timeout_seconds + 1)
+        self.thread = None
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        for name in list(self.connections):
+            self._drop_connection(name)
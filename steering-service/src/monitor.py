@@ -1,4 +1,3 @@
-import docker
 import threading
 import time
 import logging
@@ -13,6 +12,9 @@ if not monitor_logger.handlers:
 
 class ContainerMonitor:
     def __init__(self, interval_seconds: int = 2, network_name: str = "video-streaming_default"):
+        # Imported on construction so importing the service does not pay for the Docker SDK.
+        import docker
+        self.docker_errors = docker.errors
         try:
             self.client = docker.from_env()
         except docker.errors.DockerException as e:
@@ -23,6 +25,17 @@ class ContainerMonitor:
         self.network_name = network_name
         self._timer_thread = None
         self.running = False
+        # Bumped whenever the set of reachable nodes changes, so callers can cache per membership.
+        self.membership_version = 0
+        self._membership = frozenset()
+        # Set once the first collection round finished or failed; the service waits on it instead of sleeping.
+        self.first_collection = threading.Event()
+        # Why the last round produced no data (no Docker client, API error); None after a successful round.
+        self.collection_error = None
+        if self.client is None:
+            # No round will ever run: let the service start and answer without caches instead of staying 503.
+            self.collection_error = "Docker client unavailable"
+            self.first_collection.set()
 
     def start_collecting(self):
         if not self.client:
@@ -113,15 +126,27 @@ class ContainerMonitor:
                     self.container_stats[container.name] = self.container_stats[container.name][-10:]
                 except Exception as e_inner:
                     monitor_logger.error(f"Failed to process stats for {container.name}: {e_inner}", exc_info=False)
-        except docker.errors.APIError as e_outer:
+        except self.docker_errors.APIError as e_outer:
             monitor_logger.error(f"Docker API error while listing containers: {e_outer}")
             self.container_stats.clear()
+            self._update_membership_version()
+            self.collection_error = f"Docker API error: {e_outer}"
+            self.first_collection.set()
             return
 
         for name_in_stats in list(self.container_stats.keys()):
             if name_in_stats not in active_containers_this_cycle:
                 monitor_logger.info(f"Container {name_in_stats} no longer active, removing stats.")
                 del self.container_stats[name_in_stats]
+        self._update_membership_version()
+        self.collection_error = None
+        self.first_collection.set()
+
+    def _update_membership_version(self):
+        membership = frozenset(name for name, _ in self.getNodes())
+        if membership != self._membership:
+            self._membership = membership
+            self.membership_version += 1
 
     def getNodes(self) -> list:
         nodes = []
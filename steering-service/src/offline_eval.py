@@ -0,0 +1,199 @@
+import os
+import csv
+import json
+import math
+import random
+import argparse
+import importlib
+import logging
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from steering_logs import log_files, load_log, load_cache_coords, LoggedLatencyOracle, ReplayDriver
+
+logger = logging.getLogger("OfflineEval")
+
+# app.py strategy name -> (selector.py class, constructor defaults)
+STRATEGY_CLASSES = {
+    "epsilon_greedy": ("EpsilonGreedy", {"epsilon": 0.1, "counts": {}, "values": {}}),
+    "no_steering": ("NoSteeringSelector", {}),
+    "random": ("RandomSelector", {}),
+    "ucb1": ("UCB1Selector", {}),
+    "d_ucb": ("D_UCB", {}),
+    "sw_ucb": ("SW_UCB", {}),
+    "thompson": ("ThompsonSamplingSelector", {}),
+    "linucb": ("LinUCBSelector", {}),
+    "oracle_best_choice": ("OracleBestChoiceSelector", {}),
+}
+CLASS_DEFAULTS = {class_name: defaults for class_name, defaults in STRATEGY_CLASSES.values()}
+
+def parse_policy(spec: str) -> tuple:
+    """``d_ucb``, ``EpsilonGreedy={"epsilon": 0.05}`` or ``my_module:MySelector={...}`` -> (label, module, class, kwargs).
+
+    Upper-case keys override class constants instead, e.g. ``d_ucb={"GAMMA_STILL": 0.99}``.
+    """
+    target, _, kwargs_json = spec.partition("=")
+    module_name, _, class_name = target.rpartition(":")
+    if not module_name and class_name in STRATEGY_CLASSES:
+        class_name, kwargs = STRATEGY_CLASSES[class_name][0], dict(STRATEGY_CLASSES[class_name][1])
+    else:
+        kwargs = dict(CLASS_DEFAULTS.get(class_name, {}))
+    kwargs.update(json.loads(kwargs_json) if kwargs_json else {})
+    return spec, module_name or "selector", class_name, kwargs
+
+def build_policy(policy: tuple, latency_oracle, monitor=None):
+    _, module_name, class_name, kwargs = policy
+    selector_class = getattr(importlib.import_module(module_name), class_name)
+    constants = {name: value for name, value in kwargs.items() if name.isupper()}
+    if constants:
+        selector_class = type(class_name, (selector_class,), constants)
+    return selector_class(monitor=monitor, latency_oracle=latency_oracle,
+                          **{name: value for name, value in kwargs.items() if name not in constants})
+
+@lru_cache(maxsize=8)
+def _cached_log(path: str):
+    return load_log(path)
+
+def evaluate_log(policy: tuple, log_path: str, reward_source: str = "oracle", propensity_window: int = 50,
+                 min_propensity: float = 0.05, seed: int = 0, cache_coords: dict = None) -> dict:
+    """Scores one policy on one log; returns sums so results can be pooled across logs.
+
+    Full information: the policy picks a cache at every row and is charged (and
+    trained with) that cache's logged oracle latency. Bandit feedback: only the logged
+    cache's latency is known. The policy then learns from rows where it agrees with
+    the log (replay), and its value is estimated with IPS, self-normalized IPS and
+    doubly robust estimators. The logging propensity is the smoothed frequency of the
+    logged cache over the last ``propensity_window`` rows, floored at ``min_propensity``;
+    the DR reward model is the running per-cache mean of past logged latencies.
+    ``cache_coords`` places the caches for selectors that use the client's position.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    log = _cached_log(log_path)
+    n_servers = len(log.servers)
+    full_oracle, bandit_oracle = LoggedLatencyOracle(), LoggedLatencyOracle()
+    full = ReplayDriver(build_policy(policy, full_oracle), cache_coords)
+    bandit = ReplayDriver(build_policy(policy, bandit_oracle), cache_coords)
+    full.initialize(log.servers)
+    bandit.initialize(log.servers)
+    logged_rewards = log.feedback_client if reward_source == "client" else log.feedback_oracle
+    server_index = {name: i for i, name in enumerate(log.servers)}
+
+    window_counts = np.zeros(n_servers)
+    recent_actions = []
+    reward_sums, reward_counts = np.zeros(n_servers), np.zeros(n_servers)
+    totals = {"full_steps": 0, "full_latency_sum": 0.0, "best_latency_sum": 0.0, "best_choices": 0,
+              "bandit_steps": 0, "logged_latency_sum": 0.0, "ips_sum": 0.0, "snips_weight_sum": 0.0, "dr_sum": 0.0,
+              "replay_matches": 0, "replay_latency_sum": 0.0}
+    for t in range(len(log.chosen)):
+        row = log.oracle[t]
+        latencies = {name: float(row[i]) for i, name in enumerate(log.servers) if not math.isnan(row[i])}
+        full_oracle.set_latencies(latencies)
+        bandit_oracle.set_latencies(latencies)
+        moving = full.observe(log.timestamp[t], log.lat[t], log.lon[t])
+        bandit.observe(log.timestamp[t], log.lat[t], log.lon[t])
+
+        choice = full.decide()
+        if latencies and choice in latencies:
+            best = min(latencies.values())
+            totals["full_steps"] += 1
+            totals["full_latency_sum"] += latencies[choice]
+            totals["best_latency_sum"] += best
+            totals["best_choices"] += latencies[choice] == best
+            full.feedback(choice, latencies[choice], moving)
+
+        logged, reward = int(log.chosen[t]), float(logged_rewards[t])
+        if math.isnan(reward): continue
+        propensity = max(min_propensity, (window_counts[logged] + 1.0) / (len(recent_actions) + n_servers))
+        seen = reward_counts > 0
+        fallback = reward_sums[seen].sum() / reward_counts[seen].sum() if seen.any() else reward
+        model = np.where(seen, reward_sums / np.maximum(reward_counts, 1), fallback)
+        target = server_index.get(bandit.decide(), -1)
+        weight = (target == logged) / propensity
+        totals["bandit_steps"] += 1
+        totals["logged_latency_sum"] += reward
+        totals["ips_sum"] += weight * reward
+        totals["snips_weight_sum"] += weight
+        totals["dr_sum"] += (model[target] if target >= 0 else fallback) + weight * (reward - model[logged])
+        if target == logged:
+            totals["replay_matches"] += 1
+            totals["replay_latency_sum"] += reward
+            bandit.feedback(log.servers[logged], reward, moving)
+
+        reward_sums[logged] += reward
+        reward_counts[logged] += 1
+        recent_actions.append(logged)
+        window_counts[logged] += 1
+        if len(recent_actions) > propensity_window:
+            window_counts[recent_actions.pop(0)] -= 1
+    return {"policy": policy[0], "log": os.path.basename(log_path), "logging_strategy": log.strategy, **totals}
+
+def summarize(totals: dict) -> dict:
+    def ratio(numerator, denominator):
+        return numerator / denominator if denominator else None
+    full_mean, best_mean = ratio(totals["full_latency_sum"], totals["full_steps"]), ratio(totals["best_latency_sum"], totals["full_steps"])
+    return {"policy": totals["policy"], "steps": totals["full_steps"],
+            "full_info_mean_ms": full_mean, "oracle_best_mean_ms": best_mean,
+            "full_info_regret_ms": full_mean - best_mean if full_mean is not None else None,
+            "best_choice_rate": ratio(totals["best_choices"], totals["full_steps"]),
+            "logged_mean_ms": ratio(totals["logged_latency_sum"], totals["bandit_steps"]),
+            "ips_mean_ms": ratio(totals["ips_sum"], totals["bandit_steps"]),
+            "snips_mean_ms": ratio(totals["ips_sum"], totals["snips_weight_sum"]),
+            "dr_mean_ms": ratio(totals["dr_sum"], totals["bandit_steps"]),
+            "replay_mean_ms": ratio(totals["replay_latency_sum"], totals["replay_matches"]),
+            "replay_matches": totals["replay_matches"]}
+
+def _evaluate_task(task: tuple) -> dict:
+    return evaluate_log(*task)
+
+def evaluate(policies: list, paths: list, workers: int = None, **options) -> list:
+    """Evaluates every policy on every log across a process pool; one pooled summary per policy."""
+    seed = options.pop("seed", 0)
+    tasks = [(policy, path, options.get("reward_source", "oracle"), options.get("propensity_window", 50),
+              options.get("min_propensity", 0.05), seed + i, options.get("cache_coords"))
+             for policy in policies for i, path in enumerate(paths)]
+    pooled = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_evaluate_task, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))):
+            totals = pooled.setdefault(result["policy"], {"policy": result["policy"]})
+            for key, value in result.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+    return [summarize(pooled[policy[0]]) for policy in policies if policy[0] in pooled]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Off-policy evaluation of selector policies on recorded steering logs.")
+    parser.add_argument("logs", nargs="+", help="CSV logs or directories of log_*.csv.")
+    parser.add_argument("--policy", action="append", default=None,
+                        help="Strategy name, selector class or module:Class, optionally =JSON kwargs. Repeatable. Default: every strategy.")
+    parser.add_argument("--reward", choices=["oracle", "client"], default="oracle",
+                        help="Logged latency used as bandit feedback. Default: oracle")
+    parser.add_argument("--propensity_window", type=int, default=50, help="Rows used to estimate logging propensities. Default: 50")
+    parser.add_argument("--min_propensity", type=float, default=0.05, help="Propensity floor for IPS/DR. Default: 0.05")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Default: CPU count")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed; each log gets seed + its index. Default: 0")
+    parser.add_argument("--out", type=str, default=None, help="Also write the summary table to this CSV.")
+    parser.add_argument("--cache_coords", type=str, default=None,
+                        help="JSON file of {cache: {\"lat\": ..., \"lon\": ...}}. Default: the caches of starting_streaming.sh")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("SelectorStrategies").setLevel(logging.WARNING)
+    paths = [path for target in args.logs for path in log_files(target)]
+    if not paths:
+        parser.error("No log files found.")
+    policies = [parse_policy(spec) for spec in (args.policy or list(STRATEGY_CLASSES))]
+    summaries = evaluate(policies, paths, workers=args.workers, reward_source=args.reward,
+                         propensity_window=args.propensity_window, min_propensity=args.min_propensity, seed=args.seed,
+                         cache_coords=load_cache_coords(args.cache_coords))
+    columns = list(summaries[0]) if summaries else []
+    logger.info(f"{len(policies)} policies x {len(paths)} logs")
+    for summary in summaries:
+        logger.info(" ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in summary.items()))
+    if args.out and summaries:
+        with open(args.out, "w", newline="") as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(summaries)
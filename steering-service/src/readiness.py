@@ -0,0 +1,77 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger("Readiness")
+
+class ServiceReadiness:
+    """Gates the service on the events it needs before it can steer.
+
+    Each required event (first monitor collection, first oracle tick, ...) is waited on
+    by a background thread; once all are set the ``on_ready`` callbacks run and the
+    service is ready. Times are measured from ``started_at`` (process start when given),
+    including when the first steering response went out. Conditions the service can run
+    with but not steer well under (no caches yet) come from ``degraded_check`` and are
+    reported, re-evaluated on every call, without making the service unready.
+    """
+
+    def __init__(self, started_at: float = None, retry_after_seconds: int = 1, degraded_check=None):
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.retry_after_seconds = retry_after_seconds
+        self.degraded_check = degraded_check
+        self.required = {}
+        self.event_times = {}
+        self.on_ready = []
+        self.ready = threading.Event()
+        self.ready_time = None
+        self.first_response_time = None
+        self.thread = None
+
+    def require(self, name: str, event: threading.Event):
+        self.required[name] = event
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def mark_first_response(self):
+        if self.first_response_time is None:
+            self.first_response_time = self._elapsed()
+            logger.info(f"First steering response {self.first_response_time:.3f}s after start.")
+
+    def _run(self):
+        for name, event in self.required.items():
+            while not event.wait(timeout=5.0):
+                logger.warning(f"Still waiting for {name} ({self._elapsed():.1f}s after start)...")
+            self.event_times[name] = self._elapsed()
+            logger.info(f"Readiness: {name} after {self.event_times[name]:.3f}s.")
+        for callback in self.on_ready:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Readiness callback {getattr(callback, '__name__', callback)} failed: {e}", exc_info=True)
+        self.ready_time = self._elapsed()
+        self.ready.set()
+        logger.info(f"Service ready {self.ready_time:.3f}s after start.")
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def degraded_reason(self):
+        if self.degraded_check is None: return None
+        try:
+            return self.degraded_check()
+        except Exception as e:
+            return f"health check failed: {e}"
+
+    def stats(self) -> dict:
+        return {"ready": self.is_ready(), "degraded": self.degraded_reason(), "seconds_since_start": round(self._elapsed(), 3),
+                "events": {name: self.event_times.get(name) for name in self.required},
+                "ready_after_seconds": self.ready_time, "first_response_after_seconds": self.first_response_time}
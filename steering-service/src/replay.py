@@ -0,0 +1,124 @@
+import os
+import csv
+import time
+import math
+import random
+import argparse
+import logging
+
+import numpy as np
+
+from steering_logs import log_files, iter_feedback_rows, load_cache_coords, LoggedLatencyOracle, ReplayDriver
+from offline_eval import parse_policy, build_policy
+
+logger = logging.getLogger("Replay")
+
+STEP_CSV_HEADERS = [
+    "log", "step", "sim_time_client", "timestamp_server", "decision", "decision_oracle_latency_ms", "best_server",
+    "best_oracle_latency_ms", "regret_ms", "cumulative_regret_ms", "logged_decision", "client_is_moving",
+    "latency_shock_detected", "gamma_value"
+]
+
+def replay_rows(selector, rows, feedback_mode: str = "counterfactual", on_step=None, cache_coords: dict = None) -> dict:
+    """Replays feedback rows through ``selector`` as app.py would; returns the run's totals.
+
+    Before each row the selector decides; the decision is scored against that row's
+    oracle latencies. ``feedback_mode`` picks what it is then trained on: the cache the
+    client really used with its logged latency (``logged``, the exact feedback stream of
+    the recorded session), or its own decision with that cache's oracle latency
+    (``counterfactual``, as if it had been steering the session). ``on_step`` receives
+    one dict per row. ``cache_coords`` (``load_cache_coords``) places the caches for
+    selectors that use the client's position.
+    """
+    latency_oracle = LoggedLatencyOracle()
+    selector.latency_oracle = latency_oracle
+    driver = ReplayDriver(selector, cache_coords)
+    totals = {"steps": 0, "scored_steps": 0, "cumulative_regret_ms": 0.0, "latency_sum_ms": 0.0, "best_choices": 0,
+              "logged_decision_matches": 0, "moves": 0, "shocks": 0, "first_sim_time": None, "last_sim_time": None}
+    for step, row in enumerate(rows):
+        latencies = {name: latency for name, latency in row.oracle.items() if not math.isnan(latency)}
+        latency_oracle.set_latencies(latencies)
+        if not selector.nodes or any(name not in selector.arms for name in latencies):
+            driver.initialize(list(dict.fromkeys([*selector.nodes, *latencies, row.server_used])))
+        moving = driver.observe(row.timestamp, row.lat, row.lon)
+        decision = driver.decide()
+
+        best_server = min(latencies, key=latencies.get) if latencies else None
+        regret = latencies[decision] - latencies[best_server] if decision in latencies else math.nan
+        if not math.isnan(regret):
+            totals["scored_steps"] += 1
+            totals["cumulative_regret_ms"] += regret
+            totals["latency_sum_ms"] += latencies[decision]
+            totals["best_choices"] += decision == best_server
+        totals["logged_decision_matches"] += decision == row.decision
+
+        if feedback_mode == "logged":
+            server, latency = row.server_used, row.feedback_oracle
+        else:
+            server, latency = decision, latencies.get(decision, math.nan)
+        shock = False
+        if server is not None and not math.isnan(latency):
+            shock = driver.feedback(server, latency, moving)
+        totals["steps"] += 1
+        totals["moves"] += moving
+        totals["shocks"] += shock
+        if not math.isnan(row.sim_time):
+            if totals["first_sim_time"] is None: totals["first_sim_time"] = row.sim_time
+            totals["last_sim_time"] = row.sim_time
+        if on_step:
+            on_step({"step": step, "sim_time_client": row.sim_time, "timestamp_server": row.timestamp, "decision": decision,
+                     "decision_oracle_latency_ms": latencies.get(decision), "best_server": best_server,
+                     "best_oracle_latency_ms": latencies.get(best_server), "regret_ms": regret,
+                     "cumulative_regret_ms": totals["cumulative_regret_ms"], "logged_decision": row.decision,
+                     "client_is_moving": moving, "latency_shock_detected": shock,
+                     "gamma_value": getattr(selector, "current_gamma", None)})
+    return totals
+
+def replay_log(policy: tuple, path: str, feedback_mode: str = "counterfactual", seed: int = 0, on_step=None,
+               cache_coords: dict = None) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    selector = build_policy(policy, LoggedLatencyOracle())
+    return replay_rows(selector, iter_feedback_rows(path), feedback_mode=feedback_mode, on_step=on_step, cache_coords=cache_coords)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded steering logs through a selector, step by step.")
+    parser.add_argument("logs", nargs="+", help="CSV logs or directories of log_*.csv (each replayed with a fresh selector).")
+    parser.add_argument("--selector", type=str, default="d_ucb",
+                        help="Strategy name, selector class or module:Class, optionally =JSON kwargs. Default: d_ucb")
+    parser.add_argument("--feedback", choices=["counterfactual", "logged"], default="counterfactual",
+                        help="Train on the replayed decision's oracle latency, or on the logged feedback. Default: counterfactual")
+    parser.add_argument("--steps_out", type=str, default=None, help="Write per-step decisions and regret to this CSV.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the selector's randomness. Default: 0")
+    parser.add_argument("--cache_coords", type=str, default=None,
+                        help="JSON file of {cache: {\"lat\": ..., \"lon\": ...}}. Default: the caches of starting_streaming.sh")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("SelectorStrategies").setLevel(logging.WARNING)
+    policy = parse_policy(args.selector)
+    cache_coords = load_cache_coords(args.cache_coords)
+    steps_file = open(args.steps_out, "w", newline="") if args.steps_out else None
+    steps_writer = csv.writer(steps_file) if steps_file else None
+    if steps_writer:
+        steps_writer.writerow(STEP_CSV_HEADERS)
+    try:
+        for path in (path for target in args.logs for path in log_files(target)):
+            log_name = os.path.basename(path)
+            on_step = (lambda step: steps_writer.writerow([log_name] + [step[h] for h in STEP_CSV_HEADERS[1:]])) if steps_writer else None
+            started = time.perf_counter()
+            totals = replay_log(policy, path, feedback_mode=args.feedback, seed=args.seed, on_step=on_step,
+                                 cache_coords=cache_coords)
+            elapsed = time.perf_counter() - started
+            scored = totals["scored_steps"]
+            sim_span = (totals["last_sim_time"] - totals["first_sim_time"]) if totals["first_sim_time"] is not None else 0.0
+            logger.info(f"{log_name}: {totals['steps']} steps in {elapsed:.2f}s "
+                        f"({sim_span / elapsed if elapsed > 0 else 0:.0f}x real time), "
+                        f"cumulative regret {totals['cumulative_regret_ms']:.1f}ms, "
+                        f"mean latency {totals['latency_sum_ms'] / scored if scored else math.nan:.2f}ms, "
+                        f"best choice {totals['best_choices'] / scored if scored else math.nan:.1%}, "
+                        f"agrees with logged decision {totals['logged_decision_matches'] / max(1, totals['steps']):.1%}, "
+                        f"{totals['moves']} moves, {totals['shocks']} shocks")
+    finally:
+        if steps_file:
+            steps_file.close()
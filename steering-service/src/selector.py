@@ -2,91 +2,452 @@ import random
 import math
 import logging
 import time
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from geo import haversine_km
+from spatial_index import CacheSpatialIndex
 
 selector_logger = logging.getLogger("SelectorStrategies")
 
+# Scores published for one state version: arm names, ranking keys (lower is better)
+# and the arm ids that still have to be tried first.
+ArmScores = namedtuple("ArmScores", ["names", "keys", "unvisited"])
+
+class ArmStateStore:
+    """Per-arm numeric state held in numpy arrays.
+
+    Every column is an array indexed by the arm id, i.e. the position of the arm
+    name in ``names``. Ids stay stable until the membership changes; ``reconcile``
+    then carries the rows of surviving arms over and fills new arms with the
+    column default.
+    """
+
+    def __init__(self, **column_defaults):
+        self.defaults = {}
+        self.columns = {}
+        self.names = []
+        self.names_array = np.empty(0, dtype=object)
+        self.index = {}
+        for column, default in column_defaults.items():
+            self.add_column(column, default)
+
+    def add_column(self, column: str, default=0.0):
+        """Scalar defaults give 1-D columns; an array default gives one row of that shape per arm."""
+        dtype = np.int64 if isinstance(default, (int, np.integer)) and not isinstance(default, bool) else np.float64
+        self.defaults[column] = default
+        self.columns[column] = self._filled(len(self.names), default, dtype)
+
+    @staticmethod
+    def _filled(n_rows: int, default, dtype):
+        rows = np.empty((n_rows,) + np.shape(default), dtype=dtype)
+        rows[...] = default
+        return rows
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __setitem__(self, column: str, values):
+        self.columns[column][:] = values
+
+    def reconcile(self, names: list) -> bool:
+        if names == self.names:
+            return False
+        src = np.fromiter((self.index.get(name, -1) for name in names), dtype=np.intp, count=len(names))
+        kept = src >= 0
+        for column, old in self.columns.items():
+            new = self._filled(len(names), self.defaults[column], old.dtype)
+            new[kept] = old[src[kept]]
+            self.columns[column] = new
+        self.names = list(names)
+        self.names_array = np.array(self.names, dtype=object)
+        self.index = {name: arm_id for arm_id, name in enumerate(self.names)}
+        return True
+
+    def restore(self, names: list, columns: dict):
+        """Replace the whole store with saved rows; columns missing or misshaped in ``columns`` get defaults."""
+        self.names = list(names)
+        self.names_array = np.array(self.names, dtype=object)
+        self.index = {name: arm_id for arm_id, name in enumerate(self.names)}
+        for column, default in self.defaults.items():
+            dtype = self.columns[column].dtype
+            saved = columns.get(column)
+            if saved is not None and saved.shape == (len(self.names),) + np.shape(default):
+                self.columns[column] = np.array(saved, dtype=dtype)
+            else:
+                self.columns[column] = self._filled(len(self.names), default, dtype)
+
+    def load(self, column: str, mapping: dict):
+        for name, value in mapping.items():
+            arm_id = self.index.get(str(name))
+            if arm_id is not None:
+                self.columns[column][arm_id] = value
+
+    def to_dict(self, column: str = None, values: np.ndarray = None) -> dict:
+        values = self.columns[column] if values is None else values
+        return dict(zip(self.names, values.tolist()))
+
 class Selector:
+    SNAPSHOT_ATTRIBUTES = ()
+    USES_ARM_COORDINATES = False
+    LOCATED_SCORES_LIMIT = 1024
+
     def __init__(self, monitor=None, latency_oracle=None):
         self.monitor = monitor
         self.latency_oracle = latency_oracle
         self.nodes = []
+        self.arms = ArmStateStore()
+        self.top_k = None
+        # Wall clock for time-based state (D_UCB shock recovery); replays substitute the logged time.
+        self.clock = time.time
+        # Every state mutation happens under state_lock and bumps state_version; readers
+        # rank from an immutable ArmScores computed at most once per version.
+        self.state_lock = threading.RLock()
+        self.state_version = 0
+        self._published_scores = None
+        # Arm ids whose rows changed since the last take_state_delta(); None means every arm
+        # (membership change, renormalization), so the next delta is a keyframe.
+        self.changed_arm_ids = None
+        # Optional pre-filter: decisions only rank the nearest_k caches to the requesting client.
+        self.spatial_index = None
+        self.nearest_k = None
+        # Last location reported via update_client_location (context for LinUCB's shared scores).
+        self.client_location = None
+        # Arms the spatial index cannot place; recomputed on membership and coordinate changes only.
+        self._unindexed_arm_ids = np.empty(0, dtype=np.intp)
+        # (state_version, {client location: ArmScores of its candidates}).
+        self._located_scores = (None, {})
 
     def initialize(self, arms_names: list):
-        self.nodes = [str(arm) for arm in arms_names if arm is not None] if arms_names else []
+        with self.state_lock:
+            self.nodes = [str(arm) for arm in arms_names if arm is not None] if arms_names else []
+            if self.arms.reconcile(self.nodes):
+                self.changed_arm_ids = None
+                self._refresh_unindexed_arms()
+            self.state_version += 1
+        if self.monitor and (self.USES_ARM_COORDINATES or self.spatial_index is not None):
+            self.set_arm_coordinates(self.monitor.get_node_coordinates())
         selector_logger.debug(f"Selector {self.__class__.__name__} initialized with nodes: {self.nodes}")
 
-    def select_arm(self) -> list:
+    def enable_spatial_index(self, nearest_k: int):
+        """Rank only the ``nearest_k`` caches to the ``client_location`` passed to ``select_arm``."""
+        with self.state_lock:
+            self.spatial_index = CacheSpatialIndex()
+            self.nearest_k = nearest_k
+            self._refresh_unindexed_arms()
+            self.state_version += 1
+        if self.monitor:
+            self.set_arm_coordinates(self.monitor.get_node_coordinates())
+
+    def set_arm_coordinates(self, node_coords: dict):
+        if self.spatial_index is None: return
+        with self.state_lock:
+            if self.spatial_index.rebuild({name: coords for name, coords in (node_coords or {}).items() if name in self.arms}):
+                self._refresh_unindexed_arms()
+                self.state_version += 1
+
+    def _refresh_unindexed_arms(self):
+        if self.spatial_index is None: return
+        self._unindexed_arm_ids = np.fromiter((arm_id for name, arm_id in self.arms.index.items()
+                                               if name not in self.spatial_index), dtype=np.intp)
+
+    def select_arm(self, client_location: tuple = None) -> list:
+        """Priority list for one request; ``client_location`` is the requesting client's (lat, lon), None ranks every arm."""
+        self._refresh_nodes_from_monitor()
+        if not self.nodes: return []
+        if client_location is not None and (self.USES_ARM_COORDINATES or self._spatially_filtered()):
+            return self._priority_from_scores(self._scores_at(client_location))
+        return self._priority_from_scores(self.published_scores())
+
+    def _spatially_filtered(self) -> bool:
+        return self.spatial_index is not None and bool(self.nearest_k) and self.nearest_k < len(self.nodes)
+
+    def update(self, chosen_arm_name: str, feedback_value: float, client_location: tuple = None):
+        """``client_location`` is the reporting client's (lat, lon), for selectors that learn from context."""
+        with self.state_lock:
+            self._apply_update(chosen_arm_name, feedback_value)
+            self.state_version += 1
+
+    def _apply_update(self, chosen_arm_name: str, feedback_value: float):
+        pass
+
+    def batch_context(self, client_location: tuple = None):
+        """Per-sample state captured when feedback is queued for a batched update."""
+        return None
+
+    def update_batch(self, samples: list):
+        """Apply ``(arm_name, feedback_value, batch_context)`` samples in order as one state change."""
+        if not samples: return
+        with self.state_lock:
+            self._apply_batch(samples)
+            self.state_version += 1
+
+    def _apply_batch(self, samples: list):
+        for chosen_arm_name, feedback_value, _ in samples:
+            self._apply_update(chosen_arm_name, feedback_value)
+
+    def update_client_location(self, lat: float, lon: float):
+        try:
+            self.client_location = (float(lat), float(lon))
+        except (ValueError, TypeError):
+            pass
+
+    def _candidate_arm_ids(self, location: tuple) -> np.ndarray:
+        """Sorted ids of the nearest_k caches to ``location`` plus the caches without coordinates (state_lock held)."""
+        index = self.arms.index
+        nearest = [index[name] for name in self.spatial_index.nearest(*location, self.nearest_k) if name in index]
+        return np.sort(np.concatenate([np.array(nearest, dtype=np.intp), self._unindexed_arm_ids]))
+
+    def _scores_at(self, location: tuple) -> ArmScores:
+        """Scores for a client at ``location``, kept per location until the state changes.
+
+        With the spatial filter only the candidates are scored, so a decision costs
+        O(nearest_k) plus the k-d tree query.
+        """
+        version, by_location = self._located_scores
+        scores = by_location.get(location) if version == self.state_version else None
+        if scores is not None: return scores
+        with self.state_lock:
+            if self._located_scores[0] != self.state_version:
+                self._located_scores = (self.state_version, {})
+            by_location = self._located_scores[1]
+            scores = by_location.get(location)
+            if scores is None:
+                if len(by_location) >= self.LOCATED_SCORES_LIMIT: by_location.clear()
+                candidates = self._candidate_arm_ids(location) if self._spatially_filtered() else None
+                scores = by_location[location] = self._compute_scores(candidates, location)
+        return scores
+
+    def published_scores(self):
+        published = self._published_scores
+        if published is not None and published[0] == self.state_version:
+            return published[1]
+        if not self.state_lock.acquire(blocking=published is None):
+            # A writer is mid-update: serve the last consistent scores instead of waiting.
+            return published[1]
+        try:
+            published = self._published_scores
+            if published is None or published[0] != self.state_version:
+                published = (self.state_version, self._compute_scores())
+                self._published_scores = published
+        finally:
+            self.state_lock.release()
+        return published[1]
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        """Scores of ``arm_ids`` (every arm when None) for a client at ``location`` (the last reported one when None).
+
+        ``unvisited`` holds positions within that subset.
+        """
         raise NotImplementedError
 
-    def update(self, chosen_arm_name: str, feedback_value: float):
+    def _scored_names(self, arm_ids: np.ndarray = None) -> np.ndarray:
+        return self.arms.names_array if arm_ids is None else self.arms.names_array[arm_ids]
+
+    def _scored_column(self, column: str, arm_ids: np.ndarray = None) -> np.ndarray:
+        return self.arms[column] if arm_ids is None else self.arms[column][arm_ids]
+
+    def _priority_from_scores(self, scores: ArmScores) -> list:
+        names = scores.names
+        if scores.unvisited.size:
+            arm_id = int(scores.unvisited[0])
+            other_nodes = np.delete(np.arange(len(names)), arm_id)
+            return self._forced_first(names, arm_id, self._shuffled(other_nodes, limit=self._priority_limit(reserved=1)))
+        return names[self._rank(scores.keys, limit=self._priority_limit())].tolist()
+
+    def logged_state(self) -> tuple:
+        """(counts, real_counts, values) dicts read under one lock, as the CSV logger expects them."""
+        with self.state_lock:
+            counts = getattr(self, "counts", {})
+            real_counts = getattr(self, "real_counts", counts)
+            values = getattr(self, "values", {})
+        return counts, real_counts, values
+
+    def snapshot_state(self) -> dict:
+        with self.state_lock:
+            state = {"arm_names": np.array(self.arms.names, dtype=str)}
+            for column, values in self.arms.columns.items():
+                state[f"column__{column}"] = values.copy()
+            for attribute in self.SNAPSHOT_ATTRIBUTES:
+                value = getattr(self, attribute)
+                if value is not None:
+                    state[f"attr__{attribute}"] = np.array(value)
+        return state
+
+    def restore_state(self, state: dict):
+        names = [str(name) for name in state["arm_names"]]
+        with self.state_lock:
+            self.arms.restore(names, {key[len("column__"):]: value for key, value in state.items()
+                                      if key.startswith("column__")})
+            for attribute in self.SNAPSHOT_ATTRIBUTES:
+                value = state.get(f"attr__{attribute}")
+                if value is not None:
+                    setattr(self, attribute, value.item() if value.ndim == 0 else np.array(value))
+            self.changed_arm_ids = None
+            self.nodes = []
+            self.initialize(names)
+
+    def _mark_changed(self, arm_id):
+        if self.changed_arm_ids is not None and arm_id is not None:
+            self.changed_arm_ids.add(int(arm_id))
+
+    def take_state_delta(self, keyframe: bool = False) -> dict:
+        """Arm rows changed since the previous call plus the scalar snapshot attributes, as JSON-ready data.
+
+        The result is a keyframe (every arm) when asked for or when the change set was
+        lost; otherwise its size depends on the arms touched, not on the fleet. Applying
+        the sequence with ``apply_state_delta`` rebuilds what ``logged_state`` returned.
+        """
+        with self.state_lock:
+            keyframe = keyframe or self.changed_arm_ids is None
+            arm_ids = range(len(self.arms)) if keyframe else sorted(self.changed_arm_ids)
+            self.changed_arm_ids = set()
+            delta = {"arms": {self.arms.names[arm_id]: {column: values[arm_id].tolist()
+                                                        for column, values in self.arms.columns.items()}
+                              for arm_id in arm_ids},
+                     "attrs": {attribute: value.item() if isinstance(value, np.generic) else value
+                               for attribute in self.SNAPSHOT_ATTRIBUTES
+                               if np.ndim(value := getattr(self, attribute)) == 0 and value is not None}}
+            if keyframe:
+                delta["keyframe"] = True
+        return delta
+
+    def apply_state_delta(self, delta: dict):
+        """Replays one ``take_state_delta`` result; a keyframe replaces the arm set."""
+        with self.state_lock:
+            if delta.get("keyframe"):
+                self.arms.reconcile([])
+                self.nodes = list(delta["arms"])
+                self.arms.reconcile(self.nodes)
+                self._refresh_unindexed_arms()
+            for name, row in delta.get("arms", {}).items():
+                arm_id = self.arms.index.get(name)
+                if arm_id is None: continue
+                for column, value in row.items():
+                    if column in self.arms.columns:
+                        self.arms.columns[column][arm_id] = value
+            for attribute, value in delta.get("attrs", {}).items():
+                setattr(self, attribute, value)
+            self._state_applied()
+            self.state_version += 1
+
+    def _state_applied(self):
+        """Drops state derived from the arm columns after apply_state_delta."""
         pass
 
+    def _refresh_nodes_from_monitor(self):
+        if self.monitor:
+            nodes = [name for name, _ in self.monitor.getNodes() if name]
+            if not nodes and not self.nodes: return
+            if set(nodes) != set(self.nodes): self.initialize(nodes)
+
+    def _resolve_arm(self, arm_name: str, tag: str):
+        str_arm = str(arm_name)
+        arm_id = self.arms.index.get(str_arm)
+        if arm_id is None:
+            if self.monitor:
+                nodes = [name for name, _ in self.monitor.getNodes() if name]
+                if str_arm in nodes: self.initialize(nodes)
+                arm_id = self.arms.index.get(str_arm)
+                if arm_id is None:
+                    selector_logger.warning(f"[{tag}] Update: Arm {str_arm} not in self.nodes. Ignoring.")
+            else:
+                selector_logger.warning(f"[{tag}] Update: Arm {str_arm} not in self.nodes (no monitor). Ignoring.")
+        self._mark_changed(arm_id)
+        return arm_id
+
+    def _rank(self, keys: np.ndarray, candidates: np.ndarray = None, limit: int = None) -> np.ndarray:
+        """Arm ids ordered by ascending ``keys``; only the best ``limit`` are fully sorted."""
+        if candidates is not None:
+            keys = keys[candidates]
+        n = len(keys)
+        k = n if limit is None else max(0, min(limit, n))
+        if k < n:
+            best = np.argpartition(keys, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+            order = best[np.argsort(keys[best])]
+        else:
+            order = np.argsort(keys)
+        return order if candidates is None else candidates[order]
+
+    def _shuffled(self, candidates: np.ndarray, limit: int = None) -> np.ndarray:
+        shuffled = np.random.permutation(candidates)
+        return shuffled if limit is None else shuffled[:max(0, limit)]
+
+    def _priority_limit(self, reserved: int = 0):
+        return None if not self.top_k else self.top_k - reserved
+
+    @staticmethod
+    def _forced_first(names: np.ndarray, arm_id: int, rest: np.ndarray) -> list:
+        return [names[arm_id]] + names[rest].tolist()
+
 class EpsilonGreedy(Selector):
     def __init__(self, epsilon: float, counts: dict, values: dict, monitor=None, latency_oracle=None):
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
         self.epsilon = epsilon
-        self.counts = counts if isinstance(counts, dict) else {}
-        self.values = values if isinstance(values, dict) else {}
+        self.arms = ArmStateStore(counts=0, values=float('inf'))
+        counts = counts if isinstance(counts, dict) else {}
+        values = values if isinstance(values, dict) else {}
+        if counts or values:
+            self.initialize(list(dict.fromkeys([*counts, *values])))
+            self.arms.load("counts", counts)
+            self.arms.load("values", values)
 
-    def initialize(self, arms_names: list):
-        super().initialize(arms_names)
-        new_counts = {arm: self.counts.get(arm, 0) for arm in self.nodes}
-        new_values = {arm: self.values.get(arm, float('inf')) for arm in self.nodes}
-        self.counts = new_counts
-        self.values = new_values
+    @property
+    def counts(self):
+        return self.arms.to_dict("counts")
 
-    def select_arm(self) -> list:
-        if self.monitor:
-            current_monitor_node_names = [name for name, _ in self.monitor.getNodes() if name]
-            if not current_monitor_node_names and not self.nodes: return []
-            if set(current_monitor_node_names) != set(self.nodes):
-                self.initialize(current_monitor_node_names)
-        if not self.nodes: return []
-        unvisited_arms = [arm for arm in self.nodes if self.counts.get(arm, 0) == 0]
-        if unvisited_arms:
-            random.shuffle(unvisited_arms)
-            chosen_unvisited = unvisited_arms[0]
-            other_nodes = [n for n in self.nodes if n != chosen_unvisited]
-            if not other_nodes: return [chosen_unvisited]
+    @property
+    def values(self):
+        return self.arms.to_dict("values")
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        return ArmScores(self._scored_names(arm_ids), self._scored_column("values", arm_ids).copy(),
+                         np.flatnonzero(self._scored_column("counts", arm_ids) == 0))
+
+    def _priority_from_scores(self, scores: ArmScores) -> list:
+        names, values, unvisited_arms = scores
+        if unvisited_arms.size:
+            chosen_unvisited = int(random.choice(unvisited_arms))
+            other_nodes = np.delete(np.arange(len(names)), chosen_unvisited)
+            if not other_nodes.size: return [names[chosen_unvisited]]
+            limit = self._priority_limit(reserved=1)
             if random.random() > self.epsilon:
-                sorted_remaining = sorted(other_nodes, key=lambda node: self.values.get(node, float('inf')))
+                sorted_remaining = self._rank(values, candidates=other_nodes, limit=limit)
             else:
-                sorted_remaining = random.sample(other_nodes, len(other_nodes))
-            return [chosen_unvisited] + sorted_remaining
+                sorted_remaining = self._shuffled(other_nodes, limit=limit)
+            return self._forced_first(names, chosen_unvisited, sorted_remaining)
         if random.random() > self.epsilon:
-            return sorted(list(self.nodes), key=lambda node: self.values.get(node, float('inf')))
+            order = self._rank(values, limit=self._priority_limit())
         else:
-            return random.sample(self.nodes, len(self.nodes))
+            order = self._shuffled(np.arange(len(names)), limit=self._priority_limit())
+        return names[order].tolist()
 
-    def update(self, chosen_arm_name: str, punishment: float):
-        str_arm = str(chosen_arm_name)
-        if str_arm not in self.nodes:
-            if self.monitor:
-                nodes = [name for name, _ in self.monitor.getNodes() if name]
-                if str_arm in nodes: self.initialize(nodes)
-                if str_arm not in self.nodes:
-                    selector_logger.warning(f"[EpsilonGreedy] Update: Arm {str_arm} not in self.nodes. Ignoring.")
-                    return
-            else:
-                selector_logger.warning(f"[EpsilonGreedy] Update: Arm {str_arm} not in self.nodes (no monitor). Ignoring.")
-                return
-
-        if str_arm not in self.counts: self.counts[str_arm] = 0
-        if str_arm not in self.values: self.values[str_arm] = float('inf')
+    def _apply_update(self, chosen_arm_name: str, punishment: float):
+        arm_id = self._resolve_arm(chosen_arm_name, "EpsilonGreedy")
+        if arm_id is None: return
 
-        self.counts[str_arm] += 1
-        n = self.counts[str_arm]
-        current_avg_latency = self.values[str_arm]
+        counts, values = self.arms["counts"], self.arms["values"]
+        counts[arm_id] += 1
+        n = counts[arm_id]
+        current_avg_latency = values[arm_id]
 
         if current_avg_latency == float('inf'):
-            self.values[str_arm] = float(punishment)
+            values[arm_id] = float(punishment)
         else:
-            self.values[str_arm] = ((n - 1) * current_avg_latency + float(punishment)) / n
+            values[arm_id] = ((n - 1) * current_avg_latency + float(punishment)) / n
 
 class NoSteeringSelector(Selector):
     def __init__(self, monitor=None, latency_oracle=None):
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
-    def select_arm(self) -> list:
+    def select_arm(self, client_location: tuple = None) -> list:
         if self.monitor:
             nodes = [name for name, _ in self.monitor.getNodes() if name]
             if set(nodes) != set(self.nodes): self.initialize(nodes)
@@ -95,7 +456,7 @@ class NoSteeringSelector(Selector):
 class RandomSelector(Selector):
     def __init__(self, monitor=None, latency_oracle=None):
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
-    def select_arm(self) -> list:
+    def select_arm(self, client_location: tuple = None) -> list:
         if self.monitor:
             nodes = [name for name, _ in self.monitor.getNodes() if name]
             if set(nodes) != set(self.nodes): self.initialize(nodes)
@@ -103,57 +464,39 @@ class RandomSelector(Selector):
         return random.sample(self.nodes, len(self.nodes))
 
 class UCB1Selector(Selector):
+    SNAPSHOT_ATTRIBUTES = ("total_pulls",)
+
     def __init__(self, monitor=None, latency_oracle=None):
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
-        self.counts = {}
-        self.values = {}
+        self.arms = ArmStateStore(counts=0, values=0.0)
         self.total_pulls = 0
-    def initialize(self, arms_names: list):
-        super().initialize(arms_names)
-        new_counts = {arm: self.counts.get(arm, 0) for arm in self.nodes}
-        new_values = {arm: self.values.get(arm, 0.0) for arm in self.nodes}
-        self.counts = new_counts
-        self.values = new_values
-    def select_arm(self) -> list:
-        if self.monitor:
-            nodes = [name for name, _ in self.monitor.getNodes() if name]
-            if not nodes and not self.nodes: return []
-            if set(nodes) != set(self.nodes): self.initialize(nodes)
-        if not self.nodes: return []
-        for arm_name in self.nodes:
-            if self.counts.get(arm_name, 0) == 0:
-                other_nodes = [n for n in self.nodes if n != arm_name]
-                random.shuffle(other_nodes)
-                return [arm_name] + other_nodes
-        ucb_scores = {}
-        current_total_pulls_for_log = self.total_pulls if self.total_pulls > 0 else sum(self.counts.values())
+
+    @property
+    def counts(self):
+        return self.arms.to_dict("counts")
+
+    @property
+    def values(self):
+        return self.arms.to_dict("values")
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        counts = self._scored_column("counts", arm_ids)
+        unvisited_arms = np.flatnonzero(counts == 0)
+        # Keys are computed even while arms are unvisited: a spatially restricted decision
+        # may contain no unvisited arm and still needs a ranking.
+        current_total_pulls_for_log = self.total_pulls if self.total_pulls > 0 else int(self.arms["counts"].sum())
         log_total_pulls = math.log(max(1, current_total_pulls_for_log) + 1e-5)
-        for arm in self.nodes:
-            count = max(1e-5, self.counts.get(arm, 1e-5))
-            sum_reward = self.values.get(arm, 0.0)
-            avg_reward = sum_reward / count
-            exploration_bonus = math.sqrt((2 * log_total_pulls) / count)
-            ucb_scores[arm] = avg_reward + exploration_bonus
-        return sorted(ucb_scores, key=ucb_scores.get, reverse=True)
-    def update(self, chosen_arm_name: str, latency_ms: float):
-        str_arm = str(chosen_arm_name)
-        if str_arm not in self.nodes:
-            if self.monitor:
-                nodes = [name for name, _ in self.monitor.getNodes() if name]
-                if str_arm in nodes: self.initialize(nodes)
-                if str_arm not in self.nodes:
-                    selector_logger.warning(f"[UCB1] Update: Arm {str_arm} not in self.nodes. Ignoring.")
-                    return
-            else:
-                selector_logger.warning(f"[UCB1] Update: Arm {str_arm} not in self.nodes (no monitor). Ignoring.")
-                return
+        pulls = np.maximum(counts, 1e-5)
+        ucb_scores = self._scored_column("values", arm_ids) / pulls + np.sqrt((2 * log_total_pulls) / pulls)
+        return ArmScores(self._scored_names(arm_ids), -ucb_scores, unvisited_arms)
 
-        if str_arm not in self.counts: self.counts[str_arm] = 0
-        if str_arm not in self.values: self.values[str_arm] = 0.0
+    def _apply_update(self, chosen_arm_name: str, latency_ms: float):
+        arm_id = self._resolve_arm(chosen_arm_name, "UCB1")
+        if arm_id is None: return
 
         reward = 1000.0 / latency_ms if latency_ms > 0 else 0.0
-        self.counts[str_arm] += 1
-        self.values[str_arm] += reward
+        self.arms["counts"][arm_id] += 1
+        self.arms["values"][arm_id] += reward
         self.total_pulls += 1
 
 class D_UCB(Selector):
@@ -163,50 +506,35 @@ class D_UCB(Selector):
     LATENCY_SHOCK_RECOVERY_DURATION_SECONDS = 7
     LATENCY_SHOCK_THRESHOLD_FACTOR = 2.5
     MIN_SAMPLES_FOR_SHOCK_DETECTION = 5
+    LOG_SCALE_RENORMALIZATION_THRESHOLD = 200.0
+    SNAPSHOT_ATTRIBUTES = ("time_step", "log_discount_scale")
 
     def __init__(self, monitor=None, latency_oracle=None):
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
         self.current_gamma = self.GAMMA_STILL
-        self.discounted_counts = {}
-        self.discounted_values = {}
+        self.arms = ArmStateStore(discounted_counts=0.0, discounted_values=0.0,
+                                  raw_latency_sums=0.0, raw_pull_counts=0, actual_pull_counts=0)
+        # Discounted sums are stored divided by a global decay factor exp(log_discount_scale),
+        # so discounting all arms is a scalar update and only the pulled arm is touched.
+        self.log_discount_scale = 0.0
         self.time_step = 0
         self.last_gamma_update_log_time = 0
         self.has_moved_ever = False
         self.latency_shock_recovery_active_until_time = 0
-        self.raw_latency_sums = {}
-        self.raw_pull_counts = {}
-        self.actual_pull_counts = {}
 
     def initialize(self, arms_names: list):
         super().initialize(arms_names)
-        new_discounted_counts = {}
-        new_discounted_values = {}
-        new_raw_latency_sums = {}
-        new_raw_pull_counts = {}
-        new_actual_pull_counts = {}
-
-        for arm in self.nodes:
-            new_discounted_counts[arm] = self.discounted_counts.get(arm, 0.0)
-            new_discounted_values[arm] = self.discounted_values.get(arm, 0.0)
-            new_raw_latency_sums[arm] = self.raw_latency_sums.get(arm, 0.0)
-            new_raw_pull_counts[arm] = self.raw_pull_counts.get(arm, 0)
-            new_actual_pull_counts[arm] = self.actual_pull_counts.get(arm, 0)
-
-        self.discounted_counts = new_discounted_counts
-        self.discounted_values = new_discounted_values
-        self.raw_latency_sums = new_raw_latency_sums
-        self.raw_pull_counts = new_raw_pull_counts
-        self.actual_pull_counts = new_actual_pull_counts
-        selector_logger.debug(f"[D_UCB] Initialized/Re-initialized. Actual Pull Counts: {self.actual_pull_counts}")
+        selector_logger.debug(f"[D_UCB] Initialized/Re-initialized. Actual Pull Counts: {self.real_counts}")
 
     def _check_latency_shock(self, arm_name: str, current_latency_ms: float) -> bool:
-        if arm_name not in self.raw_pull_counts: self.raw_pull_counts[arm_name] = 0
-        if arm_name not in self.raw_latency_sums: self.raw_latency_sums[arm_name] = 0.0
-
-        if self.raw_pull_counts[arm_name] < self.MIN_SAMPLES_FOR_SHOCK_DETECTION:
-            selector_logger.debug(f"[D_UCB] Shock not checked for {arm_name}: insufficient samples ({self.raw_pull_counts.get(arm_name, 0)}/{self.MIN_SAMPLES_FOR_SHOCK_DETECTION})")
+        with self.state_lock:
+            arm_id = self.arms.index.get(arm_name)
+            raw_pulls = int(self.arms["raw_pull_counts"][arm_id]) if arm_id is not None else 0
+            raw_latency_sum = float(self.arms["raw_latency_sums"][arm_id]) if arm_id is not None else 0.0
+        if raw_pulls < self.MIN_SAMPLES_FOR_SHOCK_DETECTION:
+            selector_logger.debug(f"[D_UCB] Shock not checked for {arm_name}: insufficient samples ({raw_pulls}/{self.MIN_SAMPLES_FOR_SHOCK_DETECTION})")
             return False
-        avg_raw_latency = self.raw_latency_sums[arm_name] / self.raw_pull_counts[arm_name]
+        avg_raw_latency = raw_latency_sum / raw_pulls
         threshold_latency = avg_raw_latency * self.LATENCY_SHOCK_THRESHOLD_FACTOR
         if avg_raw_latency < 10:
             threshold_latency = max(threshold_latency, avg_raw_latency + 15)
@@ -218,8 +546,12 @@ class D_UCB(Selector):
         return False
 
     def update_environmental_state(self, client_is_moving_now: bool, latency_shock_detected: bool):
+        with self.state_lock:
+            self._apply_environmental_state(client_is_moving_now, latency_shock_detected)
+
+    def _apply_environmental_state(self, client_is_moving_now: bool, latency_shock_detected: bool):
         old_gamma = self.current_gamma
-        now = time.time()
+        now = self.clock()
         if client_is_moving_now:
             self.has_moved_ever = True
         if latency_shock_detected:
@@ -235,102 +567,482 @@ class D_UCB(Selector):
         else:
             self.current_gamma = self.GAMMA_STILL
             log_reason = f"Normal State"
+        if old_gamma != self.current_gamma:
+            self.state_version += 1
         if old_gamma != self.current_gamma or \
            ( (self.current_gamma != self.GAMMA_STILL) and \
              (now - self.last_gamma_update_log_time > 5) ):
             selector_logger.info(f"[D_UCB] Gamma: {self.current_gamma:.2f}. Reason: {log_reason}")
             self.last_gamma_update_log_time = now
 
-    def select_arm(self) -> list:
-        if self.monitor:
-            nodes = [name for name, _ in self.monitor.getNodes() if name]
-            if not nodes and not self.nodes: return []
-            if set(nodes) != set(self.nodes):
-                self.initialize(nodes)
-        if not self.nodes: return []
-        for arm_name in self.nodes:
-            if arm_name not in self.discounted_counts: self.discounted_counts[arm_name] = 0.0
-            if self.discounted_counts[arm_name] < 1e-5 :
-                other_nodes = [n for n in self.nodes if n != arm_name]
-                random.shuffle(other_nodes)
-                selector_logger.debug(f"[D_UCB] Selecting unpulled arm: {arm_name}")
-                return [arm_name] + other_nodes
-        ucb_scores = {}
-        log_t = math.log(self.time_step + 1e-5)
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        names = self._scored_names(arm_ids)
+        discounted_counts = self._discounted("discounted_counts", arm_ids)
+        unpulled_arms = np.flatnonzero(discounted_counts < 1e-5)
+        if unpulled_arms.size:
+            selector_logger.debug(f"[D_UCB] Unpulled arms first: {names[unpulled_arms[:5]].tolist()}")
+        log_t = math.log(max(self.time_step, 1) + 1e-5)
         exploration_coefficient = 2.0
         if self.current_gamma == self.GAMMA_LATENCY_SHOCK:
             exploration_coefficient = 1.5
-        for arm in self.nodes:
-            discounted_n_i = max(1e-5, self.discounted_counts.get(arm, 1e-5))
-            current_sum_rewards = self.discounted_values.get(arm, 0.0)
-            avg_reward = current_sum_rewards / discounted_n_i
-            exploration_bonus = math.sqrt((exploration_coefficient * log_t) / discounted_n_i)
-            ucb_scores[arm] = avg_reward + exploration_bonus
-            selector_logger.debug(
-                f"[D_UCB] Select Arm: {arm} | "
-                f"AvgRew: {avg_reward:.3f} (SumRew: {current_sum_rewards:.3f} / DiscCnt: {discounted_n_i:.3f}) | "
-                f"Bonus: {exploration_bonus:.3f} (Coeff: {exploration_coefficient:.1f}, log_t: {log_t:.3f}) | "
-                f"UCB: {ucb_scores[arm]:.3f}"
-            )
-        sorted_arms = sorted(ucb_scores, key=ucb_scores.get, reverse=True)
-        selector_logger.debug(f"[D_UCB] Sorted UCB: {[(arm, '{:.3f}'.format(ucb_scores[arm])) for arm in sorted_arms]}")
-        return sorted_arms
-
-    def update(self, chosen_arm_name: str, latency_ms: float):
+        discounted_n = np.maximum(discounted_counts, 1e-5)
+        discounted_values = self._discounted("discounted_values", arm_ids)
+        avg_rewards = discounted_values / discounted_n
+        exploration_bonus = np.sqrt((exploration_coefficient * log_t) / discounted_n)
+        ucb_scores = avg_rewards + exploration_bonus
+        if selector_logger.isEnabledFor(logging.DEBUG):
+            order = self._rank(-ucb_scores)
+            for arm_id in order:
+                selector_logger.debug(
+                    f"[D_UCB] Select Arm: {names[arm_id]} | "
+                    f"AvgRew: {avg_rewards[arm_id]:.3f} (SumRew: {discounted_values[arm_id]:.3f} / DiscCnt: {discounted_n[arm_id]:.3f}) | "
+                    f"Bonus: {exploration_bonus[arm_id]:.3f} (Coeff: {exploration_coefficient:.1f}, log_t: {log_t:.3f}) | "
+                    f"UCB: {ucb_scores[arm_id]:.3f}"
+                )
+            selector_logger.debug(f"[D_UCB] Sorted UCB: {[(names[arm_id], '{:.3f}'.format(ucb_scores[arm_id])) for arm_id in order]}")
+        return ArmScores(names, -ucb_scores, unpulled_arms)
+
+    def _arm_id_for_update(self, str_arm: str):
+        arm_id = self.arms.index.get(str_arm)
+        if arm_id is None and self.monitor:
+            nodes_now = [name for name, _ in self.monitor.getNodes() if name]
+            if str_arm in nodes_now:
+                self.initialize(nodes_now)
+            arm_id = self.arms.index.get(str_arm)
+        self._mark_changed(arm_id)
+        return arm_id
+
+    def _apply_update(self, chosen_arm_name: str, latency_ms: float):
         str_arm = str(chosen_arm_name)
-        if str_arm not in self.nodes:
-            if self.monitor:
-                nodes_now = [name for name, _ in self.monitor.getNodes() if name]
-                if str_arm in nodes_now:
-                    self.initialize(nodes_now)
-                if str_arm not in self.nodes: return
-            else: return
-
-        if str_arm not in self.raw_pull_counts: self.raw_pull_counts[str_arm] = 0
-        if str_arm not in self.raw_latency_sums: self.raw_latency_sums[str_arm] = 0.0
-        if str_arm not in self.actual_pull_counts: self.actual_pull_counts[str_arm] = 0
-        if str_arm not in self.discounted_counts: self.discounted_counts[str_arm] = 0.0
-        if str_arm not in self.discounted_values: self.discounted_values[str_arm] = 0.0
-
-        self.raw_pull_counts[str_arm] += 1
-        self.raw_latency_sums[str_arm] += latency_ms
-        self.actual_pull_counts[str_arm] += 1
+        arm_id = self._arm_id_for_update(str_arm)
+        if arm_id is None: return
+
+        self.arms["raw_pull_counts"][arm_id] += 1
+        self.arms["raw_latency_sums"][arm_id] += latency_ms
+        self.arms["actual_pull_counts"][arm_id] += 1
         reward = 1000.0 / latency_ms if latency_ms > 0 else 0.0
         self.time_step += 1
-        for arm_node in self.nodes:
-            self.discounted_counts[arm_node] = self.discounted_counts.get(arm_node, 0.0) * self.current_gamma
-            self.discounted_values[arm_node] = self.discounted_values.get(arm_node, 0.0) * self.current_gamma
-        self.discounted_counts[str_arm] += 1.0
-        self.discounted_values[str_arm] += reward
+        self.log_discount_scale += math.log(self.current_gamma)
+        if self.log_discount_scale < -self.LOG_SCALE_RENORMALIZATION_THRESHOLD:
+            self._renormalize_discount_scale()
+        inverse_scale = math.exp(-self.log_discount_scale)
+        self.arms["discounted_counts"][arm_id] += inverse_scale
+        self.arms["discounted_values"][arm_id] += reward * inverse_scale
         selector_logger.debug(
             f"[D_UCB] Update: Arm={str_arm}, Latency={latency_ms:.2f}, Reward={reward:.2f}, Gamma={self.current_gamma:.2f} | "
-            f"NewDiscCnt: {self.discounted_counts[str_arm]:.2f}, NewActualCnt: {self.actual_pull_counts.get(str_arm,0)} | "
+            f"NewDiscCnt: {self.arms['discounted_counts'][arm_id] / inverse_scale:.2f}, NewActualCnt: {self.arms['actual_pull_counts'][arm_id]} | "
             f"TimeStep: {self.time_step}"
         )
 
+    def batch_context(self, client_location: tuple = None):
+        return self.current_gamma
+
+    def _apply_batch(self, samples: list):
+        resolved = [(self._arm_id_for_update(str(arm_name)), float(latency_ms), gamma)
+                    for arm_name, latency_ms, gamma in samples]
+        resolved = [sample for sample in resolved if sample[0] is not None]
+        if not resolved: return
+        arm_ids = np.fromiter((arm_id for arm_id, _, _ in resolved), dtype=np.intp, count=len(resolved))
+        latencies = np.fromiter((latency for _, latency, _ in resolved), dtype=np.float64, count=len(resolved))
+        gammas = np.fromiter((self.current_gamma if gamma is None else gamma for _, _, gamma in resolved),
+                             dtype=np.float64, count=len(resolved))
+        rewards = np.divide(1000.0, latencies, out=np.zeros_like(latencies), where=latencies > 0)
+        np.add.at(self.arms["raw_pull_counts"], arm_ids, 1)
+        np.add.at(self.arms["raw_latency_sums"], arm_ids, latencies)
+        np.add.at(self.arms["actual_pull_counts"], arm_ids, 1)
+        self.time_step += len(resolved)
+
+        # Sample j is discounted by every gamma up to and including its own, exactly as in
+        # sequential updates. Chunks keep the log scale inside the renormalization bound.
+        log_steps = np.cumsum(np.log(gammas))
+        start = 0
+        while start < len(resolved):
+            if self.log_discount_scale < -self.LOG_SCALE_RENORMALIZATION_THRESHOLD:
+                self._renormalize_discount_scale()
+            offset = log_steps[start - 1] if start else 0.0
+            relative = log_steps[start:] - offset
+            budget = self.LOG_SCALE_RENORMALIZATION_THRESHOLD + self.log_discount_scale
+            end = start + max(1, int(np.searchsorted(-relative, budget, side="right")))
+            scales = self.log_discount_scale + relative[:end - start]
+            inverse_scales = np.exp(-scales)
+            np.add.at(self.arms["discounted_counts"], arm_ids[start:end], inverse_scales)
+            np.add.at(self.arms["discounted_values"], arm_ids[start:end], rewards[start:end] * inverse_scales)
+            self.log_discount_scale = float(scales[-1])
+            start = end
+
+    def _discounted(self, column: str, arm_ids: np.ndarray = None) -> np.ndarray:
+        return self._scored_column(column, arm_ids) * math.exp(self.log_discount_scale)
+
+    def _renormalize_discount_scale(self):
+        scale = math.exp(self.log_discount_scale)
+        self.arms["discounted_counts"] *= scale
+        self.arms["discounted_values"] *= scale
+        self.log_discount_scale = 0.0
+        self.changed_arm_ids = None
+
+    @property
+    def counts(self):
+        return self.arms.to_dict(values=self._discounted("discounted_counts"))
+
+    @property
+    def real_counts(self):
+        return self.arms.to_dict("actual_pull_counts")
+
+    @property
+    def values(self):
+        count = self._discounted("discounted_counts")
+        value_sum = self._discounted("discounted_values")
+        avg_rewards = np.divide(value_sum, count, out=np.zeros_like(value_sum), where=count > 1e-6)
+        return self.arms.to_dict(values=avg_rewards)
+
+class SW_UCB(Selector):
+    DEFAULT_WINDOW_SIZE = 200
+    EXPLORATION_COEFFICIENT = 2.0
+    SNAPSHOT_ATTRIBUTES = ("window_arms", "window_rewards", "window_head", "time_step")
+
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE, monitor=None, latency_oracle=None):
+        super().__init__(monitor=monitor, latency_oracle=latency_oracle)
+        self.window_size = max(1, int(window_size))
+        self.arms = ArmStateStore(window_counts=0, window_reward_sums=0.0, actual_pull_counts=0)
+        # Ring buffer of the last `window_size` observations; slot arm id -1 means empty/evicted arm.
+        self.window_arms = np.full(self.window_size, -1, dtype=np.intp)
+        self.window_rewards = np.zeros(self.window_size, dtype=np.float64)
+        self.window_head = 0
+        self.time_step = 0
+
+    def initialize(self, arms_names: list):
+        old_index = self.arms.index
+        super().initialize(arms_names)
+        if old_index == self.arms.index: return
+        remap = np.full(len(old_index) + 1, -1, dtype=np.intp)
+        for name, old_id in old_index.items():
+            remap[old_id] = self.arms.index.get(name, -1)
+        self.window_arms = remap[self.window_arms]
+        self._recompute_window_sums()
+
+    def restore_state(self, state: dict):
+        super().restore_state(state)
+        if len(self.window_arms) != self.window_size:
+            # Snapshot taken with another --window_size: keep the most recent observations.
+            chronological = np.roll(np.arange(len(self.window_arms)), -self.window_head)[-self.window_size:]
+            window_arms = np.full(self.window_size, -1, dtype=np.intp)
+            window_rewards = np.zeros(self.window_size, dtype=np.float64)
+            window_arms[-len(chronological):] = self.window_arms[chronological]
+            window_rewards[-len(chronological):] = self.window_rewards[chronological]
+            self.window_arms, self.window_rewards, self.window_head = window_arms, window_rewards, 0
+        self._recompute_window_sums()
+
+    def _recompute_window_sums(self):
+        valid = self.window_arms >= 0
+        n_arms = len(self.nodes)
+        window_reward_sums = np.bincount(self.window_arms[valid], weights=self.window_rewards[valid], minlength=n_arms)
+        if self.changed_arm_ids is not None:
+            # Arms whose sums lose their drift here changed too; once per lap, so O(arms / window_size) per update.
+            self.changed_arm_ids.update(np.flatnonzero(window_reward_sums != self.arms["window_reward_sums"]).tolist())
+        self.arms["window_counts"] = np.bincount(self.window_arms[valid], minlength=n_arms)
+        self.arms["window_reward_sums"] = window_reward_sums
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        window_counts = self._scored_column("window_counts", arm_ids)
+        unvisited_arms = np.flatnonzero(window_counts == 0)
+        log_window = math.log(max(1, min(self.time_step, self.window_size)) + 1e-5)
+        window_n = np.maximum(window_counts, 1)
+        ucb_scores = self._scored_column("window_reward_sums", arm_ids) / window_n + \
+                     np.sqrt((self.EXPLORATION_COEFFICIENT * log_window) / window_n)
+        return ArmScores(self._scored_names(arm_ids), -ucb_scores, unvisited_arms)
+
+    def _apply_update(self, chosen_arm_name: str, latency_ms: float):
+        arm_id = self._resolve_arm(chosen_arm_name, "SW_UCB")
+        if arm_id is None: return
+
+        reward = 1000.0 / latency_ms if latency_ms > 0 else 0.0
+        window_counts, window_reward_sums = self.arms["window_counts"], self.arms["window_reward_sums"]
+        evicted_arm = self.window_arms[self.window_head]
+        if evicted_arm >= 0:
+            self._mark_changed(evicted_arm)
+            window_counts[evicted_arm] -= 1
+            window_reward_sums[evicted_arm] -= self.window_rewards[self.window_head]
+        self.window_arms[self.window_head] = arm_id
+        self.window_rewards[self.window_head] = reward
+        window_counts[arm_id] += 1
+        window_reward_sums[arm_id] += reward
+        self.arms["actual_pull_counts"][arm_id] += 1
+        self.time_step += 1
+        self.window_head = (self.window_head + 1) % self.window_size
+        if self.window_head == 0:
+            # Once per lap, drop the float drift of the incremental add/subtract.
+            self._recompute_window_sums()
+
+    @property
+    def counts(self):
+        return self.arms.to_dict("window_counts")
+
+    @property
+    def real_counts(self):
+        return self.arms.to_dict("actual_pull_counts")
+
+    @property
+    def values(self):
+        count = self.arms["window_counts"]
+        value_sum = self.arms["window_reward_sums"]
+        avg_rewards = np.divide(value_sum, count, out=np.zeros_like(value_sum), where=count > 0)
+        return self.arms.to_dict(values=avg_rewards)
+
+class ThompsonSamplingSelector(Selector):
+    """Normal-Gamma Thompson sampling over observed latencies (lower is better).
+
+    With ``discount_gamma < 1`` the sufficient statistics decay like D_UCB, using the
+    same global log-space scale so an update only touches the pulled arm.
+    """
+    PRIOR_MEAN_LATENCY_MS = 50.0
+    PRIOR_KAPPA = 0.01
+    PRIOR_ALPHA = 1.0
+    PRIOR_BETA = 100.0
+    LOG_SCALE_RENORMALIZATION_THRESHOLD = 200.0
+    SNAPSHOT_ATTRIBUTES = ("log_discount_scale",)
+
+    def __init__(self, discount_gamma: float = 1.0, seed: int = None, monitor=None, latency_oracle=None):
+        super().__init__(monitor=monitor, latency_oracle=latency_oracle)
+        self.discount_gamma = min(1.0, max(1e-3, float(discount_gamma)))
+        # Seeded from the global numpy state by default so np.random.seed() still makes runs reproducible.
+        # Each thread draws from its own child generator: a shared Generator serializes the request threads.
+        self._seed_sequence = np.random.SeedSequence(seed if seed is not None else np.random.randint(2**31))
+        self._thread_rngs = threading.local()
+        self._spawn_lock = threading.Lock()
+        self.arms = ArmStateStore(obs_counts=0.0, latency_sums=0.0, latency_sq_sums=0.0, actual_pull_counts=0)
+        self.log_discount_scale = 0.0
+        self._posterior_arrays = None
+
+    def initialize(self, arms_names: list):
+        super().initialize(arms_names)
+        self._posterior_arrays = None
+
+    def _state_applied(self):
+        self._posterior_arrays = None
+
+    @property
+    def rng(self) -> np.random.Generator:
+        rng = getattr(self._thread_rngs, "rng", None)
+        if rng is None:
+            with self._spawn_lock:
+                child = self._seed_sequence.spawn(1)[0]
+            rng = self._thread_rngs.rng = np.random.default_rng(child)
+        return rng
+
+    def _statistics(self, arm_ids=slice(None)):
+        scale = math.exp(self.log_discount_scale)
+        return (self.arms["obs_counts"][arm_ids] * scale, self.arms["latency_sums"][arm_ids] * scale,
+                self.arms["latency_sq_sums"][arm_ids] * scale)
+
+    def _posterior(self, arm_ids=slice(None)):
+        n, sum_x, sum_sq = self._statistics(arm_ids)
+        if np.ndim(n) == 0:
+            mean_x = sum_x / n if n > 1e-12 else 0.0
+        else:
+            mean_x = np.divide(sum_x, n, out=np.zeros_like(sum_x), where=n > 1e-12)
+        spread = np.maximum(sum_sq - n * mean_x ** 2, 0.0)
+        kappa_n = self.PRIOR_KAPPA + n
+        mu_n = (self.PRIOR_KAPPA * self.PRIOR_MEAN_LATENCY_MS + sum_x) / kappa_n
+        alpha_n = self.PRIOR_ALPHA + n / 2.0
+        beta_n = self.PRIOR_BETA + 0.5 * spread + \
+                 self.PRIOR_KAPPA * n * (mean_x - self.PRIOR_MEAN_LATENCY_MS) ** 2 / (2.0 * kappa_n)
+        return mu_n, kappa_n, alpha_n, beta_n
+
+    def _current_posterior(self):
+        if self._posterior_arrays is None:
+            self._posterior_arrays = self._posterior()
+        return self._posterior_arrays
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        # Thompson draws happen per decision, so the published "keys" are the posterior parameters.
+        posterior = self._current_posterior() if arm_ids is None else self._posterior(arm_ids)
+        return ArmScores(self._scored_names(arm_ids), np.stack(posterior), np.empty(0, dtype=np.intp))
+
+    def _priority_from_scores(self, scores: ArmScores) -> list:
+        mu_n, kappa_n, alpha_n, beta_n = scores.keys
+        rng = self.rng
+        precision = rng.standard_gamma(alpha_n) / beta_n
+        mean_noise = rng.standard_normal(len(scores.names))
+        sampled_latencies = mu_n + mean_noise / np.sqrt(kappa_n * precision)
+        return scores.names[self._rank(sampled_latencies, limit=self._priority_limit())].tolist()
+
+    def _apply_update(self, chosen_arm_name: str, latency_ms: float):
+        arm_id = self._resolve_arm(chosen_arm_name, "Thompson")
+        if arm_id is None: return
+
+        latency_ms = float(latency_ms)
+        if self.discount_gamma < 1.0:
+            self.log_discount_scale += math.log(self.discount_gamma)
+            if self.log_discount_scale < -self.LOG_SCALE_RENORMALIZATION_THRESHOLD:
+                self._renormalize_discount_scale()
+        inverse_scale = math.exp(-self.log_discount_scale)
+        self.arms["obs_counts"][arm_id] += inverse_scale
+        self.arms["latency_sums"][arm_id] += latency_ms * inverse_scale
+        self.arms["latency_sq_sums"][arm_id] += latency_ms * latency_ms * inverse_scale
+        self.arms["actual_pull_counts"][arm_id] += 1
+        if self.discount_gamma < 1.0 or self._posterior_arrays is None:
+            self._posterior_arrays = None
+        else:
+            for posterior_array, value in zip(self._posterior_arrays, self._posterior(arm_id)):
+                posterior_array[arm_id] = value
+
+    def _renormalize_discount_scale(self):
+        scale = math.exp(self.log_discount_scale)
+        for column in ("obs_counts", "latency_sums", "latency_sq_sums"):
+            self.arms[column] *= scale
+        self.log_discount_scale = 0.0
+        self.changed_arm_ids = None
+
+    def _apply_batch(self, samples: list):
+        resolved = [(self._resolve_arm(arm_name, "Thompson"), float(latency_ms)) for arm_name, latency_ms, _ in samples]
+        resolved = [sample for sample in resolved if sample[0] is not None]
+        if not resolved: return
+        arm_ids = np.fromiter((arm_id for arm_id, _ in resolved), dtype=np.intp, count=len(resolved))
+        latencies = np.fromiter((latency for _, latency in resolved), dtype=np.float64, count=len(resolved))
+        # Sample j is stored divided by the decay after its own step, as in sequential updates.
+        # Chunks keep the log scale inside the renormalization bound.
+        log_gamma = math.log(self.discount_gamma)
+        start = 0
+        while start < len(resolved):
+            end = len(resolved)
+            if log_gamma < 0.0:
+                if self.log_discount_scale + log_gamma < -self.LOG_SCALE_RENORMALIZATION_THRESHOLD:
+                    self._renormalize_discount_scale()
+                budget = self.LOG_SCALE_RENORMALIZATION_THRESHOLD + self.log_discount_scale
+                end = start + max(1, min(end - start, int(budget / -log_gamma)))
+            scales = self.log_discount_scale + log_gamma * np.arange(1, end - start + 1)
+            inverse_scales = np.exp(-scales)
+            chunk_ids, chunk_latencies = arm_ids[start:end], latencies[start:end]
+            np.add.at(self.arms["obs_counts"], chunk_ids, inverse_scales)
+            np.add.at(self.arms["latency_sums"], chunk_ids, chunk_latencies * inverse_scales)
+            np.add.at(self.arms["latency_sq_sums"], chunk_ids, chunk_latencies * chunk_latencies * inverse_scales)
+            self.log_discount_scale = float(scales[-1])
+            start = end
+        np.add.at(self.arms["actual_pull_counts"], arm_ids, 1)
+        if self.discount_gamma < 1.0 or self._posterior_arrays is None:
+            self._posterior_arrays = None
+        else:
+            touched = np.unique(arm_ids)
+            for posterior_array, values in zip(self._posterior_arrays, self._posterior(touched)):
+                posterior_array[touched] = values
+
+    @property
+    def counts(self):
+        return self.arms.to_dict(values=self._statistics()[0])
+
+    @property
+    def real_counts(self):
+        return self.arms.to_dict("actual_pull_counts")
+
+    @property
+    def values(self):
+        return self.arms.to_dict(values=self._current_posterior()[0])
+
+class LinUCBSelector(Selector):
+    """Disjoint LinUCB predicting each arm's latency from the client position.
+
+    Features per arm are ``[1, d, d^2]`` with ``d`` the client-to-cache distance in
+    thousands of km. The inverse design matrices are maintained with Sherman-Morrison
+    updates, so learning costs O(d^2) per sample and a client moving to another region
+    immediately re-ranks the caches through the distance features. Decisions and
+    updates use the position of the client being steered or reporting; the last
+    reported position is only a fallback for callers that pass none.
+    """
+    FEATURE_DIM = 3
+    DISTANCE_SCALE_KM = 1000.0
+    RIDGE_LAMBDA = 1.0
+    EXPLORATION_ALPHA = 10.0
+    USES_ARM_COORDINATES = True
+
+    def __init__(self, exploration_alpha: float = EXPLORATION_ALPHA, monitor=None, latency_oracle=None):
+        super().__init__(monitor=monitor, latency_oracle=latency_oracle)
+        self.exploration_alpha = exploration_alpha
+        self.arms = ArmStateStore(
+            a_inv=np.eye(self.FEATURE_DIM) / self.RIDGE_LAMBDA, b=np.zeros(self.FEATURE_DIM),
+            lat=float('nan'), lon=float('nan'), actual_pull_counts=0)
+
+    def set_arm_coordinates(self, node_coords: dict):
+        super().set_arm_coordinates(node_coords)
+        with self.state_lock:
+            for name, coords in (node_coords or {}).items():
+                arm_id = self.arms.index.get(name)
+                if arm_id is not None and coords.get('lat') is not None and coords.get('lon') is not None:
+                    self.arms["lat"][arm_id] = coords['lat']
+                    self.arms["lon"][arm_id] = coords['lon']
+                    self._mark_changed(arm_id)
+            self.state_version += 1
+
+    def update_client_location(self, lat: float, lon: float):
+        with self.state_lock:
+            previous = self.client_location
+            super().update_client_location(lat, lon)
+            if self.client_location != previous:
+                self.state_version += 1
+
+    def _features(self, arm_ids=slice(None), location: tuple = None) -> np.ndarray:
+        lats, lons = self.arms["lat"][arm_ids], self.arms["lon"][arm_ids]
+        location = location or self.client_location
+        if location is None:
+            distance = np.zeros(np.shape(lats))
+        else:
+            distance = haversine_km(location[0], location[1], lats, lons) / self.DISTANCE_SCALE_KM
+        return np.stack([np.ones_like(distance), distance, distance ** 2], axis=-1)
+
+    def _predicted_latencies(self, features: np.ndarray, arm_ids: np.ndarray = None):
+        a_inv = self._scored_column("a_inv", arm_ids)
+        theta = np.einsum('nij,nj->ni', a_inv, self._scored_column("b", arm_ids))
+        mean = np.einsum('ni,ni->n', features, theta)
+        variance = np.einsum('ni,nij,nj->n', features, a_inv, features)
+        return mean, np.sqrt(np.maximum(variance, 0.0))
+
+    def _compute_scores(self, arm_ids: np.ndarray = None, location: tuple = None) -> ArmScores:
+        mean, width = self._predicted_latencies(self._features(slice(None) if arm_ids is None else arm_ids, location), arm_ids)
+        lower_confidence_bound = mean - self.exploration_alpha * width
+        return ArmScores(self._scored_names(arm_ids), lower_confidence_bound, np.empty(0, dtype=np.intp))
+
+    def update(self, chosen_arm_name: str, latency_ms: float, client_location: tuple = None):
+        with self.state_lock:
+            self._apply_update(chosen_arm_name, latency_ms, client_location)
+            self.state_version += 1
+
+    def batch_context(self, client_location: tuple = None):
+        return client_location or self.client_location
+
+    def _apply_batch(self, samples: list):
+        for chosen_arm_name, latency_ms, client_location in samples:
+            self._apply_update(chosen_arm_name, latency_ms, client_location)
+
+    def _apply_update(self, chosen_arm_name: str, latency_ms: float, client_location: tuple = None):
+        arm_id = self._resolve_arm(chosen_arm_name, "LinUCB")
+        if arm_id is None: return
+
+        # Features of the position the feedback came from, not of whichever client reported last.
+        x = self._features(arm_id, client_location)
+        a_inv = self.arms["a_inv"][arm_id]
+        a_inv_x = a_inv @ x
+        a_inv -= np.outer(a_inv_x, a_inv_x) / (1.0 + x @ a_inv_x)
+        self.arms["b"][arm_id] += float(latency_ms) * x
+        self.arms["actual_pull_counts"][arm_id] += 1
+
     @property
     def counts(self):
-        return self.discounted_counts
+        return self.arms.to_dict("actual_pull_counts")
 
     @property
     def real_counts(self):
-        return self.actual_pull_counts
+        return self.arms.to_dict("actual_pull_counts")
 
     @property
     def values(self):
-        avg_rewards = {}
-        for arm in self.nodes:
-            count = self.discounted_counts.get(arm, 0.0)
-            value_sum = self.discounted_values.get(arm, 0.0)
-            avg_rewards[arm] = value_sum / count if count > 1e-6 else 0.0
-        return avg_rewards
+        if not self.nodes: return {}
+        return self.arms.to_dict(values=self._predicted_latencies(self._features())[0])
 
 class OracleBestChoiceSelector(Selector):
     def __init__(self, monitor=None, latency_oracle=None):
         if latency_oracle is None: raise ValueError("OracleBestChoiceSelector requires DynamicLatencyOracle.")
         super().__init__(monitor=monitor, latency_oracle=latency_oracle)
 
-    def select_arm(self) -> list:
+    def select_arm(self, client_location: tuple = None) -> list:
         if not self.latency_oracle:
             return sorted(list(self.nodes)) if self.nodes else []
         if self.monitor:
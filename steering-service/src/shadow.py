@@ -0,0 +1,139 @@
+import csv
+import time
+import queue
+import threading
+import logging
+
+from selector import D_UCB
+
+logger = logging.getLogger("ShadowEval")
+
+SHADOW_CSV_HEADERS = [
+    "timestamp_server", "sim_time_client", "strategy", "is_primary", "chosen_server", "chosen_oracle_latency_ms",
+    "best_server", "best_oracle_latency_ms", "latency_gap_ms", "feedback_server", "feedback_latency_ms"
+]
+
+class ShadowEvaluator:
+    """Runs extra selectors next to the primary one on the same live feedback.
+
+    Every ``/coords`` sample is queued (never blocking the request) and a background
+    thread, for each shadow, records the server it would steer to right now and how far
+    that server's oracle latency is from the best one, then trains it on the sample.
+    With ``feedback_mode="observed"`` shadows learn from the server the client really
+    used; with ``"counterfactual"`` they learn from the oracle latency of their own
+    choice, as if they had been the primary. The primary's real decision is logged
+    alongside for reference. Shadow choices also feed ``quality`` (a
+    DecisionQualityTracker) when given, next to the primary's live counters.
+    """
+    FEEDBACK_MODES = ("observed", "counterfactual")
+
+    def __init__(self, shadows: dict, primary_name: str, log_filename: str = None, feedback_mode: str = "observed",
+                 queue_size: int = 10000, quality=None):
+        self.shadows = shadows
+        self.primary_name = primary_name
+        self.log_filename = log_filename
+        self.quality = quality
+        self.feedback_mode = feedback_mode if feedback_mode in self.FEEDBACK_MODES else "observed"
+        self.pending = queue.Queue(maxsize=max(1, queue_size))
+        self.totals = {name: [0, 0.0, 0] for name in [primary_name, *shadows]}  # decisions, gap sum, best picks
+        self.totals_lock = threading.Lock()
+        self.dropped = 0
+        self.running = False
+        self.thread = None
+
+    def submit(self, event: dict):
+        """Queue one feedback sample: time, sim_time, lat, lon, moving, server_used, latency, oracle, primary_choice."""
+        try:
+            self.pending.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Shadow evaluation queue full; {self.dropped} sample(s) dropped so far.")
+
+    def _record(self, rows: list, event: dict, name: str, choice: str, is_primary: bool):
+        oracle = event["oracle"]
+        if not oracle or choice not in oracle: return
+        best_server = min(oracle, key=oracle.get)
+        gap = oracle[choice] - oracle[best_server]
+        with self.totals_lock:
+            totals = self.totals[name]
+            totals[0] += 1
+            totals[1] += gap
+            totals[2] += choice == best_server
+        if self.quality and not is_primary:
+            self.quality.record(name, choice, oracle, event["time"])
+        rows.append([event["time"], event["sim_time"], name, is_primary, choice, oracle[choice], best_server,
+                     oracle[best_server], gap, event["server_used"], event["latency"]])
+
+    def _evaluate(self, event: dict) -> list:
+        rows = []
+        self._record(rows, event, self.primary_name, event["primary_choice"], True)
+        for name, shadow in self.shadows.items():
+            location = None
+            if event["lat"] is not None and event["lon"] is not None:
+                shadow.update_client_location(event["lat"], event["lon"])
+                location = (event["lat"], event["lon"])
+            ordered = shadow.select_arm(location)
+            choice = ordered[0] if ordered else None
+            self._record(rows, event, name, choice, False)
+            if self.feedback_mode == "counterfactual":
+                server, latency = choice, event["oracle"].get(choice)
+            else:
+                server, latency = event["server_used"], event["latency"]
+            if server is None or latency is None or server not in shadow.nodes: continue
+            if isinstance(shadow, D_UCB):
+                shock = shadow._check_latency_shock(server, latency)
+                shadow.update_environmental_state(event["moving"], shock)
+            shadow.update(server, float(latency), location)
+        return rows
+
+    def _write(self, rows: list):
+        if not rows or not self.log_filename: return
+        try:
+            with open(self.log_filename, "a", newline="") as log_file:
+                csv.writer(log_file).writerows(rows)
+        except OSError as e:
+            logger.error(f"Error writing shadow log {self.log_filename}: {e}")
+
+    def run_eval_loop(self):
+        while self.running or not self.pending.empty():
+            try:
+                event = self.pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            rows = []
+            # Drain whatever queued up meanwhile and write it with one open().
+            while event is not None:
+                try:
+                    rows.extend(self._evaluate(event))
+                except Exception as e:
+                    logger.error(f"Shadow evaluation failed: {e}", exc_info=True)
+                try:
+                    event = self.pending.get_nowait() if len(rows) < 1000 else None
+                except queue.Empty:
+                    event = None
+            self._write(rows)
+
+    def stats(self) -> dict:
+        with self.totals_lock:
+            strategies = {name: {"decisions": decisions, "mean_gap_ms": gap_sum / decisions if decisions else None,
+                                 "cumulative_gap_ms": gap_sum, "best_choice_rate": best / decisions if decisions else None,
+                                 "primary": name == self.primary_name}
+                          for name, (decisions, gap_sum, best) in self.totals.items()}
+            return {"strategies": strategies, "dropped": self.dropped}
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            if self.log_filename:
+                with open(self.log_filename, "w", newline="") as log_file:
+                    csv.writer(log_file).writerow(SHADOW_CSV_HEADERS)
+            self.running = True
+            self.thread = threading.Thread(target=self.run_eval_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"Shadow evaluation of {list(self.shadows)} ({self.feedback_mode} feedback) next to {self.primary_name}.")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+        self.thread = None
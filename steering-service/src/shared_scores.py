@@ -0,0 +1,176 @@
+import time
+import threading
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from selector import ArmScores
+
+logger = logging.getLogger("SharedScores")
+
+class SharedScoreBoard:
+    """Published selector scores in a ``multiprocessing.shared_memory`` block.
+
+    One learner process writes with ``publish``; any number of processes read with
+    ``read``. Writes are guarded by a seqlock: the sequence counter is odd while a
+    write is in progress, and a reader retries when the counter was odd or changed
+    while it copied the arrays. Readers never block the learner.
+    """
+    NAME_BYTES = 64
+    MAX_KEY_ROWS = 4
+    HEADER_FIELDS = 5  # sequence, state version, arm count, key rows (0 = no keys), unvisited count
+
+    def __init__(self, max_arms: int = 4096, name: str = None, create: bool = True):
+        self.max_arms = max_arms
+        header_bytes = 8 * self.HEADER_FIELDS
+        names_bytes = self.NAME_BYTES * max_arms
+        keys_bytes = 8 * self.MAX_KEY_ROWS * max_arms
+        unvisited_bytes = 8 * max_arms
+        size = header_bytes + names_bytes + keys_bytes + unvisited_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        buffer = self.shm.buf
+        self.header = np.ndarray((self.HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+        self.names = np.ndarray((max_arms,), dtype=f"S{self.NAME_BYTES}", buffer=buffer, offset=header_bytes)
+        self.keys = np.ndarray((self.MAX_KEY_ROWS, max_arms), dtype=np.float64, buffer=buffer,
+                               offset=header_bytes + names_bytes)
+        self.unvisited = np.ndarray((max_arms,), dtype=np.int64, buffer=buffer,
+                                    offset=header_bytes + names_bytes + keys_bytes)
+        if create:
+            self.header[:] = 0
+        self._read_cache = None
+        self._published_names = None
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def publish(self, scores: ArmScores, state_version: int) -> bool:
+        n_arms = len(scores.names)
+        keys = None if scores.keys is None else np.atleast_2d(scores.keys)
+        if n_arms > self.max_arms or (keys is not None and len(keys) > self.MAX_KEY_ROWS):
+            logger.error(f"Scores for {n_arms} arm(s) do not fit the shared board (max {self.max_arms}). Not published.")
+            return False
+        self.header[0] += 1
+        try:
+            if scores.names is not self._published_names:
+                self.names[:n_arms] = [name.encode()[:self.NAME_BYTES] for name in scores.names]
+                self._published_names = scores.names
+            if keys is not None:
+                self.keys[:len(keys), :n_arms] = keys
+            self.unvisited[:len(scores.unvisited)] = scores.unvisited
+            self.header[1:] = (state_version, n_arms, 0 if keys is None else len(keys), len(scores.unvisited))
+        finally:
+            self.header[0] += 1
+        return True
+
+    def read(self):
+        """Latest consistent ``(state_version, ArmScores)``, or None before the first publish."""
+        while True:
+            sequence = int(self.header[0])
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            cached = self._read_cache
+            if cached is not None and cached[0] == sequence:
+                return cached[1]
+            if sequence == 0:
+                return None
+            state_version, n_arms, key_rows, n_unvisited = (int(v) for v in self.header[1:])
+            raw_names = self.names[:n_arms].copy()
+            keys = self.keys[:key_rows, :n_arms].copy() if key_rows else None
+            unvisited = self.unvisited[:n_unvisited].astype(np.intp)
+            if int(self.header[0]) != sequence:
+                continue
+            names = cached[1][1].names if cached is not None and np.array_equal(cached[2], raw_names) else \
+                np.array([name.decode() for name in raw_names.tolist()], dtype=object)
+            if keys is not None and key_rows == 1:
+                keys = keys[0]
+            result = (state_version, ArmScores(names, keys, unvisited))
+            self._read_cache = (sequence, result, raw_names)
+            return result
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class ScorePublisher:
+    """Learner-side thread copying the selector's published scores to the board when its state changes."""
+    MEMBERSHIP_REFRESH_SECONDS = 1.0
+
+    def __init__(self, selector, board: SharedScoreBoard, interval_seconds: float = 0.01):
+        self.selector = selector
+        self.board = board
+        self.interval_seconds = interval_seconds
+        self.published_version = None
+        self.running = False
+        self.thread = None
+
+    def publish_now(self):
+        if not self.selector.nodes: return
+        version = self.selector.state_version
+        if version == self.published_version: return
+        scores = self.selector.published_scores()
+        if self.board.publish(scores, version):
+            self.published_version = version
+
+    def run_publish_loop(self):
+        last_refresh = 0.0
+        while self.running:
+            try:
+                now = time.monotonic()
+                if now - last_refresh >= self.MEMBERSHIP_REFRESH_SECONDS:
+                    # Workers have no monitor of their own; cache membership changes reach them through the learner.
+                    self.selector._refresh_nodes_from_monitor()
+                    last_refresh = now
+                self.publish_now()
+            except Exception as e:
+                logger.error(f"Failed to publish scores: {e}", exc_info=True)
+            time.sleep(self.interval_seconds)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self.run_publish_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"Publishing selector scores to shared memory block {self.board.name}.")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+class SharedScoresSelector:
+    """Worker-side, read-only selector answering ``select_arm`` from a ``SharedScoreBoard``.
+
+    ``strategy_selector`` is an unused instance of the learner's strategy class; only its
+    ``_priority_from_scores`` (exploration, Thompson draws, top-k) is used, so decisions
+    follow the same rules as in the learner.
+    """
+
+    def __init__(self, strategy_selector, board: SharedScoreBoard):
+        self.strategy_selector = strategy_selector
+        self.board = board
+
+    @property
+    def state_version(self) -> int:
+        return int(self.board.header[0])
+
+    @property
+    def nodes(self) -> list:
+        published = self.board.read()
+        return published[1].names.tolist() if published else []
+
+    def initialize(self, arms_names: list):
+        pass
+
+    def select_arm(self, client_location: tuple = None) -> list:
+        published = self.board.read()
+        if not published or not len(published[1].names): return []
+        return self.strategy_selector._priority_from_scores(published[1])
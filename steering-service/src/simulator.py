@@ -0,0 +1,268 @@
+import os
+import csv
+import json
+import math
+import heapq
+import random
+import argparse
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from columnar_log import ColumnarLogWriter, COLUMNAR_LOG_EXTENSION
+from dash_parser import DashParser
+from dynamic_latency_oracle import DynamicLatencyOracle
+from selector import D_UCB
+from offline_eval import STRATEGY_CLASSES, parse_policy, build_policy
+from steering_logs import CSV_HEADERS, CACHE_COORDS, ReplayDriver
+
+logger = logging.getLogger("Simulator")
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Graphics", "Logs")
+SIM_EPOCH = 1_700_000_000.0
+
+class SimulatedMonitor:
+    """ContainerMonitor stand-in with a fixed set of caches."""
+
+    def __init__(self, cache_coords: dict):
+        self.cache_coords = cache_coords
+        self.interval = 2
+        self.membership_version = 1
+        self.first_collection = threading.Event()
+        self.first_collection.set()
+
+    def getNodes(self) -> list:
+        return [(name, name) for name in self.cache_coords]
+
+    def get_node_coordinates(self) -> dict:
+        return {name: dict(coords) for name, coords in self.cache_coords.items()}
+
+class SteeringSimulation:
+    """One headless run of the browser scenario against one selector, in simulated time.
+
+    Mirrors ``Content Steering.html``: the client reports its position every second,
+    moves linearly to a cache's coordinates over the movement phase, and each spam
+    phase sends a ``/latency_event`` (factor 15) for a cache. The dash.js player polls
+    steering every manifest TTL and loads audio and video segments from the top
+    pathway, reporting each download time and server as ``/coords`` feedback. The
+    service side applies the same oracle, movement, shock and update steps as
+    ``app.py`` and writes its CSV rows.
+    """
+    SPAM_FACTOR = 15.0
+    ORACLE_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, policy: tuple, strategy_name: str, scenario: dict, seed: int):
+        self.scenario = scenario
+        self.strategy_name = strategy_name
+        self.rng = random.Random(seed)
+        random.seed(seed)
+        np.random.seed(seed)
+        self.now = 0.0
+        self.monitor = SimulatedMonitor(CACHE_COORDS)
+        self.oracle = DynamicLatencyOracle(self.monitor, update_interval_seconds=self.ORACLE_INTERVAL_SECONDS)
+        self.oracle.clock = self._wall_time
+        self.selector = build_policy(policy, self.oracle, monitor=self.monitor)
+        self.selector.initialize([name for name, _ in self.monitor.getNodes()])
+        self.driver = ReplayDriver(self.selector)
+        self.ttl_seconds = DashParser().build(target="", nodes=[], uri="", request=_Request()).get("TTL", 5)
+        self.lat, self.lon = scenario["initial_lat"], scenario["initial_lon"]
+        self.elapsed = 0
+        self.move = None
+        self.pathway = None
+        self.last_decision = "N/A"
+        self.events = []
+        self.sequence = 0
+        self.rows = []
+
+    def _wall_time(self) -> float:
+        return SIM_EPOCH + self.now
+
+    def _schedule(self, at: float, kind: str, *payload):
+        self.sequence += 1
+        heapq.heappush(self.events, (at, self.sequence, kind, payload))
+
+    # --- player side -------------------------------------------------------------
+    def _tick(self):
+        scenario = self.scenario
+        self.elapsed += 1
+        if self.move:
+            self._move_step()
+        if scenario["move_to"] and self.elapsed == scenario["move_start"]:
+            steps = max(1, min(scenario["move_duration"], scenario["duration"] - self.elapsed))
+            target = CACHE_COORDS[scenario["move_to"]]
+            self.move = [(target["lat"] - self.lat) / steps, (target["lon"] - self.lon) / steps, steps, target]
+        for target, start, duration in scenario["spam"]:
+            if self.elapsed == start:
+                self.oracle.apply_event_modifier(target, self.SPAM_FACTOR, duration)
+        self._report({"time": self.elapsed, "lat": self.lat, "long": self.lon})
+        if self.elapsed < scenario["duration"]:
+            self._schedule(self.now + 1.0, "tick")
+
+    def _move_step(self):
+        step_lat, step_lon, steps_left, target = self.move
+        self.lat, self.lon = self.lat + step_lat, self.lon + step_lon
+        self.move[2] -= 1
+        if self.move[2] <= 0:
+            self.lat, self.lon = target["lat"], target["lon"]
+            self.move = None
+
+    def _steering_poll(self):
+        # As app.py: the location the client last reported, not where it is by now.
+        ordered = self.selector.select_arm(self.driver.location)
+        self.last_decision = ordered[0] if ordered else "N/A_NO_NODES_FROM_SELECTION"
+        if ordered:
+            self.pathway = ordered[0]
+        self._schedule(self.now + self.ttl_seconds, "steering")
+
+    def _segment_request(self, media: str, index: int):
+        server = self.pathway
+        if server is None:
+            self._schedule(self.now + 0.1, "segment", media, index)
+            return
+        latency = self.oracle.get_current_latency(server)
+        scenario = self.scenario
+        download_ms = max(1.0, latency * scenario["rt_factor"] + scenario["transfer_ms"] + self.rng.gauss(0, scenario["jitter_ms"]))
+        self._schedule(self.now + download_ms / 1000.0, "segment_done", media, index, server, round(download_ms))
+        # dash.js fills its buffer back to back, then keeps one segment per segment duration.
+        gap = 0.0 if index < scenario["buffer_segments"] else scenario["segment_seconds"]
+        self._schedule(self.now + download_ms / 1000.0 + gap, "segment", media, index + 1)
+
+    def _segment_done(self, media: str, index: int, server: str, rt_ms: int):
+        self._report({"time": self.elapsed, "lat": self.lat, "long": self.lon, "rt": rt_ms, "server_used": server})
+
+    # --- service side (app.py /coords) -------------------------------------------
+    def _report(self, data: dict):
+        lat, lon, server_used, rt = data["lat"], data["long"], data.get("server_used"), data.get("rt")
+        self.oracle.update_client_location(lat, lon)
+        moving = self.driver.observe(self._wall_time(), lat, lon)
+        latencies = self.oracle.get_all_current_latencies()
+        oracle_latency = latencies.get(server_used, self.oracle.get_current_latency(server_used)) if server_used else None
+        gamma = None
+        if isinstance(self.selector, D_UCB):
+            shock = self.selector._check_latency_shock(server_used, oracle_latency) if server_used else False
+            self.selector.update_environmental_state(moving, shock)
+            gamma = self.selector.current_gamma
+        counts, real_counts, values = self.selector.logged_state()
+        row = {"timestamp_server": self._wall_time(), "sim_time_client": data["time"], "client_lat": lat, "client_lon": lon,
+               "server_used_for_latency": server_used, "experienced_latency_ms_CLIENT": rt,
+               "experienced_latency_ms_ORACLE": oracle_latency, "experienced_latency_ms": oracle_latency,
+               "all_servers_oracle_latency_json": json.dumps(latencies),
+               "steering_decision_main_server": self.last_decision, "rl_strategy": self.strategy_name,
+               "rl_counts_json": json.dumps(counts), "rl_actual_counts_json": json.dumps(real_counts),
+               "rl_values_json": json.dumps(values), "gamma_value": gamma,
+               "all_servers_oracle_latency": latencies, "rl_counts": counts, "rl_actual_counts": real_counts, "rl_values": values}
+        self.rows.append(row)
+        if server_used:
+            self.selector.update(server_used, float(oracle_latency), (lat, lon))
+
+    def run(self) -> list:
+        self.oracle._update_latencies()
+        self._schedule(0.0, "steering")
+        self._schedule(0.0, "segment", "video", 0)
+        self._schedule(0.0, "segment", "audio", 0)
+        self._schedule(1.0, "tick")
+        self._schedule(self.ORACLE_INTERVAL_SECONDS, "oracle")
+        handlers = {"tick": self._tick, "steering": self._steering_poll,
+                    "segment": self._segment_request, "segment_done": self._segment_done,
+                    "oracle": self._oracle_tick}
+        end = float(self.scenario["duration"])
+        while self.events:
+            at, _, kind, payload = heapq.heappop(self.events)
+            if at > end: break
+            self.now = at
+            self.driver.now = self._wall_time()
+            handlers[kind](*payload)
+        return self.rows
+
+    def _oracle_tick(self):
+        self.oracle._update_latencies()
+        self._schedule(self.now + self.ORACLE_INTERVAL_SECONDS, "oracle")
+
+class _Request:
+    path = "/"
+
+def run_simulation(task: tuple) -> tuple:
+    """(strategy spec, seed, scenario, output path, log format) -> (output path, rows written)."""
+    spec, seed, scenario, path, log_format = task
+    strategy_name = spec.partition("=")[0]
+    rows = SteeringSimulation(parse_policy(spec), strategy_name, scenario, seed).run()
+    if log_format != "columnar":
+        with open(path, "w", newline="") as log_file:
+            writer = csv.writer(log_file)
+            writer.writerow(CSV_HEADERS)
+            writer.writerows([row.get(header) for header in CSV_HEADERS] for row in rows)
+    if log_format != "csv":
+        columnar_log = ColumnarLogWriter(os.path.splitext(path)[0] + COLUMNAR_LOG_EXTENSION, strategy_name,
+                                         chunk_rows=len(rows) or 1, flush_seconds=math.inf)
+        for row in rows:
+            columnar_log.append(row)
+        columnar_log.close()
+    return path, len(rows)
+
+def numbered_paths(directory: str, base_name: str, count: int) -> list:
+    """``count`` unused ``<base_name>_<n>.csv`` paths, numbered like app.py's log files."""
+    paths, number = [], 1
+    while len(paths) < count:
+        path = os.path.join(directory, f"{base_name}_{number}.csv")
+        if not os.path.exists(path) and not os.path.exists(os.path.join(directory, f"{base_name}_{number}{COLUMNAR_LOG_EXTENSION}")):
+            paths.append(path)
+        number += 1
+    return paths
+
+def parse_spam(value: str) -> tuple:
+    target, start, duration = value.split(":")
+    return target, int(start), int(duration)
+
+def add_scenario_arguments(parser: argparse.ArgumentParser):
+    """The scenario options of the browser page, shared with sweep.py."""
+    parser.add_argument("--duration", type=int, default=180, help="Simulation seconds. Default: 180")
+    parser.add_argument("--initial_lat", type=float, default=-23.0, help="Initial client latitude. Default: -23.0")
+    parser.add_argument("--initial_lon", type=float, default=-47.0, help="Initial client longitude. Default: -47.0")
+    parser.add_argument("--move_to", choices=list(CACHE_COORDS), default=None, help="Move towards this cache. Default: stay still")
+    parser.add_argument("--move_start", type=int, default=45, help="Movement start second. Default: 45")
+    parser.add_argument("--move_duration", type=int, default=60, help="Seconds to reach the target. Default: 60")
+    parser.add_argument("--spam", type=parse_spam, action="append", default=[],
+                        help="Spam phase cache:start:duration, e.g. video-streaming-cache-2:45:135. Repeatable.")
+    parser.add_argument("--segment_seconds", type=float, default=4.0, help="Segment duration. Default: 4")
+    parser.add_argument("--buffer_segments", type=int, default=3, help="Segments loaded back to back at start. Default: 3")
+    parser.add_argument("--rt_factor", type=float, default=1.0, help="Client download time = oracle latency x this + transfer. Default: 1.0")
+    parser.add_argument("--transfer_ms", type=float, default=20.0, help="Segment transfer time added to the latency. Default: 20")
+    parser.add_argument("--jitter_ms", type=float, default=5.0, help="Std-dev of client-side timing noise. Default: 5")
+
+def scenario_from_args(args) -> dict:
+    return {"duration": args.duration, "initial_lat": args.initial_lat, "initial_lon": args.initial_lon,
+            "move_to": args.move_to, "move_start": args.move_start, "move_duration": args.move_duration,
+            "spam": args.spam, "segment_seconds": args.segment_seconds, "buffer_segments": args.buffer_segments,
+            "rt_factor": args.rt_factor, "transfer_ms": args.transfer_ms, "jitter_ms": args.jitter_ms}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless discrete-event simulation of the browser steering scenario.")
+    parser.add_argument("--strategy", action="append", default=None,
+                        help="Strategy name (or selector spec as in offline_eval.py). Repeatable. Default: every strategy.")
+    parser.add_argument("--runs", type=int, default=10, help="Seeded runs per strategy. Default: 10")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first run; run i uses seed + i. Default: 0")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Default: CPU count")
+    parser.add_argument("--output_dir", type=str, default=DEFAULT_LOG_DIR, help=f"Where logs are written. Default: {DEFAULT_LOG_DIR}")
+    parser.add_argument("--log_suffix", type=str, default="_sim",
+                        help="Suffix after log_<strategy> (use with aggregate_logs.py --suffix_pattern). Default: _sim")
+    parser.add_argument("--log_format", choices=["csv", "columnar", "both"], default="csv",
+                        help="Write CSV logs, columnar .cols logs (as app.py --log_format), or both. Default: csv")
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    for noisy in ("SelectorStrategies", "LatencyOracle"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    scenario = scenario_from_args(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = []
+    for spec in args.strategy or list(STRATEGY_CLASSES):
+        base_name = f"log_{spec.partition('=')[0]}{args.log_suffix}"
+        for i, path in enumerate(numbered_paths(args.output_dir, base_name, args.runs)):
+            tasks.append((spec, args.seed + i, scenario, path, args.log_format))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for path, rows in executor.map(run_simulation, tasks, chunksize=max(1, len(tasks) // (4 * (args.workers or os.cpu_count() or 1)))):
+            logger.debug(f"{os.path.basename(path)}: {rows} rows")
+    logger.info(f"Wrote {len(tasks)} simulated run(s) to {args.output_dir}.")
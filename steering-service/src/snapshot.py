@@ -0,0 +1,89 @@
+import os
+import time
+import tempfile
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("SelectorSnapshot")
+
+def save_selector_snapshot(selector, path: str):
+    """Atomically write the selector state to ``path`` (numpy .npz)."""
+    state = selector.snapshot_state()
+    state["selector_class"] = np.array(selector.__class__.__name__)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot_", suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            np.savez(tmp_file, **state)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_selector_snapshot(selector, path: str, current_nodes: list = None) -> bool:
+    """Restore ``selector`` from ``path``; arms are then reconciled against ``current_nodes`` if given."""
+    if not os.path.exists(path):
+        logger.warning(f"Snapshot {path} not found. Starting cold.")
+        return False
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            state = {key: data[key] for key in data.files}
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read snapshot {path}: {e}. Starting cold.")
+        return False
+    saved_class = str(state.pop("selector_class", ""))
+    if saved_class != selector.__class__.__name__:
+        logger.warning(f"Snapshot {path} holds {saved_class or 'unknown'} state, not {selector.__class__.__name__}. Starting cold.")
+        return False
+    selector.restore_state(state)
+    if current_nodes:
+        stale_arms = [name for name in selector.nodes if name not in current_nodes]
+        if stale_arms:
+            logger.info(f"Dropping snapshot arms no longer served by the monitor: {stale_arms}")
+        selector.initialize(current_nodes)
+    logger.info(f"Warm start from {path}: {len(selector.nodes)} arm(s) restored.")
+    return True
+
+class SelectorSnapshotter:
+    def __init__(self, selector, path: str, interval_seconds: float = 10.0):
+        self.selector = selector
+        self.path = path
+        self.interval_seconds = max(0.5, interval_seconds)
+        self.running = False
+        self.thread = None
+
+    def snapshot_now(self):
+        try:
+            save_selector_snapshot(self.selector, self.path)
+            logger.debug(f"Selector snapshot written to {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to write selector snapshot {self.path}: {e}", exc_info=True)
+
+    def run_snapshot_loop(self):
+        while self.running:
+            for _ in range(int(self.interval_seconds * 10)):
+                if not self.running:
+                    break
+                time.sleep(0.1)
+            if self.running:
+                self.snapshot_now()
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self.run_snapshot_loop, daemon=True)
+            self.thread.start()
+            logger.info(f"Selector snapshots every {self.interval_seconds}s to {self.path}.")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.interval_seconds + 1)
+        self.thread = None
+        self.snapshot_now()
@@ -0,0 +1,106 @@
+import heapq
+import logging
+
+import numpy as np
+
+spatial_logger = logging.getLogger("SpatialIndex")
+
+def unit_vectors(lats, lons) -> np.ndarray:
+    """(lat, lon) in degrees to points on the unit sphere; chord length is monotonic in great-circle distance."""
+    lats_rad, lons_rad = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lats_rad)
+    return np.stack([cos_lat * np.cos(lons_rad), cos_lat * np.sin(lons_rad), np.sin(lats_rad)], axis=-1)
+
+class CacheSpatialIndex:
+    """k-d tree over cache positions for "K nearest caches to this client" queries.
+
+    Built from ``ContainerMonitor.get_node_coordinates()`` output. ``rebuild`` is a
+    no-op while the set of caches and their coordinates stay the same, so it can be
+    called on every membership refresh.
+    """
+    LEAF_SIZE = 16
+
+    def __init__(self):
+        self.coords = {}
+        self.names = []
+        self.points = np.empty((0, 3))
+        self.version = 0
+        # Flat tree: per node the split axis (-1 for leaves), split value, children and point range.
+        self._split_axis, self._split_value = [], []
+        self._left, self._right = [], []
+        self._start, self._end = [], []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.coords
+
+    def rebuild(self, node_coords: dict) -> bool:
+        coords = {str(name): (float(c['lat']), float(c['lon'])) for name, c in (node_coords or {}).items()
+                  if c and c.get('lat') is not None and c.get('lon') is not None}
+        if coords == self.coords:
+            return False
+        self.coords = coords
+        names = list(coords)
+        points = unit_vectors([coords[n][0] for n in names], [coords[n][1] for n in names]) if names else np.empty((0, 3))
+        self._split_axis, self._split_value = [], []
+        self._left, self._right = [], []
+        self._start, self._end = [], []
+        order = np.arange(len(names))
+        if names:
+            self._build(points, order, 0, len(names))
+        self.names = [names[i] for i in order]
+        self.points = points[order]
+        self.version += 1
+        spatial_logger.debug(f"Spatial index rebuilt with {len(self.names)} cache(s).")
+        return True
+
+    def _build(self, points: np.ndarray, order: np.ndarray, start: int, end: int) -> int:
+        node = len(self._split_axis)
+        self._split_axis.append(-1); self._split_value.append(0.0)
+        self._left.append(-1); self._right.append(-1)
+        self._start.append(start); self._end.append(end)
+        if end - start <= self.LEAF_SIZE:
+            return node
+        block = points[order[start:end]]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        middle = (end - start) // 2
+        partition = np.argpartition(block[:, axis], middle)
+        order[start:end] = order[start:end][partition]
+        self._split_axis[node] = axis
+        self._split_value[node] = float(points[order[start + middle], axis])
+        self._left[node] = self._build(points, order, start, start + middle)
+        self._right[node] = self._build(points, order, start + middle, end)
+        return node
+
+    def nearest(self, lat: float, lon: float, k: int) -> list:
+        """Names of the ``k`` caches closest to (lat, lon), nearest first."""
+        if not self.names or k <= 0:
+            return []
+        if k >= len(self.names):
+            return [self.names[i] for i in self._nearest_bruteforce(lat, lon)]
+        query = unit_vectors(lat, lon)
+        best = []  # max-heap of (-squared chord, point id)
+        self._search(0, query, k, best)
+        return [self.names[i] for _, i in sorted(((-d, i) for d, i in best))]
+
+    def _nearest_bruteforce(self, lat: float, lon: float) -> np.ndarray:
+        return np.argsort(((self.points - unit_vectors(lat, lon)) ** 2).sum(axis=1))
+
+    def _search(self, node: int, query: np.ndarray, k: int, best: list):
+        axis = self._split_axis[node]
+        if axis < 0:
+            start = self._start[node]
+            squared = ((self.points[start:self._end[node]] - query) ** 2).sum(axis=1)
+            for offset, distance in enumerate(squared.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, start + offset))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, start + offset))
+            return
+        gap = float(query[axis]) - self._split_value[node]
+        near, far = (self._left[node], self._right[node]) if gap < 0 else (self._right[node], self._left[node])
+        self._search(near, query, k, best)
+        if len(best) < k or gap * gap < -best[0][0]:
+            self._search(far, query, k, best)
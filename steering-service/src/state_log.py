@@ -0,0 +1,139 @@
+import os
+import csv
+import json
+import math
+import argparse
+import threading
+import logging
+
+import numpy as np
+
+from columnar_log import SCALAR_FIELDS, NAME_FIELDS, MATRIX_FIELDS, is_columnar_log, read_columnar_log, name_column
+
+logger = logging.getLogger("StateLog")
+
+STATE_LOG_SUFFIX = ".state.jsonl"
+RL_STATE_COLUMNS = ("rl_counts_json", "rl_actual_counts_json", "rl_values_json")
+
+def state_log_path(log_path: str) -> str:
+    """The state sidecar of a CSV or columnar log: ``log_d_ucb_1.csv`` -> ``log_d_ucb_1.state.jsonl``."""
+    return os.path.splitext(log_path.rstrip(os.sep))[0] + STATE_LOG_SUFFIX
+
+class StateDeltaLog:
+    """Selector state of every log row as deltas, instead of three JSON dicts over all arms per row.
+
+    Line n of the sidecar belongs to row n of the log: the row's ``timestamp_server``,
+    the arm rows the selector changed since the previous line and its scalar state
+    (``Selector.take_state_delta``). A keyframe with every arm is written on the first
+    row, every ``keyframe_rows`` rows, whenever the logged selector is a different one
+    (geo-cells) and when the selector dropped its change set (arm set change,
+    renormalization). Between keyframes a line costs the same whatever the fleet size.
+    Callers hold ``lock`` around ``record`` and the row write so both keep one order.
+    """
+
+    def __init__(self, path: str, keyframe_rows: int = 1000):
+        self.path = path
+        self.keyframe_rows = max(1, keyframe_rows)
+        self.rows = 0
+        self.last_selector = None
+        self.lock = threading.Lock()
+        self.file = open(path, "w", buffering=1)
+
+    def record(self, selector, timestamp: float = None):
+        delta = {}
+        if selector is not None:
+            keyframe = self.rows % self.keyframe_rows == 0 or selector is not self.last_selector
+            delta = selector.take_state_delta(keyframe=keyframe)
+        self.last_selector = selector
+        self.rows += 1
+        try:
+            self.file.write(json.dumps({"timestamp_server": timestamp, **delta}) + "\n")
+        except (OSError, ValueError) as e:
+            logger.error(f"Error writing state log {self.path}: {e}")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def _number(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+def _columnar_records(path: str):
+    log = read_columnar_log(path)
+    columns = {field: np.asarray(values).tolist() for field, values in log.columns.items()}
+    names = {field: name_column(log, field).tolist() for field in NAME_FIELDS}
+    oracle = np.asarray(log.matrices["all_servers_oracle_latency"]).tolist()
+    for i in range(len(columns["timestamp_server"])):
+        record = {field: values[i] for field, values in columns.items()}
+        record.update({field: values[i] for field, values in names.items()})
+        record["rl_strategy"] = log.strategy
+        record["all_servers_oracle_latency_json"] = json.dumps({server: latency for server, latency in zip(log.servers, oracle[i])
+                                                               if not math.isnan(latency)})
+        yield record
+
+def read_log_records(path: str) -> tuple:
+    """(column names, iterator of row dicts) for every row of a CSV or columnar log, location-only rows included."""
+    if is_columnar_log(path):
+        return [*SCALAR_FIELDS, *NAME_FIELDS, "rl_strategy", *MATRIX_FIELDS], _columnar_records(path)
+    log_file = open(path, newline="")
+    reader = csv.DictReader(log_file)
+    fieldnames = reader.fieldnames or []
+
+    def records():
+        with log_file:
+            yield from reader
+    return fieldnames, records()
+
+def iter_logged_states(log_path: str, state_path: str = None, selector_spec: str = None):
+    """Replays a log's state sidecar; yields (row, (counts, real_counts, values)) as ``logged_state`` gave them.
+
+    The selector is built from the log's ``rl_strategy`` unless ``selector_spec`` (as in
+    offline_eval.py) is given, e.g. to pass the constructor arguments the service ran with.
+    """
+    # Imported here: app.py only needs the writer and should not load the analysis modules at startup.
+    from offline_eval import parse_policy, build_policy
+    from steering_logs import LoggedLatencyOracle
+    _, records = read_log_records(log_path)
+    selector = None
+    with open(state_path or state_log_path(log_path)) as state_file:
+        for row_number, (record, line) in enumerate(zip(records, state_file), 1):
+            delta = json.loads(line)
+            if delta.get("timestamp_server") is not None and \
+               _number(record.get("timestamp_server")) != delta["timestamp_server"]:
+                raise ValueError(f"State log line {row_number} belongs to another row "
+                                 f"(timestamp {delta['timestamp_server']}, log row {record.get('timestamp_server')}).")
+            if selector is None:
+                policy = parse_policy(selector_spec or record.get("rl_strategy") or "")
+                selector = build_policy(policy, LoggedLatencyOracle())
+            if "arms" in delta:
+                selector.apply_state_delta(delta)
+            lat, lon = _number(record.get("client_lat")), _number(record.get("client_lon"))
+            if not math.isnan(lat) and not math.isnan(lon):
+                selector.update_client_location(lat, lon)
+            yield record, selector.logged_state()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuilds the rl_* state columns of a log written with --state_logging delta.")
+    parser.add_argument("log", type=str, help="CSV log or columnar .cols log directory.")
+    parser.add_argument("--state", type=str, default=None, help="State sidecar. Default: <log name>.state.jsonl")
+    parser.add_argument("--output", type=str, default=None, help="Full CSV log to write. Default: <log name>_full.csv")
+    parser.add_argument("--selector", type=str, default=None,
+                        help="Selector spec as in offline_eval.py (d_ucb, ThompsonSamplingSelector={...}). Default: the log's rl_strategy")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("SelectorStrategies").setLevel(logging.WARNING)
+    output = args.output or os.path.splitext(args.log.rstrip(os.sep))[0] + "_full.csv"
+    fieldnames, _ = read_log_records(args.log)
+    fieldnames = list(dict.fromkeys([*fieldnames, *RL_STATE_COLUMNS]))
+    rows = 0
+    with open(output, "w", newline="") as output_file:
+        writer = csv.DictWriter(output_file, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for record, state in iter_logged_states(args.log, args.state, args.selector):
+            writer.writerow({**record, **{column: json.dumps(values) for column, values in zip(RL_STATE_COLUMNS, state)}})
+            rows += 1
+    logger.info(f"{rows} rows with selector state written to {output}")
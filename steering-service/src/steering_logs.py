@@ -0,0 +1,203 @@
+import os
+import csv
+import glob
+import json
+import math
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from geo import haversine_km, MOVEMENT_THRESHOLD_KM, CLIENT_COORDS_UPDATE_INTERVAL_SEC
+from selector import D_UCB
+from columnar_log import COLUMNAR_LOG_EXTENSION, is_columnar_log, read_columnar_log, name_column
+
+logger = logging.getLogger("SteeringLogs")
+
+# Columns of the CSV logs written by app.py and simulator.py.
+CSV_HEADERS = [
+    "timestamp_server", "sim_time_client", "client_lat", "client_lon",
+    "server_used_for_latency", "experienced_latency_ms_CLIENT",
+    "experienced_latency_ms_ORACLE", "experienced_latency_ms",
+    "all_servers_oracle_latency_json", "steering_decision_main_server",
+    "rl_strategy", "rl_counts_json", "rl_actual_counts_json", "rl_values_json", "gamma_value"
+]
+LOG_GLOB = "log_*.csv"
+COLUMNAR_LOG_GLOB = f"log_*{COLUMNAR_LOG_EXTENSION}"
+# Same caches and coordinates as starting_streaming.sh / Content Steering.html; logs do not record cache positions.
+CACHE_COORDS = {
+    "video-streaming-cache-1": {"lat": -23.0, "lon": -47.0},
+    "video-streaming-cache-2": {"lat": -33.0, "lon": -71.0},
+    "video-streaming-cache-3": {"lat": 5.0, "lon": -74.0},
+}
+
+# One row per /coords feedback sample; servers index the columns of ``oracle``.
+SteeringLog = namedtuple("SteeringLog", ["path", "strategy", "servers", "timestamp", "sim_time", "lat", "lon",
+                                         "chosen", "decision", "feedback_oracle", "feedback_client", "oracle"])
+
+def log_files(path: str) -> list:
+    """A single log, or every ``log_*.csv`` and columnar ``log_*.cols`` directly inside a directory."""
+    if os.path.isdir(path) and not is_columnar_log(path):
+        return sorted(glob.glob(os.path.join(path, LOG_GLOB)) + glob.glob(os.path.join(path, COLUMNAR_LOG_GLOB)))
+    return [path]
+
+def load_cache_coords(path: str = None) -> dict:
+    """``{cache: {"lat": ..., "lon": ...}}`` from a JSON file, or the testbed's CACHE_COORDS without one."""
+    if not path:
+        return {name: dict(coords) for name, coords in CACHE_COORDS.items()}
+    with open(path) as coords_file:
+        coords = json.load(coords_file)
+    return {str(name): {"lat": float(point["lat"]), "lon": float(point["lon"])} for name, point in coords.items()}
+
+def _float(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else math.nan
+    except ValueError:
+        return math.nan
+
+# One /coords feedback row as app.py logged it; ``oracle`` maps every server to its latency.
+FeedbackRow = namedtuple("FeedbackRow", ["timestamp", "sim_time", "lat", "lon", "server_used", "decision",
+                                         "feedback_oracle", "feedback_client", "oracle", "strategy"])
+
+def iter_feedback_rows(path: str):
+    """Streams the feedback rows of one app.py CSV log.
+
+    Location-only rows (no ``server_used_for_latency``) carry no feedback and are
+    skipped. Columnar logs are read without any JSON parsing.
+    """
+    if is_columnar_log(path):
+        yield from _iter_columnar_feedback_rows(path)
+        return
+    with open(path, newline="") as log_file:
+        for record in csv.DictReader(log_file):
+            server_used = record.get("server_used_for_latency")
+            if not server_used: continue
+            try:
+                oracle = json.loads(record.get("all_servers_oracle_latency_json") or "{}")
+            except json.JSONDecodeError:
+                oracle = {}
+            yield FeedbackRow(timestamp=_float(record.get("timestamp_server")), sim_time=_float(record.get("sim_time_client")),
+                              lat=_float(record.get("client_lat")), lon=_float(record.get("client_lon")),
+                              server_used=server_used, decision=record.get("steering_decision_main_server"),
+                              feedback_oracle=_float(record.get("experienced_latency_ms_ORACLE")),
+                              feedback_client=_float(record.get("experienced_latency_ms_CLIENT")),
+                              oracle={name: _float(latency) for name, latency in oracle.items()},
+                              strategy=record.get("rl_strategy"))
+
+def _iter_columnar_feedback_rows(path: str):
+    log = read_columnar_log(path)
+    used, decisions = name_column(log, "server_used_for_latency"), name_column(log, "steering_decision_main_server")
+    oracle = np.asarray(log.matrices["all_servers_oracle_latency"])
+    columns = {field: np.asarray(values).tolist() for field, values in log.columns.items()}
+    for i in np.flatnonzero(np.asarray(log.columns["server_used_for_latency"]) >= 0).tolist():
+        yield FeedbackRow(timestamp=columns["timestamp_server"][i], sim_time=columns["sim_time_client"][i],
+                          lat=columns["client_lat"][i], lon=columns["client_lon"][i], server_used=used[i], decision=decisions[i],
+                          feedback_oracle=columns["experienced_latency_ms_ORACLE"][i],
+                          feedback_client=columns["experienced_latency_ms_CLIENT"][i],
+                          oracle=dict(zip(log.servers, oracle[i].tolist())), strategy=log.strategy)
+
+def _load_columnar_log(path: str) -> SteeringLog:
+    log = read_columnar_log(path)
+    feedback = np.flatnonzero(np.asarray(log.columns["server_used_for_latency"]) >= 0)
+    servers = list(dict.fromkeys([*log.servers, *(log.names[i] for i in np.unique(np.asarray(log.columns["server_used_for_latency"])[feedback]))]))
+    server_index = {name: i for i, name in enumerate(servers)}
+    # Name table index -> server column (-1 for names that are not servers, e.g. "N/A"); the extra entry maps -1.
+    to_server = np.array([server_index.get(name, -1) for name in log.names] + [-1], dtype=np.int32)
+    oracle = np.full((len(feedback), len(servers)), np.nan)
+    oracle[:, :len(log.servers)] = np.asarray(log.matrices["all_servers_oracle_latency"])[feedback]
+    column = lambda field: np.asarray(log.columns[field])[feedback]
+    return SteeringLog(path=path, strategy=log.strategy, servers=servers, timestamp=column("timestamp_server"),
+                       sim_time=column("sim_time_client"), lat=column("client_lat"), lon=column("client_lon"),
+                       chosen=to_server[column("server_used_for_latency")], decision=to_server[column("steering_decision_main_server")],
+                       feedback_oracle=column("experienced_latency_ms_ORACLE"), feedback_client=column("experienced_latency_ms_CLIENT"),
+                       oracle=oracle)
+
+def load_log(path: str) -> SteeringLog:
+    """Reads all feedback rows of one log into numpy columns; oracle latencies missing for a server are NaN."""
+    if is_columnar_log(path):
+        return _load_columnar_log(path)
+    rows, servers = list(iter_feedback_rows(path)), {}
+    for row in rows:
+        for name in row.oracle:
+            servers.setdefault(name, len(servers))
+        servers.setdefault(row.server_used, len(servers))
+    names = list(servers)
+    oracle_matrix = np.full((len(rows), len(names)), np.nan)
+    for i, row in enumerate(rows):
+        for name, latency in row.oracle.items():
+            oracle_matrix[i, servers[name]] = latency
+    column = lambda field, dtype=float: np.array([getattr(row, field) for row in rows], dtype=dtype)
+    return SteeringLog(path=path, strategy=rows[0].strategy if rows else None, servers=names,
+                       timestamp=column("timestamp"), sim_time=column("sim_time"), lat=column("lat"), lon=column("lon"),
+                       chosen=np.array([servers[row.server_used] for row in rows], dtype=np.int32),
+                       decision=np.array([servers.get(row.decision, -1) for row in rows], dtype=np.int32),
+                       feedback_oracle=column("feedback_oracle"), feedback_client=column("feedback_client"),
+                       oracle=oracle_matrix)
+
+class LoggedLatencyOracle:
+    """Stands in for the latency oracle during a replay: serves the current row's logged latencies."""
+
+    def __init__(self):
+        self.latencies = {}
+
+    def set_latencies(self, latencies: dict):
+        self.latencies = latencies
+
+    def get_all_current_latencies(self) -> dict:
+        return dict(self.latencies)
+
+    def get_current_latency(self, server_name: str) -> float:
+        return self.latencies.get(server_name, math.inf)
+
+    def update_client_location(self, lat: float, lon: float):
+        pass
+
+class ReplayDriver:
+    """Drives a selector with the calls app.py makes for each /coords report.
+
+    Movement is reconstructed from the logged coordinates with the service's
+    threshold and check interval, shocks with D_UCB's own detector, and the selector's
+    clock follows the logged server time so time-based state behaves as it did live.
+    ``cache_coords`` stands in for the monitor's node coordinates, which LinUCB and
+    the nearest_k filter need.
+    """
+
+    def __init__(self, selector, cache_coords: dict = None):
+        self.selector = selector
+        self.cache_coords = cache_coords
+        self.now = 0.0
+        selector.clock = lambda: self.now
+        self.last_coords = None  # (lat, lon, time)
+        self.location = None  # last reported (lat, lon), for the nearest_k filter
+
+    def initialize(self, servers: list):
+        self.selector.initialize(servers)
+        if self.cache_coords:
+            self.selector.set_arm_coordinates(self.cache_coords)
+
+    def observe(self, timestamp: float, lat: float, lon: float) -> bool:
+        """Advances the clock and client location; returns the movement flag app.py would compute."""
+        self.now = timestamp
+        if math.isnan(lat) or math.isnan(lon): return False
+        self.selector.update_client_location(lat, lon)
+        self.location = (lat, lon)
+        if self.last_coords is None:
+            self.last_coords = (lat, lon, timestamp)
+            return False
+        if timestamp - self.last_coords[2] < CLIENT_COORDS_UPDATE_INTERVAL_SEC: return False
+        moved_km = float(haversine_km(self.last_coords[0], self.last_coords[1], np.array([lat]), np.array([lon]))[0])
+        self.last_coords = (lat, lon, timestamp)
+        return moved_km > MOVEMENT_THRESHOLD_KM
+
+    def decide(self):
+        ordered = self.selector.select_arm(self.location)
+        return ordered[0] if ordered else None
+
+    def feedback(self, server: str, latency_ms: float, moving: bool) -> bool:
+        """Environment flags then the update, as in app.py; returns whether a shock was detected."""
+        shock = False
+        if isinstance(self.selector, D_UCB):
+            shock = self.selector._check_latency_shock(server, latency_ms)
+            self.selector.update_environmental_state(moving, shock)
+        self.selector.update(server, float(latency_ms), self.location)
+        return shock
@@ -0,0 +1,168 @@
+import os
+import csv
+import json
+import math
+import random
+import argparse
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from offline_eval import parse_policy, build_policy
+from replay import replay_rows
+from simulator import SteeringSimulation, add_scenario_arguments, scenario_from_args
+from steering_logs import log_files, iter_feedback_rows, load_cache_coords, LoggedLatencyOracle
+
+logger = logging.getLogger("Sweep")
+
+METRIC_COLUMNS = ["steps", "mean_latency_ms", "mean_regret_ms", "best_choice_rate"]
+
+def parse_param(value: str) -> tuple:
+    """``NAME=v1,v2,...`` (values for the grid or random choice) or ``NAME=low:high`` (a range for random search)."""
+    name, _, values = value.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"Expected NAME=v1,v2 or NAME=low:high, got '{value}'.")
+    if ":" in values:
+        low, high = (json.loads(bound) for bound in values.split(":", 1))
+        return name, (low, high)
+    return name, [json.loads(item) for item in values.split(",")]
+
+def grid_points(params: list) -> list:
+    if any(isinstance(values, tuple) for _, values in params):
+        raise ValueError("Ranges (low:high) need random search; use --samples.")
+    names = [name for name, _ in params]
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values for _, values in params))]
+
+def random_points(params: list, samples: int, seed: int) -> list:
+    """Seeded random search: lists are sampled uniformly, int ranges as ints, float ranges uniformly."""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(samples):
+        point = {}
+        for name, values in params:
+            if isinstance(values, list):
+                point[name] = rng.choice(values)
+            elif all(isinstance(bound, int) for bound in values):
+                point[name] = rng.randint(*values)
+            else:
+                point[name] = round(rng.uniform(*values), 6)
+        points.append(point)
+    return points
+
+def point_key(point: dict) -> str:
+    return json.dumps(point, sort_keys=True)
+
+def score_simulated_rows(rows: list) -> dict:
+    """Sweep metrics from simulator rows: each feedback sample is charged the regret of the cache the player used."""
+    steps, latency_sum, regret_sum, best_choices = 0, 0.0, 0.0, 0
+    for row in rows:
+        server, latency = row["server_used_for_latency"], row["experienced_latency_ms_ORACLE"]
+        if not server or latency is None: continue
+        best = min(row["all_servers_oracle_latency"].values())
+        steps += 1
+        latency_sum += latency
+        regret_sum += latency - best
+        best_choices += latency <= best
+    return {"steps": steps, "latency_sum_ms": latency_sum, "regret_sum_ms": regret_sum, "best_choices": best_choices}
+
+def run_point(task: tuple) -> dict:
+    """(selector, point, seed, scenario, logs, feedback mode, cache coordinates) -> one results row."""
+    selector_spec, point, seed, scenario, logs, feedback_mode, cache_coords = task
+    name, _, base_kwargs = selector_spec.partition("=")
+    kwargs = {**(json.loads(base_kwargs) if base_kwargs else {}), **point}
+    policy = parse_policy(f"{name}={json.dumps(kwargs)}")
+    if logs:
+        totals = {"steps": 0, "latency_sum_ms": 0.0, "regret_sum_ms": 0.0, "best_choices": 0}
+        for path in logs:
+            random.seed(seed)
+            np.random.seed(seed)
+            run = replay_rows(build_policy(policy, LoggedLatencyOracle()), iter_feedback_rows(path), feedback_mode=feedback_mode,
+                              cache_coords=cache_coords)
+            totals["steps"] += run["scored_steps"]
+            totals["latency_sum_ms"] += run["latency_sum_ms"]
+            totals["regret_sum_ms"] += run["cumulative_regret_ms"]
+            totals["best_choices"] += run["best_choices"]
+    else:
+        totals = score_simulated_rows(SteeringSimulation(policy, name, scenario, seed).run())
+    steps = totals["steps"]
+    return {"point": point_key(point), "seed": seed, "steps": steps,
+            "mean_latency_ms": totals["latency_sum_ms"] / steps if steps else math.nan,
+            "mean_regret_ms": totals["regret_sum_ms"] / steps if steps else math.nan,
+            "best_choice_rate": totals["best_choices"] / steps if steps else math.nan}
+
+def finished_runs(path: str) -> set:
+    """(point, seed) pairs already in a results table, so an interrupted sweep resumes where it stopped."""
+    if not os.path.exists(path): return set()
+    with open(path, newline="") as results_file:
+        return {(record["point"], int(record["seed"])) for record in csv.DictReader(results_file)}
+
+def summarize(path: str) -> list:
+    """Per point: mean of each metric over its seeds, best (lowest mean regret) first."""
+    by_point = {}
+    with open(path, newline="") as results_file:
+        for record in csv.DictReader(results_file):
+            by_point.setdefault(record["point"], []).append(record)
+    summaries = []
+    for point, records in by_point.items():
+        summary = {"point": point, "seeds": len(records)}
+        for column in METRIC_COLUMNS:
+            summary[column] = float(np.nanmean([float(record[column]) for record in records]))
+        summaries.append(summary)
+    return sorted(summaries, key=lambda summary: (math.isnan(summary["mean_regret_ms"]), summary["mean_regret_ms"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel grid or random search over selector constructor arguments and class constants.")
+    parser.add_argument("--selector", type=str, default="d_ucb",
+                        help="Strategy name, selector class or module:Class, optionally =JSON base kwargs. Default: d_ucb")
+    parser.add_argument("--param", type=parse_param, action="append", required=True,
+                        help="NAME=v1,v2,... or NAME=low:high. Upper-case names are class constants (GAMMA_STILL), "
+                             "others constructor arguments (epsilon). Repeatable.")
+    parser.add_argument("--samples", type=int, default=None, help="Random search with this many points. Default: full grid")
+    parser.add_argument("--seeds", type=int, default=5, help="Runs per point, seeds seed..seed+N-1 shared by all points. Default: 5")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for runs and random search. Default: 0")
+    parser.add_argument("--logs", nargs="+", default=None, help="Replay these logs (files or directories) instead of simulating.")
+    parser.add_argument("--feedback", choices=["counterfactual", "logged"], default="counterfactual",
+                        help="Replay feedback mode, as in replay.py. Default: counterfactual")
+    parser.add_argument("--results", type=str, default="sweep_results.csv",
+                        help="Results table; finished (point, seed) runs already in it are skipped. Default: sweep_results.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Default: CPU count")
+    parser.add_argument("--cache_coords", type=str, default=None,
+                        help="With --logs: JSON file of {cache: {\"lat\": ..., \"lon\": ...}}. Default: the caches of starting_streaming.sh")
+    parser.add_argument("--top", type=int, default=10, help="Points shown in the final ranking. Default: 10")
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    for noisy in ("SelectorStrategies", "LatencyOracle"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    try:
+        points = random_points(args.param, args.samples, args.seed) if args.samples else grid_points(args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    logs = [path for target in args.logs for path in log_files(target)] if args.logs else None
+    if args.logs and not logs:
+        parser.error("No log files found.")
+    scenario = scenario_from_args(args)
+    done = finished_runs(args.results)
+    cache_coords = load_cache_coords(args.cache_coords)
+    tasks = [(args.selector, point, args.seed + i, scenario, logs, args.feedback, cache_coords)
+             for point in points for i in range(args.seeds) if (point_key(point), args.seed + i) not in done]
+    logger.info(f"{len(points)} points x {args.seeds} seeds: {len(tasks)} to run, {len(points) * args.seeds - len(tasks)} already in {args.results}")
+
+    write_header = not os.path.exists(args.results) or os.path.getsize(args.results) == 0
+    with open(args.results, "a", newline="") as results_file, ProcessPoolExecutor(max_workers=args.workers) as executor:
+        writer = csv.DictWriter(results_file, fieldnames=["point", "seed"] + METRIC_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        futures = [executor.submit(run_point, task) for task in tasks]
+        for completed, future in enumerate(as_completed(futures), 1):
+            writer.writerow(future.result())
+            results_file.flush()
+            if completed % 50 == 0 or completed == len(futures):
+                logger.info(f"{completed}/{len(futures)} runs finished")
+
+    for rank, summary in enumerate(summarize(args.results)[:args.top], 1):
+        logger.info(f"#{rank} {summary['point']}: regret {summary['mean_regret_ms']:.2f}ms, latency {summary['mean_latency_ms']:.2f}ms, "
+                    f"best choice {summary['best_choice_rate']:.1%} over {summary['seeds']} seed(s)")